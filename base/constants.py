@@ -12,6 +12,7 @@ UNSAFE_QUERY_CHARS = ("'", '"', ";", "\\")
 
 class LoggerConfig:
     file_path = "log.txt"
+    slow_query_file_path = "slow_query_log.txt"
 
 
 class Config:
@@ -21,42 +22,84 @@ class Config:
     class Headers:
         system = "SYSTEM"
         database = "DATABASE"
+        database_replicas = "DATABASE_REPLICAS"
         web_interface = "WEB_INTERFACE"
+        result_cache = "RESULT_CACHE"
         logger = "LOGGER"
 
     class Keys:
         class System:
             is_initialised = "is_initialised"
+            sample_data_loader = "sample_data_loader"
 
         class Database:
+            backend = "backend"
+            sqlite_file_path = "sqlite_file_path"
             schema = "schema"
             username = "username"
             password = "password"
             host = "host"
+            pool_size = "pool_size"
+            prepared_statement_cache_size = "prepared_statement_cache_size"
+            fetch_batch_size = "fetch_batch_size"
+            insert_batch_size = "insert_batch_size"
+
+        class DatabaseReplicas:
+            hosts = "hosts"
+            sticky_seconds = "sticky_seconds"
 
         class WebInterface:
             host = "host"
             port = "port"
 
+        class ResultCache:
+            backend = "backend"
+            max_rows = "max_rows"
+            ttl_seconds = "ttl_seconds"
+
         class Logger:
             max_number_of_lines = "max_number_of_lines"
+            slow_query_threshold_ms = "slow_query_threshold_ms"
+            sql_log_mode = "sql_log_mode"
+            sql_log_sample_rate = "sql_log_sample_rate"
+            record_query_shapes = "record_query_shapes"
 
     class DefaultKeyValuePairs:
         system = {
-            "is_initialised": "0"
+            "is_initialised": "0",
+            "sample_data_loader": "load_data"
         }
         database = {
+            "backend": "mysql",
+            "sqlite_file_path": "online_shop.sqlite3",
             "schema": "online_shop",
             "username": "root",
             "password": "abc123",
-            "host": "127.0.0.1"
+            "host": "127.0.0.1",
+            "pool_size": "5",
+            "prepared_statement_cache_size": "32",
+            "fetch_batch_size": "500",
+            "insert_batch_size": "1000"
+        }
+        database_replicas = {
+            "hosts": "",
+            "sticky_seconds": "5"
         }
         web_interface = {
             "host": "127.0.0.1",
             "port": "5000"
         }
+        result_cache = {
+            "backend": "memory",
+            "max_rows": "50000",
+            "ttl_seconds": "60"
+        }
         logger = {
-            "max_number_of_lines": "50000"
+            "max_number_of_lines": "50000",
+            "slow_query_threshold_ms": "500",
+            "sql_log_mode": "full",
+            "sql_log_sample_rate": "100",
+            "record_query_shapes": "0"
         }
 
 
@@ -64,6 +107,7 @@ class Msg:
     class Config:
         initialised = "Welcome!\n\nThe file `config.cfg` has been created.\nPlease ensure that the configuration matches\nthat of the database server.\n\nWhen ready, simply execute `main.py` again."
         configuration_read = "Configuration has been read from `config.cfg`."
+        not_found = "The file `config.cfg` does not exist yet. Please execute `main.py` to create it first."
 
     class Symbol:
         message = "*"
@@ -80,12 +124,43 @@ class Msg:
         connection_stopped = "Connection to database server stopped."
         tables_created = "Database tables successfully created."
         command_processed = "Executed SQL command "
+        command_parameters = " with parameters "
+        records_inserted = "Inserted {} records using SQL command {} in {:.3f} seconds ({:.0f} records/second)."
+        slow_query = "Slow SQL command took {:.3f} seconds ({} rows): "
+        replica_unavailable = "Replica database server {} is unavailable, so the query is executed on the primary."
+        replicas_not_supported = "The database backend does not support replicas, so they are not used."
+        local_infile_rejected = "Loading local files is not allowed, so sample data is added with INSERT instead."
+        load_data_failed = "Failed to load the sample data file `{}`, so it is added with INSERT instead: {}"
 
         # Error
         invalid_database_credentials = "Invalid username or password for database! Please check your config file."
         database_not_exists = "The target database does not exist! Please check your config file."
         not_connected = "Not connected to database server."
+        unknown_backend = "Unknown database backend `{}`! Please check your config file."
+        unknown_sql_log_mode = "Unknown SQL log mode `{}`! Please check your config file."
+        load_data_not_supported = "The database backend does not support loading local files."
         failed_to_add_data = "Failed to add data to the database."
+        sample_data_not_added = "Failed to add the sample data file `{}`, so the database is not initialised: {}"
+
+    class ResultCache:
+        # Error
+        unknown_backend = "Unknown result cache backend `{}`! Please check your config file."
+
+    class Migrations:
+        # Info
+        applied = "Applied migration {} ({}) to the schema."
+        # Error
+        failed = "Failed to apply migration {} ({}) to the schema: {}"
+
+    class Rollups:
+        # Info
+        rebuilt = "Rebuilt the rollup table `{}` from its orders."
+        # Error
+        not_rebuilt = "Failed to rebuild the rollup table `{}`: {}"
+
+    class SearchIndex:
+        # Warning
+        not_built = "The search index could not be built, so searches will not find any records: {}"
 
     class DatabaseQueryConstructor:
         # Error
@@ -94,6 +169,9 @@ class Msg:
         number_of_field_and_value_mismatch = "Number of fields is not the same as number of values, so cannot render SQL UPDATE query."
         missing_ranged_values_limits = "Missing lower and upper limits required for adding a condition for ranged values."
         cannot_render = "Unable to render the SQL query."
+        no_relationship = "There is no relationship between the tables `{}` and `{}`, so the query cannot be related."
+        unknown_aggregate_function = "Unknown aggregate function `{}`, so it cannot be added to the SQL query."
+        immutable = "Query constructors cannot be changed, so `{}` cannot be set. Use the `add_*` methods instead."
 
     class FileManipulation:
         # Error
@@ -109,6 +187,9 @@ class DBSchemaTableNames:
     customer_orders = "customer_orders"
     products = "products"
     company_orders = "company_orders"
+    schema_migrations = "schema_migrations"
+    daily_product_demand = "daily_product_demand"
+    daily_inbound_stock = "daily_inbound_stock"
 
 
 class DBFields:
@@ -118,6 +199,8 @@ class DBFields:
         first_name = "first_name"
         email_address = "email_address"
         phone = "phone"
+        last_name_reversed = "last_name_reversed"
+        first_name_reversed = "first_name_reversed"
 
     class CustomerLocations:
         customer_id = "customer_id"
@@ -146,6 +229,8 @@ class DBFields:
         name = "name"
         description = "description"
         qty_in_stock = "qty_in_stock"
+        gtin14_reversed = "gtin14_reversed"
+        name_reversed = "name_reversed"
 
     class CompanyOrders:
         id = "id"
@@ -154,6 +239,23 @@ class DBFields:
         qty_bought = "qty_bought"
         delivery_date = "delivery_date"
 
+    class SchemaMigrations:
+        version = "version"
+        name = "name"
+        applied_at = "applied_at"
+
+    class DailyProductDemand:
+        delivery_date = "delivery_date"
+        product_gtin14 = "product_gtin14"
+        qty_ordered = "qty_ordered"
+        number_of_orders = "number_of_orders"
+
+    class DailyInboundStock:
+        delivery_date = "delivery_date"
+        product_gtin14 = "product_gtin14"
+        qty_bought = "qty_bought"
+        number_of_orders = "number_of_orders"
+
 
 class DBQueryFilePath:
     """File paths for database commands on the local machine."""
@@ -163,6 +265,14 @@ class DBQueryFilePath:
     # Startup SQL Commands
     startup = "commands/startup.sql"
 
+    # Schema Migrations (files named `<version>_<name>.sql`, applied in order of version)
+    migrations = "commands/migrations"
+    schema_migrations = "commands/migrations/schema_migrations.sql"
+
+    # Rollups (adding the rows of the delivery dates in a range, from the orders delivered on them)
+    add_daily_product_demand = "commands/rollups/add_daily_product_demand.sql"
+    add_daily_inbound_stock = "commands/rollups/add_daily_inbound_stock.sql"
+
     # Data Insertion
     add_company_order = "commands/insertion/add_company_order.sql"
     add_customer_location = "commands/insertion/add_customer_location.sql"
@@ -173,7 +283,79 @@ class DBQueryFilePath:
     add_product = "commands/insertion/add_product.sql"
 
 
+class ConditionTypes:
+    """Types of condition that the query constructor can add to a query."""
+    exact_value = "exact_value"
+    at_most = "at_most"
+    at_least = "at_least"
+    between = "between"
+    like = "like"
+    like_any = "like_any"
+    match = "match"
+    nested_query = "nested_query"
+    related_query = "related_query"
+
+
+class PlanFindings:
+    """Parts of the plan of a query, chosen by the DBMS, that the index advisor reports."""
+    full_table_scan = "full table scan"
+    filesort = "filesort"
+    dependent_subquery = "dependent subquery"
+
+
+class AggregateFunctions:
+    """Aggregate functions that the query constructor can select, or add a condition on for groups of records."""
+    count = "count"
+    count_distinct = "count_distinct"
+    sum = "sum"
+    min = "min"
+    max = "max"
+
+
+class RelatedQueryStyles:
+    """Ways of rendering a condition on the records of a related table (see `QueryConstructor.add_related_query`)."""
+    exists = "exists"
+    nested_in = "nested_in"
+
+
+class DatabaseBackends:
+    """Database engines that the database connector can work with."""
+    mysql = "mysql"
+    sqlite = "sqlite"
+
+
+class ResultFormats:
+    """Forms in which the database connector can return selected records."""
+    tuples = "tuples"
+    records = "records"
+    columns = "columns"
+
+
+class SQLLogModes:
+    """Which SQL statements the database connector prints and logs. Failed statements are logged in every mode except
+    `off`, and `slow` logs the statements that reach the slow query threshold.
+    """
+    off = "off"
+    errors = "errors"
+    sampled = "sampled"
+    slow = "slow"
+    full = "full"
+    all = (off, errors, sampled, slow, full)
+
+
+class ResultCacheBackends:
+    """Places where the results of select queries can be cached."""
+    memory = "memory"
+
+
+class SampleDataLoaders:
+    """Ways of adding the sample data to the database when it is initialised."""
+    load_data = "load_data"
+    insert = "insert"
+
+
 class SampleDataFilePath:
+    directory = "sample_data"
     customers = "sample_data/customers.txt"
     locations = "sample_data/locations.txt"
     customer_locations = "sample_data/customer_locations.txt"
@@ -181,3 +363,57 @@ class SampleDataFilePath:
     products = "sample_data/products.txt"
     customer_order_items = "sample_data/customer_order_items.txt"
     company_orders = "sample_data/company_orders.txt"
+
+
+# Insert queries and the sample data files they are used with, in the order the sample data must be added
+SAMPLE_DATA_SOURCES = (
+    (DBQueryFilePath.add_customer, SampleDataFilePath.customers),
+    (DBQueryFilePath.add_product, SampleDataFilePath.products),
+    (DBQueryFilePath.add_location, SampleDataFilePath.locations),
+    (DBQueryFilePath.add_customer_location, SampleDataFilePath.customer_locations),
+    (DBQueryFilePath.add_company_order, SampleDataFilePath.company_orders),
+    (DBQueryFilePath.add_customer_order, SampleDataFilePath.customer_orders),
+    (DBQueryFilePath.add_customer_order_item, SampleDataFilePath.customer_order_items)
+)
+
+
+# Tables whose records are changed by the DBMS when records of the key table are updated or deleted, through the
+# `ON UPDATE CASCADE` and `ON DELETE CASCADE` foreign keys in the schema
+CASCADED_TABLES = {
+    DBSchemaTableNames.customers: (DBSchemaTableNames.customer_locations,),
+    DBSchemaTableNames.locations: (DBSchemaTableNames.customer_locations,),
+    DBSchemaTableNames.customer_locations: (DBSchemaTableNames.customer_orders,),
+    DBSchemaTableNames.customer_orders: (DBSchemaTableNames.customer_order_items,),
+    DBSchemaTableNames.products: (DBSchemaTableNames.customer_order_items, DBSchemaTableNames.company_orders,
+                                  DBSchemaTableNames.daily_product_demand, DBSchemaTableNames.daily_inbound_stock)
+}
+
+
+# Fields that match the records of one table with the records of another, derived from the foreign keys in the schema
+# (customer orders reference customers and locations through their customer location)
+TABLE_RELATIONSHIPS = {
+    (DBSchemaTableNames.customers, DBSchemaTableNames.customer_locations):
+        (DBFields.Customers.id, DBFields.CustomerLocations.customer_id),
+    (DBSchemaTableNames.locations, DBSchemaTableNames.customer_locations):
+        (DBFields.Locations.id, DBFields.CustomerLocations.location_id),
+    (DBSchemaTableNames.customers, DBSchemaTableNames.customer_orders):
+        (DBFields.Customers.id, DBFields.CustomerOrders.customer_id),
+    (DBSchemaTableNames.locations, DBSchemaTableNames.customer_orders):
+        (DBFields.Locations.id, DBFields.CustomerOrders.delivery_location),
+    (DBSchemaTableNames.customer_orders, DBSchemaTableNames.customer_order_items):
+        (DBFields.CustomerOrders.id, DBFields.CustomerOrderItems.customer_order_id),
+    (DBSchemaTableNames.products, DBSchemaTableNames.customer_order_items):
+        (DBFields.Products.gtin14, DBFields.CustomerOrderItems.product_gtin14),
+    (DBSchemaTableNames.products, DBSchemaTableNames.company_orders):
+        (DBFields.Products.gtin14, DBFields.CompanyOrders.product_gtin14)
+}
+
+
+# Generated columns holding the values of other columns reversed, so that values ending with a string can be searched
+# for through an index, as values beginning with the reversed string
+REVERSED_FIELDS = {
+    (DBSchemaTableNames.customers, DBFields.Customers.last_name): DBFields.Customers.last_name_reversed,
+    (DBSchemaTableNames.customers, DBFields.Customers.first_name): DBFields.Customers.first_name_reversed,
+    (DBSchemaTableNames.products, DBFields.Products.gtin14): DBFields.Products.gtin14_reversed,
+    (DBSchemaTableNames.products, DBFields.Products.name): DBFields.Products.name_reversed
+}
@@ -9,6 +9,11 @@ This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
 
 from base.constants import *
 from configparser import ConfigParser
+import re
+
+# The table and the columns that the insert queries in `commands/insertion` insert into
+INSERT_TABLE_NAME_PATTERN = re.compile(r"INSERT\s+INTO\s+(?:`[^`]*`\.)?`?(\w+)", re.IGNORECASE)
+INSERT_COLUMNS_PATTERN = re.compile(r"\(([^)]*)\)\s*VALUES", re.IGNORECASE)
 
 
 def print_message(message: str):
@@ -57,6 +62,22 @@ def get_text_file_lines(file_path: str) -> list:
     return result
 
 
+def read_insert_query(insert_query_file_path: str) -> tuple:
+    """Return a tuple of the insert query in the file (for the schema in `DBSchemaTableNames`), the name of the table it
+    inserts into, and the list of the columns it inserts the values of, in order.
+    :type insert_query_file_path: str
+    """
+    query = get_text_file_lines_as_single_line(insert_query_file_path).format(DBSchemaTableNames.schema)
+    table_name = INSERT_TABLE_NAME_PATTERN.match(query).group(1)
+    columns = [column.strip().strip("`") for column in INSERT_COLUMNS_PATTERN.search(query).group(1).split(",")]
+    return query, table_name, columns
+
+
+def join_lines(lines) -> str:
+    """Return a string containing all lines (e.g. those returned by `get_text_file_lines`), one per line."""
+    return "\n".join(line.rstrip("\r\n") for line in lines)
+
+
 def format_text_file_lines(text_file_lines: list, **kwargs) -> list:
     """Return a list containing the lines, formatted.
     :type text_file_lines: list
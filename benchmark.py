@@ -0,0 +1,653 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (c) 2019 Jared Recomendable.
+Licensed under the GNU General Public License Version 3.
+This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
+"""
+
+from base.utils import *
+from database.connector import DatabaseConnector
+from database.query_constructors import QueryConstructor
+from database.migrations import run_pending_migrations
+from database.rollups import rebuild_rollups
+from database.index_advisor import QueryShapeRecorder, get_schema_indexes, get_index_advice, format_index_advice
+from database.statistics import get_percentile
+from contextlib import redirect_stdout
+from datetime import timedelta
+from os import devnull, remove
+from os.path import exists
+from tempfile import mkstemp
+from time import perf_counter
+import argparse
+
+BENCHMARK_SCHEMA_SUFFIX = "_benchmark"
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Time the queries made by the web interface on a database backend, "
+                                                 "using a separate schema filled with the sample data.")
+    parser.add_argument("--backend", choices=(DatabaseBackends.mysql, DatabaseBackends.sqlite),
+                        help="database backend to benchmark (by default, the one in `config.cfg`)")
+    parser.add_argument("--iterations", type=int, default=100, help="number of times each workload is run")
+    parser.add_argument("--sql-log-mode", choices=SQLLogModes.all,
+                        help="SQL statements to log (by default, as set in `config.cfg`)")
+    parser.add_argument("--scale", type=int, default=1,
+                        help="number of copies of the customer orders and their items in the sample data")
+    parser.add_argument("--explain", action="store_true",
+                        help="print the query plans of filtering records by a related table with nested IN queries "
+                             "and with EXISTS")
+    parser.add_argument("--skip-migrations", action="store_true",
+                        help="leave out the migrations of the schema (e.g. to time the queries without their indexes)")
+    parser.add_argument("--rendering", action="store_true",
+                        help="time rendering the SQL queries of the data filter forms instead, without a database")
+    parser.add_argument("--advise-indexes", action="store_true",
+                        help="print the findings in the plans of the queries of the workloads, with the indexes "
+                             "suggested for them")
+    parser.add_argument("--bulk-insert", action="store_true",
+                        help="also time inserting the customer order items again, one record at a time and in "
+                             "batches")
+    parser.add_argument("--check-plans", action="store_true",
+                        help="check that the plans of the related queries and of the narrow ranges of the data filter "
+                             "forms read their tables through the expected indexes, and exit with status 1 if not")
+    return parser.parse_args()
+
+
+def get_database_config(backend_name) -> dict:
+    """Return the database section of `config.cfg` (or the default one, if there is no config file yet), set up to
+    use the benchmark schema on the backend.
+    """
+    config = read_config(Config.file_path)
+    if config.has_section(Config.Headers.database):
+        database_config = dict(config[Config.Headers.database])
+    else:
+        database_config = dict(Config.DefaultKeyValuePairs.database)
+    if backend_name:
+        database_config[Config.Keys.Database.backend] = backend_name
+    database_config[Config.Keys.Database.schema] = database_config.get(
+        Config.Keys.Database.schema,
+        Config.DefaultKeyValuePairs.database[Config.Keys.Database.schema]
+    ) + BENCHMARK_SCHEMA_SUFFIX
+    if database_config.get(Config.Keys.Database.backend) == DatabaseBackends.sqlite:
+        database_config[Config.Keys.Database.sqlite_file_path] = mkstemp(suffix=".sqlite3")[1]
+    return database_config
+
+
+def get_logger_config(sql_log_mode) -> dict:
+    """Return the logger section of `config.cfg` (or the default one, if there is no config file yet), with the SQL
+    log mode given, if any.
+    """
+    config = read_config(Config.file_path)
+    if config.has_section(Config.Headers.logger):
+        logger_config = dict(config[Config.Headers.logger])
+    else:
+        logger_config = dict(Config.DefaultKeyValuePairs.logger)
+    if sql_log_mode:
+        logger_config[Config.Keys.Logger.sql_log_mode] = sql_log_mode
+    return logger_config
+
+
+def set_up_schema(database_connector, migrate: bool = True):
+    """Create the benchmark schema, apply its migrations unless `migrate` is set to False, and fill it with the sample
+    data.
+    :type migrate: bool
+    """
+    schema_definition = format_text_file_lines(get_text_file_lines(DBQueryFilePath.schema),
+                                               schema_name=DBSchemaTableNames.schema)
+    database_connector.execute_queries_sequentially(schema_definition)
+    if migrate:
+        run_pending_migrations(database_connector)
+    for query_file_path, data_source_file_path in SAMPLE_DATA_SOURCES:
+        query = read_insert_query(query_file_path)[0]
+        rows = (line.strip().split(";") for line in get_text_file_lines(data_source_file_path))
+        database_connector.insert_many(query, rows, skip_invalid_rows=True)
+
+
+def scale_sample_data(database_connector, scale: int):
+    """Add copies of the customer orders and their items, so that there are `scale` times as many as in the sample
+    data. Each copy is ordered a second later than the one before it, to keep the customer orders unique.
+    :type scale: int
+    """
+    customer_order_fields = (DBFields.CustomerOrders.id, DBFields.CustomerOrders.customer_id,
+                             DBFields.CustomerOrders.datetime_ordered, DBFields.CustomerOrders.delivery_date,
+                             DBFields.CustomerOrders.delivery_location)
+    customer_order_item_fields = (DBFields.CustomerOrderItems.customer_order_id,
+                                  DBFields.CustomerOrderItems.product_gtin14, DBFields.CustomerOrderItems.qty_bought)
+    customer_orders = QueryConstructor(DBSchemaTableNames.customer_orders, DBSchemaTableNames.schema)
+    customer_order_items = QueryConstructor(DBSchemaTableNames.customer_order_items, DBSchemaTableNames.schema)
+    for field in customer_order_fields:
+        customer_orders = customer_orders.add_field(field)
+    for field in customer_order_item_fields:
+        customer_order_items = customer_order_items.add_field(field)
+    customer_order_records = select(database_connector, customer_orders)
+    customer_order_item_records = select(database_connector, customer_order_items)
+    if not customer_order_records:
+        return
+
+    insert_query = "INSERT INTO `{}`.`{}` ({}) VALUES ({})"
+    insert_customer_order_query = insert_query.format(DBSchemaTableNames.schema, DBSchemaTableNames.customer_orders,
+                                                      ", ".join(customer_order_fields),
+                                                      ", ".join(["%s"] * len(customer_order_fields)))
+    insert_customer_order_item_query = insert_query.format(DBSchemaTableNames.schema,
+                                                           DBSchemaTableNames.customer_order_items,
+                                                           ", ".join(customer_order_item_fields),
+                                                           ", ".join(["%s"] * len(customer_order_item_fields)))
+    id_offset = max(record[0] for record in customer_order_records)
+    for copy in range(1, scale):
+        database_connector.insert_many(insert_customer_order_query, (
+            (record[0] + copy * id_offset, record[1], record[2] + timedelta(seconds=copy), record[3], record[4])
+            for record in customer_order_records
+        ))
+        database_connector.insert_many(insert_customer_order_item_query, (
+            (record[0] + copy * id_offset, record[1], record[2]) for record in customer_order_item_records
+        ))
+
+
+def get_customers_by_product_queries() -> list:
+    """Return a list of tuples of the name, query and parameters of selecting the customers who bought a product, with
+    a chain of nested IN queries and with a chain of related (EXISTS) queries.
+    """
+    products = QueryConstructor(DBSchemaTableNames.products, DBSchemaTableNames.schema).add_condition_like(
+        DBFields.Products.name, "Chocolate"
+    )
+
+    customer_order_items = QueryConstructor(DBSchemaTableNames.customer_order_items, DBSchemaTableNames.schema)
+    customer_order_items = customer_order_items.add_nested_query(
+        DBFields.CustomerOrderItems.product_gtin14, products.add_field(DBFields.Products.gtin14)
+    ).add_field(DBFields.CustomerOrderItems.customer_order_id)
+    customer_orders = QueryConstructor(DBSchemaTableNames.customer_orders, DBSchemaTableNames.schema)
+    customer_orders = customer_orders.add_nested_query(DBFields.CustomerOrders.id, customer_order_items).add_field(
+        DBFields.CustomerOrders.customer_id
+    )
+    customers = QueryConstructor(DBSchemaTableNames.customers, DBSchemaTableNames.schema)
+    customers = customers.add_nested_query(DBFields.Customers.id, customer_orders)
+    nested_query = (customers.render_select_query(), customers.get_select_parameters())
+
+    customer_order_items = QueryConstructor(DBSchemaTableNames.customer_order_items, DBSchemaTableNames.schema,
+                                            RelatedQueryStyles.exists).add_related_query(products)
+    customer_orders = QueryConstructor(DBSchemaTableNames.customer_orders, DBSchemaTableNames.schema,
+                                       RelatedQueryStyles.exists).add_related_query(customer_order_items)
+    customers = QueryConstructor(DBSchemaTableNames.customers, DBSchemaTableNames.schema,
+                                 RelatedQueryStyles.exists).add_related_query(customer_orders)
+    related_query = (customers.render_select_query(), customers.get_select_parameters())
+
+    return [
+        ("filter customers by product (IN)",) + nested_query,
+        ("filter customers by product (EXISTS)",) + related_query
+    ]
+
+
+def select(database_connector, query_constructor: QueryConstructor) -> list:
+    return database_connector.execute_query(query_constructor.render_select_query(), select=True,
+                                            parameters=query_constructor.get_select_parameters(), prepared=True)[1]
+
+
+# Sums of the quantity of products ordered by customers for each delivery date, from the customer order items, as
+# read from the rollup `daily_product_demand` instead
+PRODUCT_DEMAND_QUERY = ("SELECT customer_orders.delivery_date, customer_order_items.product_gtin14, "
+                        "SUM(customer_order_items.qty_bought), COUNT(*) FROM `{0}`.`customer_order_items` "
+                        "INNER JOIN `{0}`.`customer_orders` "
+                        "ON customer_orders.id = customer_order_items.customer_order_id "
+                        "{1}GROUP BY customer_orders.delivery_date, customer_order_items.product_gtin14")
+PRODUCT_INBOUND_STOCK_QUERY = ("SELECT delivery_date, SUM(qty_bought), COUNT(*) FROM `{}`.`company_orders` "
+                               "WHERE product_gtin14 = %s GROUP BY delivery_date")
+
+
+def get_narrow_range_query_constructors() -> tuple:
+    """Return a tuple of the query constructors of narrow ranges of the data filter forms, which the indexes of the
+    first migration are for: of customer orders and of company orders by delivery date, and of products by stock.
+    """
+    import webfrontend.utils as utils
+    return (
+        utils.get_customer_orders_query_constructor(get_filter_form_result(
+            customer_delivery_date_lower_limit_string="2019-06-01",
+            customer_delivery_date_upper_limit_string="2019-06-30"
+        )),
+        utils.get_company_orders_query_constructor(get_filter_form_result(
+            company_delivery_date_lower_limit_string="2021-03-01",
+            company_delivery_date_upper_limit_string="2021-03-31"
+        )),
+        utils.get_products_query_constructor(get_filter_form_result(
+            qty_in_stock_lower_limit_string="1001", qty_in_stock_upper_limit_string="1100"
+        ))
+    )
+
+
+def get_plan_checks() -> list:
+    """Return a list of tuples of the name of each checked query, the query constructor of it, the table it reads and
+    the names of the indexes that the table is expected to be read through (any one of them).
+    """
+    customer_orders_delivered, company_orders_delivered, products_in_stock = get_narrow_range_query_constructors()
+    # Related queries are rendered in the style of the backend, and join the items to the products bought through
+    # the index on the product, or to the orders through the primary key
+    products_bought = QueryConstructor(DBSchemaTableNames.products, DBSchemaTableNames.schema).add_condition_like(
+        DBFields.Products.name, "Chocolate"
+    )
+    customer_orders_by_product = QueryConstructor(
+        DBSchemaTableNames.customer_orders, DBSchemaTableNames.schema
+    ).add_related_query(QueryConstructor(
+        DBSchemaTableNames.customer_order_items, DBSchemaTableNames.schema
+    ).add_related_query(products_bought))
+    return [
+        ("filter customer orders by product", customer_orders_by_product, DBSchemaTableNames.customer_order_items,
+         ("product_id_idx", "PRIMARY")),
+        ("filter customer orders by delivery date", customer_orders_delivered, DBSchemaTableNames.customer_orders,
+         ("customer_delivery_date_idx",)),
+        ("filter company orders by delivery date", company_orders_delivered, DBSchemaTableNames.company_orders,
+         ("company_delivery_date_idx",)),
+        ("filter products by stock", products_in_stock, DBSchemaTableNames.products, ("qty_in_stock_idx",))
+    ]
+
+
+def check_query_plans(database_connector) -> list:
+    """Return a list of tuples of the name of each checked query, whether its plan reads the table through one of the
+    expected indexes, and the indexes that the plan reads the table through (or the error message).
+    """
+    plan_checks = []
+    for name, query_constructor, table_name, expected_indexes in get_plan_checks():
+        plan_indexes = database_connector.get_plan_indexes(query_constructor.render_select_query(),
+                                                           query_constructor.get_select_parameters())
+        if plan_indexes[0] == 1:
+            plan_checks.append((name, False, plan_indexes[1]))
+            continue
+        table_indexes = [index_name for plan_table_name, index_name in plan_indexes[1]
+                         if plan_table_name == table_name]
+        plan_checks.append((name, any(index_name in expected_indexes for index_name in table_indexes),
+                            ", ".join(table_indexes) or "no index"))
+    return plan_checks
+
+
+def print_plan_checks(plan_checks):
+    print("\n{:<42}{:>8}  {}".format("Plan check", "Result", "Indexes read"))
+    for name, is_passed, details in plan_checks:
+        print("{:<42}{:>8}  {}".format(name, "ok" if is_passed else "FAILED", details))
+
+
+def get_workloads(database_connector, rollups: bool = True) -> list:
+    """Return a list of tuples of the name and function of each workload, which make the same queries as the pages of
+    the web interface. The workloads reading the rollup tables are left out unless `rollups` is set to True.
+    :type rollups: bool
+    """
+    customers = QueryConstructor(DBSchemaTableNames.customers, DBSchemaTableNames.schema)
+    locations = QueryConstructor(DBSchemaTableNames.locations, DBSchemaTableNames.schema)
+    customer_locations = QueryConstructor(DBSchemaTableNames.customer_locations, DBSchemaTableNames.schema)
+    products = QueryConstructor(DBSchemaTableNames.products, DBSchemaTableNames.schema)
+    customer_orders = QueryConstructor(DBSchemaTableNames.customer_orders, DBSchemaTableNames.schema)
+    customer_order_items = QueryConstructor(DBSchemaTableNames.customer_order_items, DBSchemaTableNames.schema)
+
+    customer_ids = [record[0] for record in select(database_connector, customers.add_field(DBFields.Customers.id))]
+    product_gtin14s = [record[0] for record in select(database_connector, products.add_field(DBFields.Products.gtin14))]
+
+    # Query constructors are immutable, so each run builds its queries from the empty ones above
+    def list_customers(i):
+        query = customers.add_order(DBFields.Customers.id, ascending=True).render_select_query()
+        for _ in database_connector.iter_query(query)[1]:
+            pass
+
+    def list_products(i):
+        query = products.add_fields(
+            (DBFields.Products.gtin14, DBFields.Products.name, DBFields.Products.qty_in_stock)
+        ).add_order(DBFields.Products.gtin14, ascending=True).render_select_query()
+        for _ in database_connector.iter_query(query)[1]:
+            pass
+
+    def show_customer_details(i):
+        customer_id = customer_ids[i % len(customer_ids)]
+        select(database_connector, customers.add_condition_exact_value(DBFields.Customers.id, customer_id))
+        customer_location_ids = customer_locations.add_condition_exact_value(
+            DBFields.CustomerLocations.customer_id, customer_id
+        ).add_field(DBFields.CustomerLocations.location_id)
+        select(database_connector, locations.add_nested_query(DBFields.Locations.id, customer_location_ids))
+
+    def filter_customers_by_name(i):
+        select(database_connector, customers.add_condition_like(DBFields.Customers.last_name, "an"))
+
+    def filter_products_by_gtin14_ending(i):
+        select(database_connector, products.add_condition_like(DBFields.Products.gtin14, "0019", at_end=True))
+
+    def filter_customer_orders_by_product(i):
+        products_bought = products.add_condition_like(DBFields.Products.name, "Chocolate")
+        select(database_connector, customer_orders.add_related_query(
+            customer_order_items.add_related_query(products_bought)
+        ))
+
+    def search_products(i):
+        select(database_connector, products.add_condition_match(
+            (DBFields.Products.name, DBFields.Products.description), "dark chocolate"
+        ))
+
+    # The search index is built the same way as by the web interface, and searched for the same text as with LIKE
+    import webfrontend.utils as utils
+    from database.search_index import SearchIndex
+    utils.database_connector = database_connector
+    utils.search_index = SearchIndex()
+    utils.build_search_index()
+    search_texts = ("choc", "smith", "0019", "road")
+
+    def search_records(i):
+        utils.search_records(search_texts[i % len(search_texts)])
+
+    def search_records_with_sql(i):
+        for table_name, (key_field, searched_fields, label_fields) in utils.SEARCHED_TABLES.items():
+            for field in searched_fields:
+                select(database_connector, QueryConstructor(table_name, DBSchemaTableNames.schema).add_condition_like(
+                    field, search_texts[i % len(search_texts)]
+                ))
+
+    customer_orders_delivered, company_orders_delivered, products_in_stock = get_narrow_range_query_constructors()
+
+    def filter_customer_orders_by_delivery_date(i):
+        select(database_connector, customer_orders_delivered)
+
+    def filter_company_orders_by_delivery_date(i):
+        select(database_connector, company_orders_delivered)
+
+    def filter_products_by_stock(i):
+        select(database_connector, products_in_stock)
+
+    def get_customers_by_product_workload(query, parameters):
+        def filter_customers_by_product(i):
+            database_connector.execute_query(query, select=True, parameters=parameters, prepared=True)
+        return filter_customers_by_product
+
+    def count_orders_per_delivery_date(i):
+        select(database_connector, (
+            customer_orders
+            .add_field(DBFields.CustomerOrders.delivery_date)
+            .add_aggregate(AggregateFunctions.count)
+            .add_group(DBFields.CustomerOrders.delivery_date)
+        ))
+
+    def count_orders_per_delivery_date_in_python(i):
+        numbers_of_orders = {}
+        for record in select(database_connector, customer_orders):
+            delivery_date = record[3]
+            numbers_of_orders[delivery_date] = numbers_of_orders.get(delivery_date, 0) + 1
+
+    # The quantities ordered for each delivery date, summed from the orders and read from the rollups
+    product_demand_query = PRODUCT_DEMAND_QUERY.format(DBSchemaTableNames.schema, "")
+    product_demand_of_product_query = PRODUCT_DEMAND_QUERY.format(DBSchemaTableNames.schema,
+                                                                  "WHERE customer_order_items.product_gtin14 = %s ")
+    product_inbound_stock_query = PRODUCT_INBOUND_STOCK_QUERY.format(DBSchemaTableNames.schema)
+    daily_product_demand = QueryConstructor(DBSchemaTableNames.daily_product_demand, DBSchemaTableNames.schema)
+
+    def sum_product_demand(i):
+        database_connector.execute_query(product_demand_query, select=True)
+
+    def read_product_demand(i):
+        select(database_connector, daily_product_demand)
+
+    def sum_product_deliveries(i):
+        product_gtin14 = product_gtin14s[i % len(product_gtin14s)]
+        database_connector.execute_query(product_demand_of_product_query, select=True, parameters=(product_gtin14,),
+                                         prepared=True)
+        database_connector.execute_query(product_inbound_stock_query, select=True, parameters=(product_gtin14,),
+                                         prepared=True)
+
+    def read_product_deliveries(i):
+        product_gtin14 = product_gtin14s[i % len(product_gtin14s)]
+        select(database_connector, utils.get_product_demand_query_constructor(product_gtin14))
+        select(database_connector, utils.get_product_inbound_stock_query_constructor(product_gtin14))
+
+    # Each run adds an item of a product to a customer order without one, and deletes it again, through the web
+    # interface, which refreshes the rollup of the delivery date of the order
+    customer_order_id = select(database_connector, customer_orders.add_field(DBFields.CustomerOrders.id))[0][0]
+    customer_order_item_gtin14s = {record[0] for record in select(database_connector, customer_order_items.add_field(
+        DBFields.CustomerOrderItems.product_gtin14
+    ).add_condition_exact_value(DBFields.CustomerOrderItems.customer_order_id, customer_order_id))}
+    new_item_gtin14 = next(gtin14 for gtin14 in product_gtin14s if gtin14 not in customer_order_item_gtin14s)
+
+    def add_and_delete_customer_order_item(i):
+        utils.add_record(DBQueryFilePath.add_customer_order_item, [customer_order_id, new_item_gtin14, i + 1])
+        utils.delete_record(customer_order_items.add_condition_exact_value(
+            DBFields.CustomerOrderItems.customer_order_id, customer_order_id
+        ).add_condition_exact_value(DBFields.CustomerOrderItems.product_gtin14, new_item_gtin14))
+
+    def total_stock(i):
+        select(database_connector, products.add_aggregate(AggregateFunctions.sum, DBFields.Products.qty_in_stock))
+
+    def update_product_stock(i):
+        product_stock = (
+            products
+            .add_condition_exact_value(DBFields.Products.gtin14, product_gtin14s[i % len(product_gtin14s)])
+            .add_field_and_value(DBFields.Products.qty_in_stock, str(i))
+        )
+        database_connector.execute_query(product_stock.render_update_query(), commit=True,
+                                         parameters=product_stock.get_update_parameters(), prepared=True)
+
+    return [
+        ("list customers", list_customers),
+        ("list products", list_products),
+        ("show customer details", show_customer_details),
+        ("filter customers by name", filter_customers_by_name),
+        ("filter products by GTIN-14 ending", filter_products_by_gtin14_ending),
+        ("filter customer orders by product", filter_customer_orders_by_product),
+        ("search products", search_products),
+        ("filter customer orders by delivery date", filter_customer_orders_by_delivery_date),
+        ("filter company orders by delivery date", filter_company_orders_by_delivery_date),
+        ("filter products by stock", filter_products_by_stock),
+        ("search records (search index)", search_records),
+        ("search records (SQL)", search_records_with_sql),
+        ("count orders per delivery date", count_orders_per_delivery_date),
+        ("count orders per delivery date (Python)", count_orders_per_delivery_date_in_python),
+        ("total stock", total_stock),
+        ("update product stock", update_product_stock),
+        ("sum product demand per date", sum_product_demand),
+        ("sum deliveries of a product", sum_product_deliveries)
+    ] + ([
+        ("sum product demand per date (rollup)", read_product_demand),
+        ("sum deliveries of a product (rollups)", read_product_deliveries),
+        ("add and delete an order item (rollup)", add_and_delete_customer_order_item)
+    ] if rollups else []) + [(name, get_customers_by_product_workload(query, parameters))
+                             for name, query, parameters in get_customers_by_product_queries()]
+
+
+def get_filter_form_result(**filters) -> dict:
+    """Return the result of a data filter form, as read from the request, where only the filters given are used."""
+    selection_names = ("customer_id", "first_name", "last_name", "email_address", "phone", "location", "gtin14", "name",
+                       "desc", "product_search", "qty_in_stock", "customer_order_id", "customer_datetime_ordered",
+                       "customer_delivery_date", "customer_order_location", "company_order_id",
+                       "company_datetime_ordered", "company_delivery_date", "qty_bought")
+    form_result = {"{}_selection".format(name): ["noFilter"] for name in selection_names}
+    for name, value in filters.items():
+        form_result[name] = [value]
+        for selection_name in selection_names:
+            if name.startswith(selection_name + "_") or name == selection_name:
+                form_result["{}_selection".format(selection_name)] = ["filter"]
+    return form_result
+
+
+def get_render_workloads() -> list:
+    """Return a list of tuples of the name and function of each rendering workload, which render the same queries as
+    the pages of the web interface do when their data filter forms are used.
+    """
+    import webfrontend.utils as utils
+
+    customers_form_result = get_filter_form_result(first_name_string="an", last_name_string="e",
+                                                   first_name_at_beginning="y")
+    products_form_result = get_filter_form_result(customer_id_string="3", qty_in_stock_lower_limit_string="10",
+                                                  qty_in_stock_upper_limit_string="50")
+    customer_orders_form_result = get_filter_form_result(
+        customer_datetime_ordered_lower_limit_string="2019-01-01", customer_datetime_ordered_upper_limit_string="",
+        customer_order_location_place_no="1", customer_order_location_road_name="Road",
+        customer_order_location_city="Auckland"
+    )
+
+    def render(query_constructor):
+        return query_constructor.render_select_query(), query_constructor.get_select_parameters()
+
+    def list_customers(i):
+        render(utils.get_customers_query_constructor())
+
+    def filter_customers_by_name(i):
+        render(utils.get_customers_query_constructor(customers_form_result))
+
+    def filter_products_by_customer(i):
+        render(utils.get_products_query_constructor(products_form_result))
+
+    def filter_customer_orders_by_date_and_location(i):
+        render(utils.get_customer_orders_query_constructor(customer_orders_form_result))
+
+    return [
+        ("list customers", list_customers),
+        ("filter customers by name", filter_customers_by_name),
+        ("filter products by customer", filter_products_by_customer),
+        ("filter orders by date and location", filter_customer_orders_by_date_and_location)
+    ]
+
+
+def run_bulk_insert_benchmark(database_connector) -> list:
+    """Delete the customer order items and insert them again, first one record at a time (each committed on its own,
+    as the sample data used to be added), then in batches with `insert_many`. Return a list of tuples of the name of
+    each way, the number of records inserted and the time taken in seconds.
+    """
+    customer_order_item_fields = (DBFields.CustomerOrderItems.customer_order_id,
+                                  DBFields.CustomerOrderItems.product_gtin14, DBFields.CustomerOrderItems.qty_bought)
+    customer_order_items = QueryConstructor(DBSchemaTableNames.customer_order_items, DBSchemaTableNames.schema)
+    for field in customer_order_item_fields:
+        customer_order_items = customer_order_items.add_field(field)
+    rows = [tuple(record) for record in select(database_connector, customer_order_items)]
+    delete_query = "DELETE FROM `{}`.`{}`".format(DBSchemaTableNames.schema, DBSchemaTableNames.customer_order_items)
+    insert_query = "INSERT INTO `{}`.`{}` ({}) VALUES ({})".format(
+        DBSchemaTableNames.schema, DBSchemaTableNames.customer_order_items, ", ".join(customer_order_item_fields),
+        ", ".join(["%s"] * len(customer_order_item_fields))
+    )
+
+    def insert_one_at_a_time():
+        for row in rows:
+            database_connector.execute_query(insert_query, parameters=row, commit=True, prepared=True)
+
+    def insert_in_batches():
+        database_connector.insert_many(insert_query, rows)
+
+    results = []
+    for name, function in (("One record at a time", insert_one_at_a_time),
+                           ("Batches (insert_many)", insert_in_batches)):
+        database_connector.execute_query(delete_query, commit=True)
+        start_time = perf_counter()
+        function()
+        results.append((name, len(rows), perf_counter() - start_time))
+    return results
+
+
+def print_bulk_insert_results(results):
+    print("\n{:<42}{:>10}{:>12}{:>16}".format("Bulk insert", "Records", "Time (ms)", "Records/second"))
+    for name, number_of_records, elapsed_time in results:
+        print("{:<42}{:>10}{:>12.3f}{:>16.0f}".format(name, number_of_records, elapsed_time * 1000,
+                                                     number_of_records / elapsed_time if elapsed_time else 0))
+
+
+def run_workload(function, iterations: int) -> list:
+    """Run the workload the number of times given, and return the sorted list of the time taken by each run."""
+    times = []
+    for i in range(iterations):
+        start_time = perf_counter()
+        function(i)
+        times.append(perf_counter() - start_time)
+    return sorted(times)
+
+
+def print_workload_results(results, unit="ms"):
+    multiplier = 1000 if unit == "ms" else 1000000
+    print("{:<42}{:>10}{:>12}{:>12}{:>12}".format("Workload", "Runs", "Mean ({})".format(unit),
+                                                  "p50 ({})".format(unit), "p95 ({})".format(unit)))
+    for name, times in results:
+        print("{:<42}{:>10}{:>12.3f}{:>12.3f}{:>12.3f}".format(
+            name, len(times), sum(times) / len(times) * multiplier, get_percentile(times, 50) * multiplier,
+            get_percentile(times, 95) * multiplier
+        ))
+
+
+def print_query_plans(query_plans):
+    for name, query_plan in query_plans:
+        print("\nQuery plan: {}".format(name))
+        for record in query_plan:
+            print("  " + ", ".join("{}={}".format(field, value) for field, value in zip(record.fields, record)))
+
+
+def print_results(backend_name, results, query_statistics):
+    print("\nBackend: {}".format(backend_name))
+    print_workload_results(results)
+    print("\n{:>10}{:>12}{:>12}{:>12}  {}".format("Count", "Total (ms)", "p50 (ms)", "p99 (ms)", "Query"))
+    for statistics in query_statistics[:10]:
+        print("{:>10}{:>12.3f}{:>12.3f}{:>12.3f}  {}".format(
+            statistics["count"], statistics["total_time"] * 1000, statistics["p50_time"] * 1000,
+            statistics["p99_time"] * 1000, statistics["fingerprint"]
+        ))
+
+
+def main_activity():
+    arguments = parse_arguments()
+    if arguments.rendering:
+        DBSchemaTableNames.schema = read_config(Config.file_path).get(
+            Config.Headers.database, Config.Keys.Database.schema,
+            fallback=Config.DefaultKeyValuePairs.database[Config.Keys.Database.schema]
+        )
+        with open(devnull, "w") as null_output, redirect_stdout(null_output):
+            workloads = get_render_workloads()
+            results = [(name, run_workload(function, arguments.iterations)) for name, function in workloads]
+        print("\nRendering")
+        print_workload_results(results, unit="us")
+        return
+
+    database_config = get_database_config(arguments.backend)
+    DBSchemaTableNames.schema = database_config[Config.Keys.Database.schema]
+    database_connector = DatabaseConnector(database_config, get_logger_config(arguments.sql_log_mode))
+    QueryConstructor.default_related_query_style = database_connector.backend.related_query_style
+    # the FULLTEXT index and the reversed columns are added by migrations, so without the migrations, words and values
+    # are searched for with LIKE as they are
+    QueryConstructor.supports_fulltext_search = (database_connector.backend.supports_fulltext_search and
+                                                 not arguments.skip_migrations)
+    QueryConstructor.searches_reversed_fields = not arguments.skip_migrations
+
+    # The queries are printed as they are executed, which is left out of the output of the benchmark
+    with open(devnull, "w") as null_output, redirect_stdout(null_output):
+        database_connector.start_connection()
+        set_up_schema(database_connector, migrate=not arguments.skip_migrations)
+        scale_sample_data(database_connector, arguments.scale)
+        if not arguments.skip_migrations:
+            # the rollups are filled by their migration before the sample data is added
+            rebuild_rollups(database_connector)
+        query_plans = []
+        if arguments.explain:
+            query_plans = [(name, database_connector.explain_query(query, parameters)[1])
+                           for name, query, parameters in get_customers_by_product_queries()]
+        plan_checks = check_query_plans(database_connector) if arguments.check_plans else None
+        workloads = get_workloads(database_connector, rollups=not arguments.skip_migrations)
+        if arguments.advise_indexes:
+            QueryConstructor.query_shape_recorder = QueryShapeRecorder()
+        database_connector.reset_query_statistics()
+        results = [(name, run_workload(function, arguments.iterations)) for name, function in workloads]
+        index_advice = None
+        if arguments.advise_indexes:
+            # without the migrations, only the indexes of the schema itself are in the database
+            schema_indexes = get_schema_indexes([DBQueryFilePath.schema]) if arguments.skip_migrations else None
+            index_advice = get_index_advice(database_connector, QueryConstructor.query_shape_recorder.get_shapes(),
+                                            schema_indexes)
+            QueryConstructor.query_shape_recorder = None
+        # inserting changes the records read by the workloads, so it is timed after them
+        bulk_insert_results = run_bulk_insert_benchmark(database_connector) if arguments.bulk_insert else None
+        if database_connector.backend.name == DatabaseBackends.mysql:
+            database_connector.execute_query("DROP SCHEMA `{}`".format(DBSchemaTableNames.schema))
+        database_connector.stop_connection()
+
+    print_query_plans(query_plans)
+    print_results(database_connector.backend.name, results, database_connector.get_query_statistics())
+    if index_advice is not None:
+        print("\n" + format_index_advice(index_advice), end="")
+    if bulk_insert_results is not None:
+        print_bulk_insert_results(bulk_insert_results)
+
+    sqlite_file_path = database_config.get(Config.Keys.Database.sqlite_file_path)
+    if database_connector.backend.name == DatabaseBackends.sqlite and exists(sqlite_file_path):
+        remove(sqlite_file_path)
+
+    if plan_checks is not None:
+        print_plan_checks(plan_checks)
+        if not all(is_passed for _, is_passed, _ in plan_checks):
+            exit(1)
+
+
+if __name__ == "__main__":
+    main_activity()
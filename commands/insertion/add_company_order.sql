@@ -1,3 +1,3 @@
 INSERT INTO `{}`.`company_orders`
 (product_gtin14, datetime_ordered, qty_bought, delivery_date)
-VALUES ("{}", "{}", {}, "{}");
+VALUES (%s, %s, %s, %s);
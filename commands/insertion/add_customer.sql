@@ -1,3 +1,3 @@
 INSERT INTO `{}`.`customers`
 (first_name, last_name, email_address, phone)
-VALUES ("{}", "{}", "{}", "{}");
+VALUES (%s, %s, %s, %s);
@@ -1,3 +1,3 @@
 INSERT INTO `{}`.`customer_locations`
 (customer_id, location_id)
-VALUES ({}, {});
+VALUES (%s, %s);
@@ -1,3 +1,3 @@
 INSERT INTO `{}`.`customer_orders`
 (customer_id, datetime_ordered, delivery_date, delivery_location)
-VALUES ({}, "{}", "{}", "{}");
+VALUES (%s, %s, %s, %s);
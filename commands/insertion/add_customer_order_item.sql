@@ -1,3 +1,3 @@
 INSERT INTO `{}`.`customer_order_items`
 (customer_order_id, product_gtin14, qty_bought)
-VALUES ({}, "{}", {});
+VALUES (%s, %s, %s);
@@ -1,3 +1,3 @@
 INSERT INTO `{}`.`locations`
 (city, road_name, place_no)
-VALUES ("{}", "{}", "{}");
+VALUES (%s, %s, %s);
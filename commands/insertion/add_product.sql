@@ -1,3 +1,3 @@
 INSERT INTO `{}`.`products`
 (gtin14, name, description, qty_in_stock)
-VALUES ("{}", "{}", "{}", {});
+VALUES (%s, %s, %s, %s);
@@ -0,0 +1,9 @@
+-- -----------------------------------------------------
+-- Indexes on the columns filtered by ranges (and on the last names of customers) by the data filter forms, so that
+-- narrow ranges only read the records in them instead of every record of the table
+-- -----------------------------------------------------
+CREATE INDEX `customer_datetime_ordered_idx` ON `{schema_name}`.`customer_orders` (`datetime_ordered` ASC);
+CREATE INDEX `customer_delivery_date_idx` ON `{schema_name}`.`customer_orders` (`delivery_date` ASC);
+CREATE INDEX `company_delivery_date_idx` ON `{schema_name}`.`company_orders` (`delivery_date` ASC);
+CREATE INDEX `qty_in_stock_idx` ON `{schema_name}`.`products` (`qty_in_stock` ASC);
+CREATE INDEX `last_name_idx` ON `{schema_name}`.`customers` (`last_name` ASC);
@@ -0,0 +1,56 @@
+-- -----------------------------------------------------
+-- Table `{schema_name}`.`daily_product_demand`
+-- Quantity of each product ordered by customers for delivery on each date, kept up to date as customer orders and
+-- their items are written (see `database/rollups.py`)
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `{schema_name}`.`daily_product_demand` (
+  `delivery_date` DATE NOT NULL,
+  `product_gtin14` CHAR(14) NOT NULL,
+  `qty_ordered` INT NOT NULL,
+  `number_of_orders` INT NOT NULL,
+  PRIMARY KEY (`delivery_date`, `product_gtin14`),
+  INDEX `demand_product_id_idx` (`product_gtin14` ASC),
+  CONSTRAINT `fk_daily_product_demand_product_id`
+    FOREIGN KEY (`product_gtin14`)
+    REFERENCES `{schema_name}`.`products` (`gtin14`)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE)
+ENGINE = InnoDB;
+
+
+-- -----------------------------------------------------
+-- Table `{schema_name}`.`daily_inbound_stock`
+-- Quantity of each product ordered from suppliers for delivery on each date, kept up to date as company orders are
+-- written
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `{schema_name}`.`daily_inbound_stock` (
+  `delivery_date` DATE NOT NULL,
+  `product_gtin14` CHAR(14) NOT NULL,
+  `qty_bought` INT NOT NULL,
+  `number_of_orders` INT NOT NULL,
+  PRIMARY KEY (`delivery_date`, `product_gtin14`),
+  INDEX `inbound_product_id_idx` (`product_gtin14` ASC),
+  CONSTRAINT `fk_daily_inbound_stock_product_id`
+    FOREIGN KEY (`product_gtin14`)
+    REFERENCES `{schema_name}`.`products` (`gtin14`)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE)
+ENGINE = InnoDB;
+
+
+-- -----------------------------------------------------
+-- Rows of the orders already in the database
+-- -----------------------------------------------------
+INSERT INTO `{schema_name}`.`daily_product_demand`
+  (`delivery_date`, `product_gtin14`, `qty_ordered`, `number_of_orders`)
+SELECT `customer_orders`.`delivery_date`, `customer_order_items`.`product_gtin14`,
+  SUM(`customer_order_items`.`qty_bought`), COUNT(*)
+FROM `{schema_name}`.`customer_order_items`
+INNER JOIN `{schema_name}`.`customer_orders` ON `customer_orders`.`id` = `customer_order_items`.`customer_order_id`
+GROUP BY `customer_orders`.`delivery_date`, `customer_order_items`.`product_gtin14`;
+
+INSERT INTO `{schema_name}`.`daily_inbound_stock`
+  (`delivery_date`, `product_gtin14`, `qty_bought`, `number_of_orders`)
+SELECT `company_orders`.`delivery_date`, `company_orders`.`product_gtin14`, SUM(`company_orders`.`qty_bought`), COUNT(*)
+FROM `{schema_name}`.`company_orders`
+GROUP BY `company_orders`.`delivery_date`, `company_orders`.`product_gtin14`;
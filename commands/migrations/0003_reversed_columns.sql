@@ -0,0 +1,12 @@
+-- -----------------------------------------------------
+-- Reversed copies of the names of customers and of the GTIN-14s and names of products, with indexes on them, so that
+-- values ending with a string are searched for as reversed values beginning with the reversed string
+-- -----------------------------------------------------
+ALTER TABLE `{schema_name}`.`customers` ADD COLUMN `last_name_reversed` VARCHAR(31) AS (REVERSE(`last_name`)) STORED;
+ALTER TABLE `{schema_name}`.`customers` ADD COLUMN `first_name_reversed` VARCHAR(31) AS (REVERSE(`first_name`)) STORED;
+ALTER TABLE `{schema_name}`.`products` ADD COLUMN `gtin14_reversed` CHAR(14) AS (REVERSE(`gtin14`)) STORED;
+ALTER TABLE `{schema_name}`.`products` ADD COLUMN `name_reversed` VARCHAR(255) AS (REVERSE(`name`)) STORED;
+CREATE INDEX `last_name_reversed_idx` ON `{schema_name}`.`customers` (`last_name_reversed` ASC);
+CREATE INDEX `first_name_reversed_idx` ON `{schema_name}`.`customers` (`first_name_reversed` ASC);
+CREATE INDEX `gtin14_reversed_idx` ON `{schema_name}`.`products` (`gtin14_reversed` ASC);
+CREATE INDEX `name_reversed_idx` ON `{schema_name}`.`products` (`name_reversed` ASC);
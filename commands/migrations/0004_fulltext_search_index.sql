@@ -0,0 +1,5 @@
+-- -----------------------------------------------------
+-- FULLTEXT index on the names and descriptions of products, which the full-text search of the product filter form
+-- searches with MATCH ... AGAINST (left out on database backends without FULLTEXT indexes)
+-- -----------------------------------------------------
+CREATE FULLTEXT INDEX `name_description_idx` ON `{schema_name}`.`products` (`name`, `description`);
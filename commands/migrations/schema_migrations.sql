@@ -0,0 +1,10 @@
+-- -----------------------------------------------------
+-- Table `{schema_name}`.`schema_migrations`
+-- Versions of the migrations in `commands/migrations` applied to the schema
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `{schema_name}`.`schema_migrations` (
+  `version` INT NOT NULL,
+  `name` VARCHAR(255) NOT NULL,
+  `applied_at` DATETIME NOT NULL,
+  PRIMARY KEY (`version`))
+ENGINE = InnoDB;
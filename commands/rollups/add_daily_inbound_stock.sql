@@ -0,0 +1,5 @@
+INSERT INTO `{}`.`daily_inbound_stock` (delivery_date, product_gtin14, qty_bought, number_of_orders)
+SELECT delivery_date, product_gtin14, SUM(qty_bought), COUNT(*)
+FROM `{}`.`company_orders`
+WHERE delivery_date BETWEEN %s AND %s
+GROUP BY delivery_date, product_gtin14;
@@ -0,0 +1,6 @@
+INSERT INTO `{}`.`daily_product_demand` (delivery_date, product_gtin14, qty_ordered, number_of_orders)
+SELECT customer_orders.delivery_date, customer_order_items.product_gtin14, SUM(customer_order_items.qty_bought), COUNT(*)
+FROM `{}`.`customer_order_items`
+INNER JOIN `{}`.`customer_orders` ON customer_orders.id = customer_order_items.customer_order_id
+WHERE customer_orders.delivery_date BETWEEN %s AND %s
+GROUP BY customer_orders.delivery_date, customer_order_items.product_gtin14;
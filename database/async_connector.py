@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (c) 2019 Jared Recomendable.
+Licensed under the GNU General Public License Version 3.
+This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from base.constants import ResultFormats
+from database.connector import DatabaseConnector
+
+
+class AsyncDatabaseConnector:
+    """Class to create an object that executes queries through a `DatabaseConnector` without blocking the event loop,
+    so that independent queries can be awaited together (e.g. with `asyncio.gather`).
+
+    The queries run on a bounded pool of worker threads, and each query borrows a pooled connection of its own. The
+    workers borrow from connections reserved for them out of the connection pool (see
+    `DatabaseConnector.reserve_pool`), so that they never wait for the connections held by the threads awaiting them
+    (e.g. web requests). Queries executed this way are therefore not part of any transaction or connection lent to
+    the calling thread.
+    """
+    def __init__(self, database_connector: DatabaseConnector, max_workers=None):
+        """Initialise the connector, reserving a connection for each worker thread. The number of worker threads
+        defaults to half of the size of the connection pool, leaving the rest to the other threads. Without any worker
+        threads (e.g. with a connection pool of one), the queries are executed on the calling thread, one at a time.
+        :type database_connector: DatabaseConnector
+        """
+        self.database_connector = database_connector
+        if max_workers is None:
+            max_workers = database_connector.pool_size // 2
+        # at least one connection is left to the other threads
+        max_workers = min(max_workers, database_connector.pool_size - 1)
+        self.executor = None
+        if max_workers > 0:
+            self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="database",
+                                               initializer=database_connector.use_pool,
+                                               initargs=(database_connector.reserve_pool(max_workers),))
+
+    async def _run(self, function, *args, **kwargs):
+        """Run the blocking function on a worker thread, and return its result once it is done."""
+        if self.executor is None:
+            return function(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(function, *args, **kwargs))
+
+    async def execute_query(self, query, inputs=(), select=False, commit=False, parameters=(), prepared=False,
+                            result_format=ResultFormats.tuples, primary=False) -> tuple:
+        """Execute a single SQL query, the same way as `DatabaseConnector.execute_query`, returning the same tuple of
+        status code and selected records or error message. As the query runs on another thread, set `primary` to the
+        result of `reads_from_primary` of the calling thread, so that it reads from the same place.
+        """
+        return await self._run(self.database_connector.execute_query, query, inputs=inputs, select=select,
+                               commit=commit, parameters=parameters, prepared=prepared, result_format=result_format,
+                               primary=primary)
+
+    async def insert_many(self, query, rows, batch_size=None) -> tuple:
+        """Insert records in batches, the same way as `DatabaseConnector.insert_many`, returning the same tuple of
+        status code and number of records inserted or error message.
+        """
+        return await self._run(self.database_connector.insert_many, query, rows, batch_size=batch_size)
+
+    def shutdown(self):
+        """Wait for the queries still running to finish, then stop the worker threads."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (c) 2019 Jared Recomendable.
+Licensed under the GNU General Public License Version 3.
+This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
+"""
+
+import json
+import re
+import sqlite3
+from datetime import date, datetime
+from functools import lru_cache
+from os.path import abspath
+from base.constants import *
+
+
+class MySQLBackend:
+    """Backend for MySQL Server (8.0.16 or higher) or MariaDB (10.2 or higher), through MySQL Connector/Python."""
+    name = DatabaseBackends.mysql
+    supports_load_data = True
+    supports_replicas = True
+    explain_prefix = "EXPLAIN "
+    # Plans in JSON tell which tables are read in full, which results are sorted and which subqueries are dependent
+    explain_plan_prefix = "EXPLAIN FORMAT=JSON "
+    # Both MySQL and MariaDB plan correlated EXISTS subqueries as semi-joins
+    related_query_style = RelatedQueryStyles.exists
+    supports_fulltext_search = True
+
+    def __init__(self, database_config):
+        # Only imported when used, so that the other backends work without MySQL Connector/Python installed
+        import mysql.connector
+        from mysql.connector import errorcode
+        self.mysql_connector = mysql.connector
+        self.errorcode = errorcode
+        self.Error = mysql.connector.Error
+        self.username = database_config[Config.Keys.Database.username]
+        self.password = database_config[Config.Keys.Database.password]
+        self.host = database_config[Config.Keys.Database.host]
+
+    def connect(self, host=None):
+        """Open a new connection to the DBMS, on the host in the config file unless another host (e.g. a replica) is
+        given. Only files in the sample data directory can be loaded with `LOAD DATA LOCAL INFILE` on it.
+        """
+        return self.mysql_connector.connect(
+            user=self.username,
+            password=self.password,
+            host=host or self.host,
+            allow_local_infile_in_path=abspath(SampleDataFilePath.directory)
+        )
+
+    def get_connection_error_message(self, err) -> str:
+        """Return the message to show when a connection to the DBMS could not be opened."""
+        if err.errno == self.errorcode.ER_ACCESS_DENIED_ERROR:
+            return Msg.DatabaseConnector.invalid_database_credentials
+        elif err.errno == self.errorcode.ER_BAD_DB_ERROR:
+            return Msg.DatabaseConnector.database_not_exists
+        return str(err)
+
+    def is_load_data_rejected(self, err) -> bool:
+        """Return True if the error is raised because the DBMS does not allow loading local files."""
+        return err.errno in (self.errorcode.ER_NOT_ALLOWED_COMMAND, self.errorcode.ER_CLIENT_LOCAL_FILES_DISABLED,
+                             self.errorcode.CR_LOAD_DATA_LOCAL_INFILE_REJECTED)
+
+    @staticmethod
+    def execute_script(cursor, statements: list):
+        """Send all of the statements to the DBMS in a single round trip, as a multi-statement query. Yield a tuple of
+        each statement and the number of rows it affected, as its result is read.
+        :type statements: list
+        """
+        if not statements:
+            return
+        for i, result in enumerate(cursor.execute(";\n".join(statements), multi=True)):
+            if result.with_rows:
+                result.fetchall()
+            yield statements[i], result.rowcount
+
+    @staticmethod
+    def get_plan_findings(plan_rows: list) -> list:
+        """Return a list of tuples of each finding (one of those in `PlanFindings`) in the plan read with
+        `explain_plan_prefix`, and the table it is about (or an empty string if the plan does not tell).
+        :type plan_rows: list
+        """
+        findings = []
+        for row in plan_rows:
+            _add_json_plan_findings(json.loads(row[0]), findings)
+        return findings
+
+    @staticmethod
+    def get_plan_indexes(plan_rows: list) -> list:
+        """Return a list of tuples of each table read in the plan read with `explain_plan_prefix`, and the name of the
+        index it is read through (`PRIMARY` for the primary key), for the tables read through an index.
+        :type plan_rows: list
+        """
+        plan_indexes = []
+        for row in plan_rows:
+            _add_json_plan_indexes(json.loads(row[0]), plan_indexes)
+        return plan_indexes
+
+
+def _add_json_plan_findings(node, findings: list):
+    """Add the findings in the node of a plan in JSON, and in the nodes it holds, to the list of findings."""
+    if isinstance(node, list):
+        for child_node in node:
+            _add_json_plan_findings(child_node, findings)
+        return
+    if not isinstance(node, dict):
+        return
+    if node.get("access_type") == "ALL":
+        findings.append((PlanFindings.full_table_scan, node.get("table_name", "")))
+    if node.get("using_filesort"):
+        findings.append((PlanFindings.filesort, _get_json_plan_table_name(node)))
+    if node.get("dependent"):
+        findings.append((PlanFindings.dependent_subquery, _get_json_plan_table_name(node)))
+    for child_node in node.values():
+        _add_json_plan_findings(child_node, findings)
+
+
+def _add_json_plan_indexes(node, plan_indexes: list):
+    """Add the tables read through an index in the node of a plan in JSON, and in the nodes it holds, to the list of
+    tables and their indexes.
+    """
+    if isinstance(node, list):
+        for child_node in node:
+            _add_json_plan_indexes(child_node, plan_indexes)
+        return
+    if not isinstance(node, dict):
+        return
+    if "table_name" in node and node.get("key"):
+        plan_indexes.append((node["table_name"], node["key"]))
+    for child_node in node.values():
+        _add_json_plan_indexes(child_node, plan_indexes)
+
+
+def _get_json_plan_table_name(node) -> str:
+    """Return the name of the first table read in the node of a plan in JSON, or an empty string if there is none."""
+    if isinstance(node, dict):
+        if "table_name" in node:
+            return node["table_name"]
+        node = list(node.values())
+    if isinstance(node, list):
+        for child_node in node:
+            table_name = _get_json_plan_table_name(child_node)
+            if table_name:
+                return table_name
+    return ""
+
+
+class SQLiteBackend:
+    """Backend for an embedded SQLite database file, used as a stand-in for MySQL on a machine without a database
+    server. The MySQL dialect written by the rest of the program is translated to SQLite as it is executed.
+    """
+    name = DatabaseBackends.sqlite
+    supports_load_data = False
+    supports_replicas = False
+    explain_prefix = "EXPLAIN QUERY PLAN "
+    explain_plan_prefix = "EXPLAIN QUERY PLAN "
+    # SQLite runs correlated EXISTS subqueries once for every outer record, but IN subqueries only once
+    related_query_style = RelatedQueryStyles.nested_in
+    # SQLite has no FULLTEXT indexes (only FTS virtual tables), so full-text searches fall back to LIKE
+    supports_fulltext_search = False
+    Error = sqlite3.Error
+
+    def __init__(self, database_config):
+        self.file_path = database_config.get(
+            Config.Keys.Database.sqlite_file_path,
+            Config.DefaultKeyValuePairs.database[Config.Keys.Database.sqlite_file_path]
+        )
+
+    def connect(self, host=None):
+        """Open a new connection to the database file. The connection may be used by one thread after another, as
+        pooled connections are.
+        """
+        cnx = sqlite3.connect(self.file_path, check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES)
+        cnx.execute("PRAGMA foreign_keys = ON")
+        # MySQL function used by the generated columns in the schema
+        cnx.create_function("REVERSE", 1, reverse_text, deterministic=True)
+        return SQLiteConnection(cnx)
+
+    @staticmethod
+    def get_connection_error_message(err) -> str:
+        """Return the message to show when the database file could not be opened."""
+        return str(err)
+
+    @staticmethod
+    def is_load_data_rejected(err) -> bool:
+        return False
+
+    @staticmethod
+    def execute_script(cursor, statements: list):
+        """Execute the statements one by one, as the database is in the same process and there are no round trips to
+        save. Yield a tuple of each statement and the number of rows it affected.
+        :type statements: list
+        """
+        for statement in statements:
+            cursor.execute(statement)
+            yield statement, cursor.rowcount
+
+    @staticmethod
+    def get_plan_findings(plan_rows: list) -> list:
+        """Return a list of tuples of each finding (one of those in `PlanFindings`) in the plan read with
+        `explain_plan_prefix`, and the table it is about (or an empty string if the plan does not tell). The table of a
+        correlated subquery is the first table that it reads.
+        :type plan_rows: list
+        """
+        findings = []
+        first_table_names = {}
+        correlated_subquery_ids = []
+        for plan_id, parent_id, _, detail in plan_rows:
+            match = SQLITE_PLAN_TABLE_PATTERN.match(detail)
+            if match:
+                first_table_names.setdefault(parent_id, match.group(2))
+                if match.group(1) == "SCAN" and "INDEX" not in match.group(3):
+                    findings.append((PlanFindings.full_table_scan, match.group(2)))
+            elif detail.startswith("USE TEMP B-TREE FOR ORDER BY"):
+                findings.append((PlanFindings.filesort, ""))
+            elif SQLITE_CORRELATED_SUBQUERY_PATTERN.match(detail):
+                correlated_subquery_ids.append(plan_id)
+        for plan_id in correlated_subquery_ids:
+            findings.append((PlanFindings.dependent_subquery, first_table_names.get(plan_id, "")))
+        return findings
+
+    @staticmethod
+    def get_plan_indexes(plan_rows: list) -> list:
+        """Return a list of tuples of each table read in the plan read with `explain_plan_prefix`, and the name of the
+        index it is read through (`PRIMARY` for the rowid), for the tables read through an index. Other primary keys
+        are read through the indexes SQLite names `sqlite_autoindex_<table>_<n>`.
+        :type plan_rows: list
+        """
+        plan_indexes = []
+        for _, _, _, detail in plan_rows:
+            match = SQLITE_PLAN_TABLE_PATTERN.match(detail)
+            index_match = SQLITE_PLAN_INDEX_PATTERN.search(match.group(3)) if match else None
+            if index_match:
+                plan_indexes.append((match.group(2), index_match.group(1) or "PRIMARY"))
+        return plan_indexes
+
+
+class SQLiteConnection:
+    """Wrapper around a SQLite connection with the parts of the interface of a MySQL Connector/Python connection that
+    are used by `DatabaseConnector`.
+    """
+    unread_result = False
+
+    def __init__(self, cnx: sqlite3.Connection):
+        """Initialise the wrapper around the connection.
+        :type cnx: sqlite3.Connection
+        """
+        self.cnx = cnx
+
+    @property
+    def in_transaction(self) -> bool:
+        return self.cnx.in_transaction
+
+    def cursor(self, prepared: bool = False):
+        """Return a new cursor. SQLite keeps its own cache of compiled statements per connection, so prepared
+        cursors are no different from the others.
+        :type prepared: bool
+        """
+        return SQLiteCursor(self.cnx.cursor())
+
+    def commit(self):
+        self.cnx.commit()
+
+    def rollback(self):
+        self.cnx.rollback()
+
+    def close(self):
+        self.cnx.close()
+
+
+class SQLiteCursor:
+    """Wrapper around a SQLite cursor that translates every statement from MySQL to SQLite before executing it."""
+    def __init__(self, cursor: sqlite3.Cursor):
+        """Initialise the wrapper around the cursor.
+        :type cursor: sqlite3.Cursor
+        """
+        self.cursor = cursor
+
+    @property
+    def rowcount(self) -> int:
+        return self.cursor.rowcount
+
+    @property
+    def lastrowid(self) -> int:
+        return self.cursor.lastrowid
+
+    @property
+    def description(self) -> tuple:
+        return self.cursor.description
+
+    def execute(self, statement: str, parameters=()):
+        """Execute the statement, which may be translated to none or several SQLite statements.
+        :type statement: str
+        """
+        # sqlite3 only begins a transaction before the first write in it, and a savepoint made before then is a
+        # transaction of its own, which releasing it would commit along with the rest of the enclosing transaction
+        if SAVEPOINT_PATTERN.match(statement) and not self.cursor.connection.in_transaction:
+            self.cursor.execute("BEGIN")
+        for translated_statement in translate_to_sqlite(statement, DBSchemaTableNames.schema or ""):
+            self.cursor.execute(translated_statement, tuple(parameters))
+
+    def executemany(self, statement: str, rows):
+        """Execute the statement, which must translate to a single SQLite statement, once for every row of parameters.
+        :type statement: str
+        """
+        for translated_statement in translate_to_sqlite(statement, DBSchemaTableNames.schema or ""):
+            self.cursor.executemany(translated_statement, rows)
+
+    def fetchall(self) -> list:
+        return self.cursor.fetchall()
+
+    def fetchmany(self, size: int) -> list:
+        return self.cursor.fetchmany(size)
+
+    def close(self):
+        self.cursor.close()
+
+
+def reverse_text(value):
+    """Return the text reversed, like `REVERSE` in MySQL."""
+    return None if value is None else str(value)[::-1]
+
+
+# Dates and times are stored as text in SQLite, so they are converted to and from the same types that MySQL uses
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+
+
+# Translation from MySQL to SQLite
+# Steps of the plans of SQLite reading a table (`SCAN` reads all of its records, unless through an index), the index
+# it is read through, and running a subquery once for every outer record
+SQLITE_PLAN_TABLE_PATTERN = re.compile(r"^(SCAN|SEARCH) (?:TABLE )?(?!CONSTANT ROW|SUBQUERY)(\w+)(.*)$")
+SQLITE_PLAN_INDEX_PATTERN = re.compile(r"\bUSING (?:COVERING )?INDEX (\w+)|\bUSING INTEGER PRIMARY KEY\b")
+SQLITE_CORRELATED_SUBQUERY_PATTERN = re.compile(r"^CORRELATED (?:SCALAR|LIST) SUBQUERY")
+SAVEPOINT_PATTERN = re.compile(r"^SAVEPOINT\b", re.IGNORECASE)
+SKIPPED_STATEMENT_PATTERN = re.compile(r"^(SET|USE|CREATE\s+SCHEMA|CREATE\s+DATABASE|DROP\s+SCHEMA)\b", re.IGNORECASE)
+LITERAL_OR_PLACEHOLDER_PATTERN = re.compile(r"'(?:[^'\\]|\\.)*'|\"((?:[^\"\\]|\\.)*)\"|%s")
+CREATE_TABLE_PATTERN = re.compile(r"^CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(`?\w+`?)\s*\(", re.IGNORECASE)
+INDEX_DEFINITION_PATTERN = re.compile(r"^(UNIQUE\s+)?(?:INDEX|KEY)\s+(`?\w+`?)\s*(\(.*\))$", re.IGNORECASE | re.DOTALL)
+PRIMARY_KEY_DEFINITION_PATTERN = re.compile(r"^PRIMARY\s+KEY\s*\((.*)\)$", re.IGNORECASE | re.DOTALL)
+FULLTEXT_INDEX_DEFINITION_PATTERN = re.compile(r"^FULLTEXT\s+(?:INDEX|KEY)\b", re.IGNORECASE)
+AUTO_INCREMENT_COLUMN_PATTERN = re.compile(r"^(`?\w+`?)\s+\w+.*\bAUTO_INCREMENT\b", re.IGNORECASE | re.DOTALL)
+GENERATED_COLUMN_PATTERN = re.compile(r"^`?\w+`?\s+\w+(?:\s*\(\d+\))?\s+(?:GENERATED\s+ALWAYS\s+)?AS\s*\(",
+                                      re.IGNORECASE)
+ADD_COLUMN_PATTERN = re.compile(r"^(ALTER\s+TABLE\s+`?\w+`?\s+ADD\s+(?:COLUMN\s+)?)(.*)$", re.IGNORECASE | re.DOTALL)
+STORED_PATTERN = re.compile(r"\bSTORED$", re.IGNORECASE)
+CREATE_FULLTEXT_INDEX_PATTERN = re.compile(r"^CREATE\s+FULLTEXT\s+INDEX\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=256)
+def translate_to_sqlite(statement: str, schema_name: str) -> tuple:
+    """Return a tuple of the SQLite statements to execute in place of the MySQL statement. Statements that only change
+    the MySQL session (e.g. `SET` and `USE`), and FULLTEXT indexes, which SQLite does not have, translate to no
+    statements at all.
+    :type statement: str
+    :type schema_name: str
+    """
+    statement = statement.strip().rstrip(";").strip()
+    if SKIPPED_STATEMENT_PATTERN.match(statement):
+        return ()
+    statement = LITERAL_OR_PLACEHOLDER_PATTERN.sub(_translate_literal_or_placeholder, statement)
+    if schema_name:
+        statement = re.sub(r"`?{}`?\.".format(re.escape(schema_name)), "", statement)
+    if CREATE_TABLE_PATTERN.match(statement):
+        return _translate_create_table(statement)
+    elif CREATE_FULLTEXT_INDEX_PATTERN.match(statement):
+        return ()
+    add_column_match = ADD_COLUMN_PATTERN.match(statement)
+    if add_column_match and GENERATED_COLUMN_PATTERN.match(add_column_match.group(2)):
+        # SQLite can only add virtual generated columns to a table, which can be indexed all the same, and they ignore
+        # case like the generated columns of `CREATE TABLE`
+        return "{}{} COLLATE NOCASE".format(add_column_match.group(1),
+                                            STORED_PATTERN.sub("VIRTUAL", add_column_match.group(2).strip())),
+    return statement,
+
+
+def _translate_literal_or_placeholder(match) -> str:
+    """Replace `%s` placeholders with `?`, and double-quoted strings (which MySQL reads as strings, but SQLite reads as
+    identifiers) with single-quoted strings.
+    """
+    if match.group(0) == "%s":
+        return "?"
+    elif match.group(1) is not None:
+        return "'{}'".format(match.group(1).replace("'", "''"))
+    return match.group(0)
+
+
+def _translate_create_table(statement: str) -> tuple:
+    """Translate a MySQL `CREATE TABLE` statement. The auto-increment column becomes the rowid of the table, inline
+    indexes become separate `CREATE INDEX` statements, generated columns ignore case when compared, and the table
+    options (e.g. `ENGINE`) and FULLTEXT indexes are left out.
+    """
+    table_name = CREATE_TABLE_PATTERN.match(statement).group(1)
+    start = statement.index("(")
+    end = _find_closing_parenthesis(statement, start)
+    definitions = _split_definitions(statement[start + 1:end])
+
+    auto_increment_column = None
+    for definition in definitions:
+        match = AUTO_INCREMENT_COLUMN_PATTERN.match(definition)
+        if match:
+            auto_increment_column = match.group(1).strip("`")
+
+    table_definitions = []
+    index_statements = []
+    for definition in definitions:
+        primary_key_match = PRIMARY_KEY_DEFINITION_PATTERN.match(definition)
+        index_match = INDEX_DEFINITION_PATTERN.match(definition)
+        if AUTO_INCREMENT_COLUMN_PATTERN.match(definition):
+            table_definitions.append("`{}` INTEGER PRIMARY KEY AUTOINCREMENT".format(auto_increment_column))
+        elif FULLTEXT_INDEX_DEFINITION_PATTERN.match(definition):
+            continue
+        elif GENERATED_COLUMN_PATTERN.match(definition):
+            # Generated columns hold reversed copies of text columns, only searched with LIKE, which ignores case like
+            # MySQL does, and so only uses the index of a column that also ignores case
+            table_definitions.append(definition + " COLLATE NOCASE")
+        elif primary_key_match and auto_increment_column:
+            # The rowid is the primary key, so any other columns of the primary key only stay unique together with it
+            columns = [column.strip().strip("`") for column in primary_key_match.group(1).split(",")]
+            if columns != [auto_increment_column]:
+                table_definitions.append("UNIQUE ({})".format(primary_key_match.group(1)))
+        elif index_match and index_match.group(1):
+            table_definitions.append("CONSTRAINT {} UNIQUE {}".format(index_match.group(2), index_match.group(3)))
+        elif index_match:
+            index_statements.append("CREATE INDEX IF NOT EXISTS {} ON {} {}".format(
+                index_match.group(2), table_name, index_match.group(3)
+            ))
+        else:
+            table_definitions.append(definition)
+
+    create_table_statement = "{} {})".format(statement[:start + 1], ", ".join(table_definitions))
+    return (create_table_statement,) + tuple(index_statements)
+
+
+def _find_closing_parenthesis(text: str, start: int) -> int:
+    """Return the index of the parenthesis closing the one at index `start`, skipping those in quoted strings."""
+    depth = 0
+    quote = None
+    for i in range(start, len(text)):
+        char = text[i]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(text)
+
+
+def _split_definitions(text: str) -> list:
+    """Split the body of a `CREATE TABLE` statement into its column and constraint definitions."""
+    definitions = []
+    depth = 0
+    quote = None
+    current = ""
+    for char in text:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            definitions.append(current.strip())
+            current = ""
+            continue
+        current += char
+    if current.strip():
+        definitions.append(current.strip())
+    return definitions
+
+
+BACKENDS = {
+    DatabaseBackends.mysql: MySQLBackend,
+    DatabaseBackends.sqlite: SQLiteBackend
+}
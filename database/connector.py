@@ -7,54 +7,366 @@ Licensed under the GNU General Public License Version 3.
 This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
 """
 
-import mysql.connector
-from mysql.connector import errorcode
+from contextlib import contextmanager
+from functools import partial
+from itertools import count
+from threading import local
+from time import perf_counter
+from os.path import abspath
 from base.utils import *
 from base.logger import Logger
+from database.backends import BACKENDS
+from database.pool import ConnectionPool, PoolExhaustedError
+from database.records import format_records, to_records
+from database.sql_script import split_statements
+from database.statistics import QueryStatistics
 
 
 class DatabaseConnector:
-    """Class to create an object that connects to a DBMS and executes queries there."""
-    def __init__(self, database_config):
-        self.cnx = None
-        self.cursor = None
+    """Class to create an object that connects to a DBMS and executes queries there. Connections are kept in a pool,
+    so that each thread (e.g. each web request) can work on a connection of its own.
+
+    The DBMS is reached through the backend set in the config file (MySQL by default), which supplies the connections
+    and the errors raised by them.
+
+    If replicas of the DBMS are set in the config file, select queries are spread across them, except those inside a
+    transaction, or made by a thread (e.g. a web request) that has written to the DBMS or asked to read from the
+    primary (e.g. shortly after a write by the same user).
+    """
+    def __init__(self, database_config, logger_config=None, replicas_config=None):
+        self.pool = None
+        self.reserved_pools = []
+        self.replica_pools = []
         self.db_is_connected = False
-        self.username = database_config[Config.Keys.Database.username]
-        self.password = database_config[Config.Keys.Database.password]
-        self.host = database_config[Config.Keys.Database.host]
         self.logger = Logger(LoggerConfig.file_path)
+        backend_name = database_config.get(
+            Config.Keys.Database.backend,
+            Config.DefaultKeyValuePairs.database[Config.Keys.Database.backend]
+        )
+        if backend_name not in BACKENDS:
+            print_error(Msg.DatabaseConnector.unknown_backend.format(backend_name))
+            self.logger.log_error(Msg.DatabaseConnector.unknown_backend.format(backend_name))
+            exit(1)
+        self.backend = BACKENDS[backend_name](database_config)
+        # Errors raised while executing queries: those of the DBMS, and running out of connections to lend
+        self.errors = (self.backend.Error, PoolExhaustedError)
+        self.pool_size = int(database_config.get(
+            Config.Keys.Database.pool_size,
+            Config.DefaultKeyValuePairs.database[Config.Keys.Database.pool_size]
+        ))
+        self.prepared_statement_cache_size = int(database_config.get(
+            Config.Keys.Database.prepared_statement_cache_size,
+            Config.DefaultKeyValuePairs.database[Config.Keys.Database.prepared_statement_cache_size]
+        ))
+        self.fetch_batch_size = int(database_config.get(
+            Config.Keys.Database.fetch_batch_size,
+            Config.DefaultKeyValuePairs.database[Config.Keys.Database.fetch_batch_size]
+        ))
+        self.insert_batch_size = int(database_config.get(
+            Config.Keys.Database.insert_batch_size,
+            Config.DefaultKeyValuePairs.database[Config.Keys.Database.insert_batch_size]
+        ))
+        if logger_config is None:
+            logger_config = Config.DefaultKeyValuePairs.logger
+        self.slow_query_threshold = int(logger_config.get(
+            Config.Keys.Logger.slow_query_threshold_ms,
+            Config.DefaultKeyValuePairs.logger[Config.Keys.Logger.slow_query_threshold_ms]
+        )) / 1000
+        self.sql_log_mode = logger_config.get(
+            Config.Keys.Logger.sql_log_mode,
+            Config.DefaultKeyValuePairs.logger[Config.Keys.Logger.sql_log_mode]
+        )
+        if self.sql_log_mode not in SQLLogModes.all:
+            print_error(Msg.DatabaseConnector.unknown_sql_log_mode.format(self.sql_log_mode))
+            self.logger.log_error(Msg.DatabaseConnector.unknown_sql_log_mode.format(self.sql_log_mode))
+            exit(1)
+        self.sql_log_sample_rate = max(1, int(logger_config.get(
+            Config.Keys.Logger.sql_log_sample_rate,
+            Config.DefaultKeyValuePairs.logger[Config.Keys.Logger.sql_log_sample_rate]
+        )))
+        self._sql_log_counter = count()
+        if replicas_config is None:
+            replicas_config = Config.DefaultKeyValuePairs.database_replicas
+        self.replica_hosts = [host.strip() for host in replicas_config.get(
+            Config.Keys.DatabaseReplicas.hosts,
+            Config.DefaultKeyValuePairs.database_replicas[Config.Keys.DatabaseReplicas.hosts]
+        ).split(",") if host.strip()]
+        self.sticky_seconds = float(replicas_config.get(
+            Config.Keys.DatabaseReplicas.sticky_seconds,
+            Config.DefaultKeyValuePairs.database_replicas[Config.Keys.DatabaseReplicas.sticky_seconds]
+        ))
+        self._replica_counter = count()
+        self.session_queries = []
+        self.slow_query_logger = Logger(LoggerConfig.slow_query_file_path)
+        self.statistics = QueryStatistics()
+        self._local = local()
+
+    def _open_connection(self, host=None):
+        """Open a new connection to the DBMS (or to the replica on the host given), running the session queries on it,
+        if any.
+        """
+        cnx = self.backend.connect(host)
+        if self.session_queries:
+            cursor = cnx.cursor()
+            self._execute_statements(cursor, self.session_queries, [])
+            cursor.close()
+        return cnx
 
     def start_connection(self):
         try:
             print_message(Msg.DatabaseConnector.connecting)
             self.logger.log_message(Msg.DatabaseConnector.connecting)
-            self.cnx = mysql.connector.connect(
-                user=self.username,
-                password=self.password,
-                host=self.host
-            )
-            self.cursor = self.cnx.cursor()
+            self.pool = ConnectionPool(self._open_connection, self.pool_size, self.prepared_statement_cache_size)
+            # Open the first connection straight away, so that invalid credentials are reported on startup
+            self.pool.put(self.pool.get())
+            if self.replica_hosts and self.backend.supports_replicas:
+                # Connections to replicas are only opened when needed, so that an unavailable replica does not stop
+                # the program from starting
+                self.replica_pools = [ConnectionPool(partial(self._open_connection, host), self.pool_size,
+                                                     self.prepared_statement_cache_size) for host in self.replica_hosts]
+            elif self.replica_hosts:
+                print_warning(Msg.DatabaseConnector.replicas_not_supported)
+                self.logger.log_warning(Msg.DatabaseConnector.replicas_not_supported)
             self.db_is_connected = True
             print_message(Msg.DatabaseConnector.connected)
             self.logger.log_message(Msg.DatabaseConnector.connected)
-        except mysql.connector.Error as err:
-            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-                print_error(Msg.DatabaseConnector.invalid_database_credentials)
-                self.logger.log_error(Msg.DatabaseConnector.invalid_database_credentials)
-            elif err.errno == errorcode.ER_BAD_DB_ERROR:
-                print_error(Msg.DatabaseConnector.database_not_exists)
-                self.logger.log_error(Msg.DatabaseConnector.database_not_exists)
-            else:
-                print_error(str(err))
-                self.logger.log_error(str(err))
+        except self.backend.Error as err:
+            message = self.backend.get_connection_error_message(err)
+            print_error(message)
+            self.logger.log_error(message)
             exit(1)
 
-    def execute_query(self, query, inputs=(), select=False, commit=False) -> tuple:
+    def set_session_queries(self, queries):
+        """Set the SQL queries (as lines of text, like `execute_queries_sequentially`) that are run on every
+        connection as it is opened, such as setting the SQL mode. Idle connections are closed so that they are
+        reopened with the new session state.
+        """
+        self.session_queries = split_statements(join_lines(queries))
+        if self.db_is_connected:
+            self.pool.close_all()
+            for reserved_pool in self.reserved_pools:
+                reserved_pool.close_all()
+            for replica_pool in self.replica_pools:
+                replica_pool.close_all()
+
+    # Lending Connections
+    def checkout(self, read_from_primary=False) -> tuple:
+        """Lend a connection and a cursor from the pool to the current thread. Every query executed by this thread
+        uses them until `release` is called, except select queries that are sent to a replica. If `read_from_primary`
+        is set to True, select queries are not sent to replicas either (e.g. to read the user's own recent writes).
+
+        Returns a tuple to indicate status of execution, where index 0 is the status code and index 1 is the error
+        message, if any (e.g. when no connection became available in time). Queries executed by the thread after a
+        failed checkout try to borrow a connection of their own.
+
+        Status codes are 0 by default, 1 when an error is encountered.
+        """
+        try:
+            self._checkout(read_from_primary)
+        except self.errors as err:
+            self._log_statement_error(None, err)
+            return 1, str(err)
+        return 0,
+
+    def _checkout(self, read_from_primary=False):
+        """Lend a connection to the current thread, like `checkout`, raising the error if none could be lent."""
+        if getattr(self._local, "pooled_connection", None) is None:
+            pooled_connection = self._get_thread_pool().get()
+            self._local.cursor = pooled_connection.cnx.cursor()
+            self._local.pooled_connection = pooled_connection
+            self._local.read_from_primary = read_from_primary
+            self._local.has_written = False
+
+    def release(self):
+        """Return the connection lent to the current thread, if any, back to the pool."""
+        pooled_connection = getattr(self._local, "pooled_connection", None)
+        if pooled_connection is None:
+            return
+        cursor = self._local.cursor
+        self._local.pooled_connection = None
+        self._local.cursor = None
+        self._local.read_from_primary = False
+        self._local.has_written = False
+        self._return_connection(pooled_connection, cursor)
+
+    def _return_connection(self, pooled_connection, cursor, pool=None):
+        """Close the cursor and return the pooled connection back to the pool it is from (the pool that the current
+        thread borrows from by default). Connections that still have rows waiting to be read, or that fail to be
+        cleaned up, are discarded instead.
+        """
+        if pool is None:
+            pool = self._get_thread_pool()
+        try:
+            if pooled_connection.cnx.unread_result:
+                pool.discard(pooled_connection)
+                return
+            cursor.close()
+            # End any transaction left open, so that the next borrower does not read from an old snapshot
+            if pooled_connection.cnx.in_transaction:
+                pooled_connection.cnx.rollback()
+            pool.put(pooled_connection)
+        except self.backend.Error:
+            pool.discard(pooled_connection)
+
+    def reserve_pool(self, size: int) -> ConnectionPool:
+        """Take `size` connections out of the pool of the primary, into a pool of their own, and return it. Threads
+        that borrow from the reserved pool (see `use_pool`) never wait for the connections lent out of the main pool,
+        so they can run queries on behalf of threads that hold one (e.g. worker threads of web requests) without
+        both waiting on each other once the main pool runs out.
+        :type size: int
+        """
+        self.pool.size -= size
+        reserved_pool = ConnectionPool(self._open_connection, size, self.prepared_statement_cache_size)
+        self.reserved_pools.append(reserved_pool)
+        return reserved_pool
+
+    def use_pool(self, pool: ConnectionPool):
+        """Lend the connections of the current thread out of the pool given, reserved with `reserve_pool`, instead of
+        the main pool.
+        :type pool: ConnectionPool
+        """
+        self._local.pool = pool
+
+    def _get_thread_pool(self) -> ConnectionPool:
+        """Return the pool that connections are lent to the current thread out of."""
+        return getattr(self._local, "pool", None) or self.pool
+
+    @contextmanager
+    def _borrow(self):
+        """Yield the pooled connection and cursor lent to the current thread. If there is none, one is checked out
+        just for the duration of the block.
+        """
+        is_lent_for_block = getattr(self._local, "pooled_connection", None) is None
+        if is_lent_for_block:
+            self._checkout()
+        try:
+            yield self._local.pooled_connection, self._local.cursor
+        finally:
+            if is_lent_for_block:
+                self.release()
+
+    # Replicas
+    def has_written(self) -> bool:
+        """Return True if the current thread has written to the DBMS since its connection was lent."""
+        return getattr(self._local, "has_written", False)
+
+    def _mark_written(self):
+        """Remember that the current thread has written to the DBMS, so that it reads from the primary from now on."""
+        self._local.has_written = True
+
+    def reads_from_primary(self) -> bool:
+        """Return True if select queries made by the current thread must be executed on the primary."""
+        return (not self.replica_pools or self.is_in_transaction() or self.has_written() or
+                getattr(self._local, "read_from_primary", False))
+
+    def _get_replica_connection(self) -> tuple:
+        """Lend a connection out of the pool of the next replica, in turn. Return a tuple of the pool and the pooled
+        connection, or of None and None if the replica is unavailable.
+        """
+        replica_index = next(self._replica_counter) % len(self.replica_pools)
+        replica_pool = self.replica_pools[replica_index]
+        try:
+            return replica_pool, replica_pool.get()
+        except self.errors:
+            message = Msg.DatabaseConnector.replica_unavailable.format(self.replica_hosts[replica_index])
+            print_warning(message)
+            self.logger.log_warning(message)
+            return None, None
+
+    @contextmanager
+    def _borrow_for_select(self, primary=False):
+        """Yield a pooled connection and cursor to execute a select query on: a connection to the next replica, unless
+        the query must be executed on the primary, in which case it is the same as `_borrow`.
+        """
+        replica_pool, pooled_connection = (None, None) if primary or self.reads_from_primary() else \
+            self._get_replica_connection()
+        if replica_pool is None:
+            with self._borrow() as (pooled_connection, cursor):
+                yield pooled_connection, cursor
+            return
+        cursor = pooled_connection.cnx.cursor()
+        try:
+            yield pooled_connection, cursor
+        finally:
+            self._return_connection(pooled_connection, cursor, replica_pool)
+
+    # Transactions
+    @contextmanager
+    def transaction(self):
+        """Group the queries executed by the current thread in the `with` block into one transaction, which is
+        committed once at the end of the block instead of after every query. The transaction is rolled back if any of
+        its queries fails, or if the block raises an exception.
+
+        Transactions can be nested. A nested transaction is a savepoint, so when it fails, only the queries in the
+        nested block are rolled back, and the outer transaction carries on.
+        """
+        is_lent_for_block = getattr(self._local, "pooled_connection", None) is None
+        if is_lent_for_block:
+            self._checkout()
+        pooled_connection = self._local.pooled_connection
+        cursor = self._local.cursor
+        if not self.is_in_transaction():
+            self._local.transaction_failures = []
+        failures = self._local.transaction_failures
+        savepoint = "savepoint_{}".format(len(failures))
+        if failures:
+            cursor.execute("SAVEPOINT " + savepoint)
+        failures.append(False)
+        try:
+            yield
+        except Exception:
+            failures[-1] = True
+            raise
+        finally:
+            has_failed = failures.pop()
+            try:
+                if failures and has_failed:
+                    cursor.execute("ROLLBACK TO SAVEPOINT " + savepoint)
+                elif failures:
+                    cursor.execute("RELEASE SAVEPOINT " + savepoint)
+                elif has_failed:
+                    pooled_connection.cnx.rollback()
+                else:
+                    pooled_connection.cnx.commit()
+            finally:
+                if is_lent_for_block:
+                    self.release()
+
+    def is_in_transaction(self) -> bool:
+        """Return True if the current thread is executing queries inside a transaction block."""
+        return bool(getattr(self._local, "transaction_failures", None))
+
+    def _mark_transaction_failed(self):
+        """Mark the innermost transaction block of the current thread, if any, to be rolled back."""
+        if self.is_in_transaction():
+            self._local.transaction_failures[-1] = True
+
+    def _commit(self, pooled_connection):
+        """Commit on the pooled connection, unless the current thread is inside a transaction block, which will
+        commit at its end instead.
+        """
+        if not self.is_in_transaction():
+            pooled_connection.cnx.commit()
+
+    def execute_query(self, query, inputs=(), select=False, commit=False, parameters=(), prepared=False,
+                      result_format=ResultFormats.tuples, primary=False) -> tuple:
         """Execute a single SQL query. Optionally accepts a list or tuple of input parameters required by the query,
         and returns a list of tuples of data from the database if `select` is set to True.
 
+        Values can instead be bound by the DBMS, by passing them as `parameters` for the `%s` placeholders in the query.
+        If `prepared` is set to True, the query is executed as a server-side prepared statement. Prepared statements
+        are kept per connection, so executing the same query again skips parsing and planning it.
+
+        Selected records are returned as a list of tuples by default. With `result_format` set to
+        `ResultFormats.records`, they are returned as a list of compact records instead, whose values can also be read
+        by field name. With `ResultFormats.columns`, they are returned as a dictionary of the values of each column.
+
+        Select queries may be executed on a replica, unless `primary` is set to True or the current thread must read
+        from the primary (see `reads_from_primary`).
+
         Returns a tuple to indicate status of execution, where index 0 is the status code and index 1 is the
-        selected records or error message, if any. Otherwise, exit with status 1 when not connected to DB server.
+        selected records (or the number of records changed by other queries) or error message, if any. Otherwise, exit
+        with status 1 when not connected to DB server.
 
         Status codes are 0 by default, 1 when an error is encountered.
         """
@@ -62,59 +374,397 @@ class DatabaseConnector:
             statement = query
             if inputs:
                 statement = statement.format(*inputs)
+            if not select:
+                self._mark_written()
             try:
-                self.cursor.execute(statement)
-                print_message(Msg.DatabaseConnector.command_processed + statement)
-                self.logger.log_message(Msg.DatabaseConnector.command_processed + statement)
-                if commit:
-                    self.cnx.commit()
-                if select:
-                    return 0, self.cursor.fetchall()
-                return 0,
-            except mysql.connector.Error as err:
-                print_error(statement)
-                self.logger.log_error(statement)
-                print_error(str(err))
-                self.logger.log_error(str(err))
+                with (self._borrow_for_select(primary) if select else self._borrow()) as (pooled_connection, cursor):
+                    start_time = perf_counter()
+                    if prepared:
+                        statement, cursor = pooled_connection.get_prepared_cursor(statement)
+                        cursor.execute(statement, parameters)
+                    elif parameters:
+                        cursor.execute(statement, parameters)
+                    else:
+                        cursor.execute(statement)
+                    records = cursor.fetchall() if select else None
+                    if commit:
+                        self._commit(pooled_connection)
+                    elapsed_time = perf_counter() - start_time
+                    self._log_statement(elapsed_time, self._describe_statement, statement, parameters)
+                    self._record_statement(statement, parameters, elapsed_time,
+                                           len(records) if select else cursor.rowcount)
+                    if select:
+                        return 0, format_records(records, self._get_column_names(cursor), result_format)
+                    return 0, cursor.rowcount
+            except self.errors as err:
+                self._mark_transaction_failed()
+                self._log_statement_error(statement, err)
                 return 1, str(err)
         else:
             print_error(Msg.DatabaseConnector.not_connected)
             self.logger.log_error(Msg.DatabaseConnector.not_connected)
             exit(1)
 
-    def execute_queries_sequentially(self, queries) -> tuple:
-        """Execute multiple SQL queries at the same time. Assumes that there is no input parameters.
+    def insert_many(self, query, rows, batch_size=None, skip_invalid_rows=False) -> tuple:
+        """Execute a single SQL insert query, with `%s` placeholders for the values of one record, for every record in
+        `rows`, an iterable of lists or tuples of values. The records are sent in batches of `batch_size` records
+        (`insert_batch_size` in the config file by default), each inserted as a multi-row insert and committed once.
+
+        If `skip_invalid_rows` is set to True, a batch that fails is inserted again one record at a time, and the
+        records that fail are logged and skipped, instead of stopping with an error.
 
         Returns a tuple to indicate status of execution, where index 0 is the status code and index 1 is the
-        error message, if any, or exit with status 1 when not connected to DB server.
+        number of records inserted or the error message, if any. Batches committed before an error stay inserted.
 
         Status codes are 0 by default, 1 when an error is encountered.
         """
         if self.db_is_connected:
+            if batch_size is None:
+                batch_size = self.insert_batch_size
+            self._mark_written()
+            number_of_records = 0
+            start_time = perf_counter()
             try:
-                statement = ""
-                for query in queries:
-                    if query.strip().startswith("--"):
-                        continue
-                    elif query.strip().endswith(";"):
-                        statement += query.strip()
-                        self.cursor.execute(statement)
-                        print_message(Msg.DatabaseConnector.command_processed + statement)
-                        self.logger.log_message(Msg.DatabaseConnector.command_processed + statement)
-                        statement = ""
-                    else:
-                        statement += query.strip() + " "
-                self.cnx.commit()
-                return 0,
-            except mysql.connector.Error as err:
-                print_error(str(err))
-                self.logger.log_error(str(err))
+                with self._borrow() as (pooled_connection, cursor):
+                    batch = []
+                    for row in rows:
+                        batch.append(tuple(row))
+                        if len(batch) >= batch_size:
+                            number_of_records += self._insert_batch(pooled_connection, cursor, query, batch,
+                                                                    skip_invalid_rows)
+                            batch = []
+                    if batch:
+                        number_of_records += self._insert_batch(pooled_connection, cursor, query, batch,
+                                                                skip_invalid_rows)
+            except self.errors as err:
+                self._mark_transaction_failed()
+                self._log_statement_error(query, err)
+                return 1, str(err)
+            elapsed_time = perf_counter() - start_time
+            self._log_statement(elapsed_time, Msg.DatabaseConnector.records_inserted.format, number_of_records, query,
+                                elapsed_time, number_of_records / elapsed_time if elapsed_time else 0)
+            return 0, number_of_records
+        else:
+            print_error(Msg.DatabaseConnector.not_connected)
+            self.logger.log_error(Msg.DatabaseConnector.not_connected)
+            exit(1)
+
+    def _insert_batch(self, pooled_connection, cursor, query, batch, skip_invalid_rows=False) -> int:
+        """Insert the batch of records in one statement and commit it, rolling back if it fails (unless the
+        transaction it is part of will be rolled back as a whole). The batch is timed as a single statement.
+
+        Return the number of records inserted.
+        """
+        try:
+            start_time = perf_counter()
+            cursor.executemany(query, batch)
+            self._commit(pooled_connection)
+            self._record_statement(query, (), perf_counter() - start_time, len(batch))
+            return len(batch)
+        except self.backend.Error:
+            if not self.is_in_transaction():
+                pooled_connection.cnx.rollback()
+            if not skip_invalid_rows:
+                raise
+        number_of_records = 0
+        for row in batch:
+            try:
+                cursor.execute(query, row)
+                number_of_records += 1
+            except self.errors as err:
+                self._log_statement_error(self._describe_statement(query, row), err)
+        self._commit(pooled_connection)
+        return number_of_records
+
+    def load_data_file(self, file_path, table_name, columns, field_terminator=";", line_terminator="\n") -> tuple:
+        """Stream a delimited text file on the local machine into a table using `LOAD DATA LOCAL INFILE`. The unique
+        and foreign key checks are relaxed while loading, the same way `commands/schema.sql` does it. Only files in
+        the sample data directory can be loaded.
+
+        Returns a tuple to indicate status of execution, where index 0 is the status code and index 1 is the
+        number of records loaded or the error message, if any.
+
+        Status codes are 0 by default, 1 when an error is encountered, 2 when the DBMS does not allow loading local
+        files.
+        """
+        if self.db_is_connected:
+            if not self.backend.supports_load_data:
+                return 2, Msg.DatabaseConnector.load_data_not_supported
+            self._mark_written()
+            statement = "LOAD DATA LOCAL INFILE %s INTO TABLE {} CHARACTER SET utf8mb4 " \
+                        "FIELDS TERMINATED BY %s LINES TERMINATED BY %s ({})".format(table_name, ", ".join(columns))
+            parameters = (abspath(file_path), field_terminator, line_terminator)
+            start_time = perf_counter()
+            try:
+                with self._borrow() as (pooled_connection, cursor):
+                    cursor.execute("SET @OLD_UNIQUE_CHECKS=@@UNIQUE_CHECKS, UNIQUE_CHECKS=0")
+                    cursor.execute("SET @OLD_FOREIGN_KEY_CHECKS=@@FOREIGN_KEY_CHECKS, FOREIGN_KEY_CHECKS=0")
+                    try:
+                        cursor.execute(statement, parameters)
+                        number_of_records = cursor.rowcount
+                        self._commit(pooled_connection)
+                    finally:
+                        cursor.execute("SET FOREIGN_KEY_CHECKS=@OLD_FOREIGN_KEY_CHECKS")
+                        cursor.execute("SET UNIQUE_CHECKS=@OLD_UNIQUE_CHECKS")
+            except self.errors as err:
+                self._mark_transaction_failed()
+                self._log_statement_error(statement, err)
+                if self.backend.is_load_data_rejected(err):
+                    return 2, str(err)
+                return 1, str(err)
+            elapsed_time = perf_counter() - start_time
+            self._record_statement(statement, parameters, elapsed_time, number_of_records)
+            self._log_statement(elapsed_time, Msg.DatabaseConnector.records_inserted.format, number_of_records,
+                                statement, elapsed_time, number_of_records / elapsed_time if elapsed_time else 0)
+            return 0, number_of_records
+        else:
+            print_error(Msg.DatabaseConnector.not_connected)
+            self.logger.log_error(Msg.DatabaseConnector.not_connected)
+            exit(1)
+
+    def iter_query(self, query, parameters=(), batch_size=None, result_format=ResultFormats.tuples,
+                   primary=False) -> tuple:
+        """Execute a single SQL select query, without reading all of its records into memory at once. The query is
+        executed straight away on the connection lent to the current thread (see `checkout`), so that it sees the
+        writes of its transaction and no other connection is taken from the pool, or on a connection of its own if
+        none is lent. The records are sent by the DBMS as they are read (with an unbuffered cursor), so the thread must
+        not execute other queries on its connection until all of them have been read. A connection lent with records
+        left unread is discarded once it is released.
+
+        Returns a tuple to indicate status of execution, where index 0 is the status code and index 1 is a generator
+        of the selected records or the error message, if any. The generator fetches the records from the DBMS in
+        batches of `batch_size` records (`fetch_batch_size` in the config file by default). The records are tuples,
+        or compact records if `result_format` is set to `ResultFormats.records`. Like `execute_query`, the query may be
+        executed on a replica, unless `primary` is set to True.
+
+        Status codes are 0 by default, 1 when an error is encountered.
+        """
+        if self.db_is_connected:
+            if batch_size is None:
+                batch_size = self.fetch_batch_size
+            # the pool is None while the connection lent to the thread is used, as it stays lent after the records
+            # are read
+            pool, pooled_connection = (None, None) if primary or self.reads_from_primary() else \
+                self._get_replica_connection()
+            if pool is None:
+                pooled_connection = getattr(self._local, "pooled_connection", None)
+            if pooled_connection is None:
+                pool = self._get_thread_pool()
+                try:
+                    pooled_connection = pool.get()
+                except self.errors as err:
+                    self._mark_transaction_failed()
+                    self._log_statement_error(query, err)
+                    return 1, str(err)
+            cursor = pooled_connection.cnx.cursor()
+            start_time = perf_counter()
+            try:
+                if parameters:
+                    cursor.execute(query, parameters)
+                else:
+                    cursor.execute(query)
+                self._log_statement(perf_counter() - start_time, self._describe_statement, query, parameters)
+            except self.errors as err:
+                self._mark_transaction_failed()
+                self._finish_records(pool, pooled_connection, cursor)
+                self._log_statement_error(query, err)
+                return 1, str(err)
+            records = self._iter_records(pool, pooled_connection, cursor, batch_size, query, parameters,
+                                         perf_counter() - start_time)
+            if result_format == ResultFormats.records:
+                return 0, to_records(records, self._get_column_names(cursor))
+            return 0, records
+        else:
+            print_error(Msg.DatabaseConnector.not_connected)
+            self.logger.log_error(Msg.DatabaseConnector.not_connected)
+            exit(1)
+
+    def _iter_records(self, pool, pooled_connection, cursor, batch_size, query, parameters, elapsed_time):
+        """Yield the records selected by the cursor, fetching them in batches, then close the cursor or return the
+        connection back to the pool (see `_finish_records`), even if not all records were read. Only the time spent
+        executing the query and fetching the batches counts towards its execution time, not the time spent by the
+        caller on the records.
+        """
+        number_of_records = 0
+        try:
+            start_time = perf_counter()
+            records = cursor.fetchmany(batch_size)
+            elapsed_time += perf_counter() - start_time
+            while records:
+                number_of_records += len(records)
+                yield from records
+                start_time = perf_counter()
+                records = cursor.fetchmany(batch_size)
+                elapsed_time += perf_counter() - start_time
+        finally:
+            self._record_statement(query, parameters, elapsed_time, number_of_records)
+            self._finish_records(pool, pooled_connection, cursor)
+
+    def _finish_records(self, pool, pooled_connection, cursor):
+        """Close the cursor of the records of `iter_query` on the connection lent to the current thread (if `pool` is
+        None), or return the connection of the records back to the pool. The cursor of a lent connection is left open
+        if records are still unread, as the connection is discarded once it is released.
+        """
+        if pool is not None:
+            self._return_connection(pooled_connection, cursor, pool)
+            return
+        try:
+            if not pooled_connection.cnx.unread_result:
+                cursor.close()
+        except self.backend.Error:
+            pass
+
+    @staticmethod
+    def _get_column_names(cursor) -> tuple:
+        """Return the names of the columns selected by the last query executed by the cursor."""
+        return tuple(column[0] for column in cursor.description or ())
+
+    def explain_query(self, query, parameters=()) -> tuple:
+        """Return a tuple of status code and the query plan chosen by the DBMS for the select query, as records of the
+        rows of `EXPLAIN` (or of `EXPLAIN QUERY PLAN` on SQLite), or error message. The plan is made on the primary.
+        """
+        return self.execute_query(self.backend.explain_prefix + query, select=True, parameters=parameters,
+                                  result_format=ResultFormats.records, primary=True)
+
+    def get_plan_findings(self, query, parameters=()) -> tuple:
+        """Return a tuple of status code and the list of findings in the plan chosen by the DBMS for the select,
+        update or delete query, as tuples of the finding (one of those in `PlanFindings`) and the table it is about,
+        or error message. The plan is made on the primary, without executing the query.
+        """
+        plan = self.execute_query(self.backend.explain_plan_prefix + query, select=True, parameters=parameters,
+                                  primary=True)
+        if plan[0] == 1:
+            return plan
+        return 0, self.backend.get_plan_findings(plan[1])
+
+    def get_plan_indexes(self, query, parameters=()) -> tuple:
+        """Return a tuple of status code and the list of tables read through an index in the plan chosen by the DBMS
+        for the select, update or delete query, as tuples of the table and the name of the index, or error message.
+        The plan is made on the primary, without executing the query.
+        """
+        plan = self.execute_query(self.backend.explain_plan_prefix + query, select=True, parameters=parameters,
+                                  primary=True)
+        if plan[0] == 1:
+            return plan
+        return 0, self.backend.get_plan_indexes(plan[1])
+
+    # Statistics
+    def _record_statement(self, statement, parameters, elapsed_time, number_of_rows):
+        """Add the execution of the statement to the query statistics, and log it to the slow query log if it took
+        at least as long as the slow query threshold.
+        """
+        self.statistics.record(statement, elapsed_time, number_of_rows)
+        if elapsed_time >= self.slow_query_threshold:
+            self.slow_query_logger.log_warning(
+                Msg.DatabaseConnector.slow_query.format(elapsed_time, number_of_rows) +
+                self._describe_statement(statement, parameters)
+            )
+
+    def get_query_statistics(self) -> list:
+        """Return the statistics of the queries executed so far, grouped by the shape of the query (with its values
+        left out), as a list of dictionaries with the number of executions, the total, mean, p50, p95, p99 and maximum
+        execution times in seconds, and the number of rows selected or affected. The queries that took the most time
+        in total come first.
+        """
+        return self.statistics.get_statistics()
+
+    def reset_query_statistics(self):
+        """Remove the statistics of the queries executed so far."""
+        self.statistics.reset()
+
+    # Logging Statements
+    def _log_statement(self, elapsed_time, describe, *args):
+        """Print and log the message about an executed statement returned by `describe(*args)`, if the SQL log mode
+        asks for it. The message is only formatted when it is logged.
+        """
+        if self.sql_log_mode == SQLLogModes.full:
+            pass
+        elif self.sql_log_mode == SQLLogModes.sampled:
+            if next(self._sql_log_counter) % self.sql_log_sample_rate:
+                return
+        elif self.sql_log_mode == SQLLogModes.slow:
+            if elapsed_time < self.slow_query_threshold:
+                return
+        else:
+            return
+        message = describe(*args)
+        print_message(message)
+        self.logger.log_message(message)
+
+    def _log_statement_error(self, statement, err):
+        """Print and log the statement that failed, if known, and its error, unless the SQL log mode is `off`."""
+        if self.sql_log_mode == SQLLogModes.off:
+            return
+        if statement is not None:
+            print_error(statement)
+            self.logger.log_error(statement)
+        print_error(str(err))
+        self.logger.log_error(str(err))
+
+    @staticmethod
+    def _describe_statement(statement, parameters=()) -> str:
+        """Return the message logged after executing the statement with the parameters."""
+        if parameters:
+            return "{}{}{}{}".format(Msg.DatabaseConnector.command_processed, statement,
+                                     Msg.DatabaseConnector.command_parameters, tuple(parameters))
+        return Msg.DatabaseConnector.command_processed + statement
+
+    def execute_queries_sequentially(self, queries) -> tuple:
+        """Execute multiple SQL queries, held in lines of text (e.g. of a `.sql` file), at the same time. Assumes that
+        there is no input parameters. See `execute_script`.
+        """
+        return self.execute_script(join_lines(queries))
+
+    def execute_script(self, script: str) -> tuple:
+        """Execute all SQL queries in the script. The script is split into its queries first, so comments and
+        semicolons inside strings are allowed. Where the backend supports it, all queries are sent to the DBMS in a
+        single round trip. Assumes that there is no input parameters.
+
+        Returns a tuple to indicate status of execution, where index 0 is the status code and index 1 is a list of
+        tuples of each query and the number of rows it affected, or the error message, if any. Otherwise, exit with
+        status 1 when not connected to DB server.
+
+        Status codes are 0 by default, 1 when an error is encountered.
+        """
+        if self.db_is_connected:
+            statements = split_statements(script)
+            results = []
+            self._mark_written()
+            try:
+                with self._borrow() as (pooled_connection, cursor):
+                    self._execute_statements(cursor, statements, results)
+                    self._commit(pooled_connection)
+                return 0, results
+            except self.errors as err:
+                self._mark_transaction_failed()
+                # The queries before the failing one have been executed, so it is the next one in the script
+                self._log_statement_error(statements[len(results)] if len(results) < len(statements) else None, err)
                 return 1, str(err)
+        else:
+            print_error(Msg.DatabaseConnector.not_connected)
+            self.logger.log_error(Msg.DatabaseConnector.not_connected)
+            exit(1)
+
+    def _execute_statements(self, cursor, statements, results):
+        """Execute the SQL statements using the cursor, adding a tuple of each statement executed and the number of
+        rows it affected to `results`, as soon as the DBMS has executed it.
+        """
+        start_time = perf_counter()
+        for statement, number_of_rows in self.backend.execute_script(cursor, statements):
+            elapsed_time = perf_counter() - start_time
+            results.append((statement, number_of_rows))
+            self._log_statement(elapsed_time, self._describe_statement, statement)
+            self._record_statement(statement, (), elapsed_time, number_of_rows)
+            start_time = perf_counter()
 
     def stop_connection(self):
         if self.db_is_connected:
-            self.cursor.close()
-            self.cnx.close()
+            self.release()
+            self.pool.close_all()
+            for reserved_pool in self.reserved_pools:
+                reserved_pool.close_all()
+            for replica_pool in self.replica_pools:
+                replica_pool.close_all()
             print_message(Msg.DatabaseConnector.connection_stopped)
             self.logger.log_message(Msg.DatabaseConnector.connection_stopped)
         else:
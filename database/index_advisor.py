@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (c) 2019 Jared Recomendable.
+Licensed under the GNU General Public License Version 3.
+This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
+"""
+
+import re
+from collections import namedtuple
+from threading import Lock
+from base.utils import *
+from database.migrations import get_migrations
+
+# Definitions of the indexes in the schema and its migrations. InnoDB indexes the columns of every foreign key too
+CREATE_TABLE_PATTERN = re.compile(
+    r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:`[^`]*`\.)?`(\w+)`\s*\((.*?)\)\s*ENGINE", re.IGNORECASE | re.DOTALL
+)
+PRIMARY_KEY_PATTERN = re.compile(r"PRIMARY\s+KEY\s*\(([^)]*)\)", re.IGNORECASE)
+INDEX_PATTERN = re.compile(r"^\s*(UNIQUE\s+|FULLTEXT\s+)?(?:INDEX|KEY)\s+`(\w+)`\s*\(([^)]*)\)",
+                           re.IGNORECASE | re.MULTILINE)
+FOREIGN_KEY_PATTERN = re.compile(r"CONSTRAINT\s+`(\w+)`\s+FOREIGN\s+KEY\s*\(([^)]*)\)", re.IGNORECASE)
+CREATE_INDEX_PATTERN = re.compile(r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+`(\w+)`\s+ON\s+(?:`[^`]*`\.)?`(\w+)`\s*\(([^)]*)\)",
+                                  re.IGNORECASE)
+COLUMN_PATTERN = re.compile(r"`?(\w+)")
+ORDER_FIELD_PATTERN = re.compile(r"^ORDER BY (\w+)")
+
+# Longest name of an index in MySQL
+MAX_INDEX_NAME_LENGTH = 64
+
+# How a table is read by a query: the fields compared with single values (or lists of values, with `IN`), the fields
+# compared with ranges, the field the records are ordered by, and the field matched with the outer query, if the table
+# is read by a correlated subquery
+TableAccess = namedtuple("TableAccess", ("table_name", "equality_fields", "range_fields", "order_field",
+                                         "correlated_field"))
+
+
+class QueryShapeRecorder:
+    """Class to create an object that records every distinct select, update and delete query rendered by query
+    constructors (see `QueryConstructor.query_shape_recorder`), along with the number of times it was rendered, and the
+    parameters and query constructor it was first rendered with, so that its plan can be examined later. As values are
+    bound to placeholders, each distinct query is a shape of query made by the web interface.
+    """
+    def __init__(self):
+        self._shapes = {}
+        self._lock = Lock()
+
+    def record(self, query: str, parameters: tuple, query_constructor):
+        """Record that the query was rendered by the query constructor, with the parameters given.
+        :type query: str
+        :type parameters: tuple
+        """
+        if not query:
+            return
+        with self._lock:
+            shape = self._shapes.get(query)
+            if shape is None:
+                self._shapes[query] = [1, tuple(parameters), query_constructor]
+            else:
+                shape[0] += 1
+
+    def get_shapes(self) -> list:
+        """Return a list of tuples of each query recorded, the number of times it was rendered, and the parameters and
+        query constructor it was first rendered with. The queries rendered the most come first.
+        """
+        with self._lock:
+            shapes = [(query, count, parameters, query_constructor)
+                      for query, (count, parameters, query_constructor) in self._shapes.items()]
+        return sorted(shapes, key=lambda shape: shape[1], reverse=True)
+
+    def clear(self):
+        """Remove every query recorded."""
+        with self._lock:
+            self._shapes.clear()
+
+
+def get_schema_indexes(file_paths=None) -> dict:
+    """Return a dictionary of the indexes of each table, as lists of tuples of the name and columns of each index,
+    defined in the schema and in its migrations, unless other files are given.
+    """
+    if file_paths is None:
+        file_paths = [DBQueryFilePath.schema] + [file_path for version, name, file_path in get_migrations()]
+    schema_indexes = {}
+    for file_path in file_paths:
+        definitions = "\n".join(get_text_file_lines(file_path))
+        for table_name, table_definition in CREATE_TABLE_PATTERN.findall(definitions):
+            indexes = schema_indexes.setdefault(table_name, [])
+            for columns in PRIMARY_KEY_PATTERN.findall(table_definition):
+                indexes.append(("PRIMARY", _get_columns(columns)))
+            for index_type, index_name, columns in INDEX_PATTERN.findall(table_definition):
+                if not index_type.strip().upper() == "FULLTEXT":
+                    indexes.append((index_name, _get_columns(columns)))
+            for constraint_name, columns in FOREIGN_KEY_PATTERN.findall(table_definition):
+                indexes.append((constraint_name, _get_columns(columns)))
+        for index_name, table_name, columns in CREATE_INDEX_PATTERN.findall(definitions):
+            schema_indexes.setdefault(table_name, []).append((index_name, _get_columns(columns)))
+    return schema_indexes
+
+
+def _get_columns(columns: str) -> tuple:
+    """Return a tuple of the names of the columns in the column list of an index definition."""
+    return tuple(COLUMN_PATTERN.match(column.strip()).group(1) for column in columns.split(",") if column.strip())
+
+
+def get_table_accesses(query_constructor) -> list:
+    """Return a list of the tables read by the query of the query constructor, as `TableAccess` tuples, starting
+    with the table of the query constructor, followed by those of its nested and related queries. Only conditions that
+    an index can be searched by are taken into account, so `LIKE` and `MATCH` conditions are left out (values ending
+    with a string and full-text searches have indexes of their own).
+    """
+    return _get_table_accesses(query_constructor.table_name, query_constructor.conditions, query_constructor.order)
+
+
+def _get_table_accesses(table_name: str, conditions: tuple, order: str = "", correlated_field: str = "") -> list:
+    equality_fields = []
+    range_fields = []
+    table_accesses = []
+    for condition in conditions:
+        if condition[0] == ConditionTypes.exact_value:
+            equality_fields.append(condition[1])
+        elif condition[0] in (ConditionTypes.at_most, ConditionTypes.at_least, ConditionTypes.between):
+            range_fields.append(condition[1])
+        elif condition[0] == ConditionTypes.nested_query:
+            equality_fields.append(condition[1])
+            schema_name, nested_table_name, fields, nested_conditions, nested_order = condition[2][:5]
+            table_accesses += _get_table_accesses(nested_table_name, nested_conditions, nested_order)
+        elif condition[0] == ConditionTypes.related_query:
+            condition_type, style, field, related_field, related_schema_name, related_table_name, related_conditions = \
+                condition
+            if style == RelatedQueryStyles.nested_in:
+                equality_fields.append(field)
+                table_accesses += _get_table_accesses(related_table_name, related_conditions)
+            else:
+                table_accesses += _get_table_accesses(related_table_name, related_conditions,
+                                                      correlated_field=related_field)
+    order_match = ORDER_FIELD_PATTERN.match(order)
+    return [TableAccess(table_name, tuple(dict.fromkeys(equality_fields)), tuple(dict.fromkeys(range_fields)),
+                        order_match.group(1) if order_match else "", correlated_field)] + table_accesses
+
+
+def get_suggested_columns(finding: str, table_access: TableAccess) -> tuple:
+    """Return the columns of an index, in order, that would let the DBMS read the table as the query does without the
+    finding (one of those in `PlanFindings`), or an empty tuple if no index would.
+    :type finding: str
+    :type table_access: TableAccess
+    """
+    # fields compared with single values come first, as the records found by them are in order of the next field
+    searched_fields = table_access.equality_fields + table_access.range_fields[:1]
+    if finding == PlanFindings.filesort:
+        if not table_access.order_field or table_access.range_fields[:1] not in ((), (table_access.order_field,)):
+            return ()
+        return tuple(dict.fromkeys(table_access.equality_fields + (table_access.order_field,)))
+    if table_access.correlated_field:
+        return tuple(dict.fromkeys((table_access.correlated_field,) + searched_fields))
+    if finding == PlanFindings.full_table_scan:
+        return searched_fields
+    return ()
+
+
+def get_index_definition(table_name: str, columns: tuple) -> str:
+    """Return the SQL creating an index on the columns of the table, as written in the migrations of the schema.
+    :type table_name: str
+    :type columns: tuple
+    """
+    index_name = "{}_{}".format(table_name, "_".join(columns))[:MAX_INDEX_NAME_LENGTH - len("_idx")] + "_idx"
+    return "CREATE INDEX `{}` ON `{{schema_name}}`.`{}` ({});".format(
+        index_name, table_name, ", ".join("`{}` ASC".format(column) for column in columns)
+    )
+
+
+def get_index_advice(database_connector, shapes: list, schema_indexes: dict = None) -> list:
+    """Return a list of the advice on the indexes of the shapes of queries recorded (see
+    `QueryShapeRecorder.get_shapes`), as dictionaries of each query, the number of times it was rendered, and the
+    findings in its plan, or the error message if it could not be explained.
+
+    Each finding is a dictionary of the finding (one of those in `PlanFindings`), the table it is about, the columns of
+    the index suggested for it (if any), and the name of the index in the schema or its migrations that already starts
+    with those columns (if any), which the DBMS chose not to use (e.g. as the table holds few records).
+    :type shapes: list
+    :type schema_indexes: dict
+    """
+    if schema_indexes is None:
+        schema_indexes = get_schema_indexes()
+    advice = []
+    for query, count, parameters, query_constructor in shapes:
+        plan_findings = database_connector.get_plan_findings(query, parameters)
+        if plan_findings[0] == 1:
+            advice.append({"query": query, "count": count, "error": plan_findings[1], "findings": []})
+            continue
+        table_accesses = get_table_accesses(query_constructor)
+        findings = []
+        for finding, table_name in dict.fromkeys(plan_findings[1]):
+            table_access = _get_table_access(finding, table_name, table_accesses)
+            columns = get_suggested_columns(finding, table_access) if table_access else ()
+            table_name = table_name or (table_access.table_name if table_access else "")
+            findings.append({"finding": finding, "table_name": table_name, "columns": columns,
+                             "existing_index": _get_existing_index(schema_indexes, table_name, columns)})
+        advice.append({"query": query, "count": count, "error": "", "findings": findings})
+    return advice
+
+
+def _get_table_access(finding: str, table_name: str, table_accesses: list):
+    """Return the access of the table that the finding is about, or None if it cannot be told. Findings without a table
+    are about the table of the query itself.
+    """
+    if not table_name:
+        return table_accesses[0] if finding == PlanFindings.filesort else None
+    matching_accesses = [table_access for table_access in table_accesses if table_access.table_name == table_name]
+    if finding == PlanFindings.dependent_subquery:
+        matching_accesses.sort(key=lambda table_access: not table_access.correlated_field)
+    return matching_accesses[0] if matching_accesses else None
+
+
+def _get_existing_index(schema_indexes: dict, table_name: str, columns: tuple) -> str:
+    """Return the name of an index of the table that starts with the columns, or an empty string if there is none."""
+    if not columns:
+        return ""
+    for index_name, index_columns in schema_indexes.get(table_name, ()):
+        if index_columns[:len(columns)] == columns:
+            return index_name
+    return ""
+
+
+def format_index_advice(advice: list) -> str:
+    """Return the report of the advice on indexes, listing the findings in the plan of each query, followed by the
+    indexes suggested, ready to be added to a migration.
+    :type advice: list
+    """
+    advised_queries = [query_advice for query_advice in advice if query_advice["findings"] or query_advice["error"]]
+    lines = ["Index advice on {} queries recorded ({} with findings)".format(len(advice), len(advised_queries))]
+    suggested_definitions = {}
+    for query_advice in advised_queries:
+        lines.append("")
+        lines.append("Rendered {} times: {}".format(query_advice["count"], query_advice["query"]))
+        if query_advice["error"]:
+            lines.append("  - not explained: {}".format(query_advice["error"]))
+        for finding in query_advice["findings"]:
+            description = "  - {}{}".format(finding["finding"], " of `{}`".format(finding["table_name"])
+                                            if finding["table_name"] else "")
+            if not finding["columns"]:
+                lines.append(description + ": no index suggested, as none would be searched by the query")
+            elif finding["existing_index"]:
+                lines.append(description + ": already indexed by `{}`, which the DBMS chose not to use".format(
+                    finding["existing_index"]
+                ))
+            else:
+                definition = get_index_definition(finding["table_name"], finding["columns"])
+                suggested_definitions[definition] = suggested_definitions.get(definition, 0) + query_advice["count"]
+                lines.append(description + ": {}".format(definition))
+    if suggested_definitions:
+        lines.append("")
+        lines.append("Suggested indexes (most rendered queries first):")
+        lines += sorted(suggested_definitions, key=lambda definition: suggested_definitions[definition], reverse=True)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (c) 2019 Jared Recomendable.
+Licensed under the GNU General Public License Version 3.
+This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
+"""
+
+import re
+from datetime import datetime
+from os import listdir
+from os.path import join
+from base.utils import *
+from base.logger import Logger
+from database.query_constructors import QueryConstructor
+
+MIGRATION_FILE_NAME_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+logger = Logger(LoggerConfig.file_path)
+
+
+def get_migrations(directory: str = DBQueryFilePath.migrations) -> list:
+    """Return a list of tuples of the version, name and file path of each migration in the directory, in order of
+    version. Migrations are files named `<version>_<name>.sql`, where the version is a number.
+    :type directory: str
+    """
+    migrations = []
+    for file_name in listdir(directory):
+        match = MIGRATION_FILE_NAME_PATTERN.match(file_name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), join(directory, file_name)))
+    return sorted(migrations)
+
+
+def get_applied_versions(database_connector) -> tuple:
+    """Return a tuple to indicate status of execution, where index 0 is the status code and index 1 is the set of
+    versions of the migrations applied to the schema, or the error message, if any.
+    """
+    schema_migrations_definition = format_text_file_lines(get_text_file_lines(DBQueryFilePath.schema_migrations),
+                                                          schema_name=DBSchemaTableNames.schema)
+    is_created = database_connector.execute_queries_sequentially(schema_migrations_definition)
+    if is_created[0] == 1:
+        return is_created
+    query_constructor = QueryConstructor(DBSchemaTableNames.schema_migrations,
+                                         DBSchemaTableNames.schema).add_field(DBFields.SchemaMigrations.version)
+    selection = database_connector.execute_query(query_constructor.render_select_query(), select=True, primary=True)
+    if selection[0] == 1:
+        return selection
+    return 0, {record[0] for record in selection[1]}
+
+
+def run_pending_migrations(database_connector, directory: str = DBQueryFilePath.migrations) -> tuple:
+    """Apply the migrations in the directory that have not been applied to the schema yet, in order of version, and
+    record the version of each one applied. The migrations stop at the first one that fails, which is tried again the
+    next time they are run. As MySQL commits each change to a table as it is made, the changes made by a migration
+    before it failed have to be undone by hand first.
+
+    Returns a tuple to indicate status of execution, where index 0 is the status code and index 1 is the list of
+    versions of the migrations applied, or the error message, if any.
+    :type directory: str
+    """
+    applied_versions = get_applied_versions(database_connector)
+    if applied_versions[0] == 1:
+        return applied_versions
+    applied_versions = applied_versions[1]
+    versions_applied_now = []
+    for version, name, file_path in get_migrations(directory):
+        if version in applied_versions:
+            continue
+        migration = format_text_file_lines(get_text_file_lines(file_path), schema_name=DBSchemaTableNames.schema)
+        is_applied = database_connector.execute_queries_sequentially(migration)
+        if is_applied[0] == 0:
+            is_applied = database_connector.execute_query(
+                "INSERT INTO `{}`.`{}` ({}, {}, {}) VALUES (%s, %s, %s)".format(
+                    DBSchemaTableNames.schema, DBSchemaTableNames.schema_migrations,
+                    DBFields.SchemaMigrations.version, DBFields.SchemaMigrations.name,
+                    DBFields.SchemaMigrations.applied_at
+                ), commit=True, parameters=(version, name, datetime.now().replace(microsecond=0)), prepared=True
+            )
+        if is_applied[0] == 1:
+            message = Msg.Migrations.failed.format(version, name, is_applied[1])
+            print_error(message)
+            logger.log_error(message)
+            return 1, message
+        print_message(Msg.Migrations.applied.format(version, name))
+        logger.log_message(Msg.Migrations.applied.format(version, name))
+        versions_applied_now.append(version)
+    return 0, versions_applied_now
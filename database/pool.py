@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (c) 2019 Jared Recomendable.
+Licensed under the GNU General Public License Version 3.
+This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
+"""
+
+from collections import OrderedDict
+from queue import LifoQueue, Empty
+from threading import Lock
+
+
+class PoolExhaustedError(Exception):
+    """Raised when no connection could be lent out of the pool within the timeout."""
+    pass
+
+
+class PooledConnection:
+    """Wrapper around a single DBMS connection that is owned by a connection pool. Also keeps the server-side
+    prepared statements of the connection, keyed by their SQL, evicting the least recently used one when full.
+    """
+    def __init__(self, cnx, statement_cache_size: int):
+        """Initialise the wrapper around the connection.
+        :type statement_cache_size: int
+        """
+        self.cnx = cnx
+        self.statement_cache_size = statement_cache_size
+        self.prepared_statements = OrderedDict()
+
+    def get_prepared_cursor(self, statement: str) -> tuple:
+        """Return a tuple of the statement and a cursor that has it (or is about to have it) prepared. The statement
+        returned must be the one passed on to the cursor, so that the cursor recognises it and skips preparing again.
+        :type statement: str
+        """
+        if statement in self.prepared_statements:
+            self.prepared_statements.move_to_end(statement)
+            return self.prepared_statements[statement]
+        if len(self.prepared_statements) >= self.statement_cache_size:
+            self.prepared_statements.popitem(last=False)[1][1].close()
+        prepared_statement = statement, self.cnx.cursor(prepared=True)
+        self.prepared_statements[statement] = prepared_statement
+        return prepared_statement
+
+    def close(self):
+        self.prepared_statements.clear()
+        self.cnx.close()
+
+
+class ConnectionPool:
+    """Class to create an object that lends out a bounded number of DBMS connections. Connections are only opened
+    when needed, and are reused (most recently returned first) afterwards.
+    """
+    def __init__(self, connection_factory, size: int, statement_cache_size: int = 32, timeout: float = 30.0):
+        """Initialise the pool. `connection_factory` is called without arguments to open a new DBMS connection.
+        :type size: int
+        :type statement_cache_size: int
+        :type timeout: float
+        """
+        self.connection_factory = connection_factory
+        self.size = size
+        self.statement_cache_size = statement_cache_size
+        self.timeout = timeout
+        self._idle_connections = LifoQueue()
+        self._number_of_connections = 0
+        self._lock = Lock()
+
+    def get(self) -> PooledConnection:
+        """Lend a connection out of the pool, opening a new one if the pool has not reached its size yet."""
+        try:
+            return self._idle_connections.get_nowait()
+        except Empty:
+            pass
+
+        with self._lock:
+            can_open_connection = self._number_of_connections < self.size
+            if can_open_connection:
+                self._number_of_connections += 1
+        if can_open_connection:
+            try:
+                return PooledConnection(self.connection_factory(), self.statement_cache_size)
+            except Exception:
+                with self._lock:
+                    self._number_of_connections -= 1
+                raise
+
+        try:
+            return self._idle_connections.get(timeout=self.timeout)
+        except Empty:
+            raise PoolExhaustedError("No database connection became available within {} seconds.".format(
+                self.timeout
+            ))
+
+    def put(self, pooled_connection: PooledConnection):
+        """Return a connection, previously lent by `get`, back to the pool.
+        :type pooled_connection: PooledConnection
+        """
+        self._idle_connections.put(pooled_connection)
+
+    def discard(self, pooled_connection: PooledConnection):
+        """Close a connection, previously lent by `get`, that must not be reused, freeing its place in the pool.
+        :type pooled_connection: PooledConnection
+        """
+        try:
+            pooled_connection.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._number_of_connections -= 1
+
+    def close_all(self):
+        """Close every connection that is currently idle in the pool."""
+        while True:
+            try:
+                pooled_connection = self._idle_connections.get_nowait()
+            except Empty:
+                break
+            self.discard(pooled_connection)
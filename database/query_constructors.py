@@ -7,69 +7,138 @@ Licensed under the GNU General Public License Version 3.
 This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
 """
 
+import re
+from functools import lru_cache
 from base.utils import *
 from base.logger import Logger
 
 logger = Logger(LoggerConfig.file_path)
 
+# SQL of each type of condition, given its field (and, for nested queries, the nested select query)
+CONDITION_TEMPLATES = {
+    ConditionTypes.exact_value: "({} = %s)",
+    ConditionTypes.at_most: "({} <= %s)",
+    ConditionTypes.at_least: "({} >= %s)",
+    ConditionTypes.between: "({} BETWEEN %s AND %s)",
+    ConditionTypes.like: "({} LIKE %s)",
+    ConditionTypes.match: "(MATCH ({}) AGAINST (%s IN BOOLEAN MODE))",
+    ConditionTypes.nested_query: "({} IN ({}))",
+    ConditionTypes.related_query: "(EXISTS (SELECT 1 FROM {}{} WHERE ({}.{} = {}.{}){}))"
+}
+
+# Words of a full-text search, and the length of the shortest word in a FULLTEXT index (`innodb_ft_min_token_size`,
+# which is 3 by default). Searches for shorter words would not find anything through the index
+FULLTEXT_WORD_PATTERN = re.compile(r"\w+")
+FULLTEXT_MIN_WORD_LENGTH = 3
+
+# SQL of each aggregate function, given its field
+AGGREGATE_TEMPLATES = {
+    AggregateFunctions.count: "COUNT({})",
+    AggregateFunctions.count_distinct: "COUNT(DISTINCT {})",
+    AggregateFunctions.sum: "SUM({})",
+    AggregateFunctions.min: "MIN({})",
+    AggregateFunctions.max: "MAX({})"
+}
+
 
 class QueryConstructor:
     """Class for constructing a query to be executed by the DBMS. Specifically made with the goal to automate adding
     conditions using the WHERE clause in SQL
+
+    Query constructors are immutable. Every `add_*` method returns a new query constructor with the addition, leaving
+    the query constructor it is called on as it is, so the calls can be chained, and a query constructor can be shared
+    between threads and reused as the base of other queries.
+
+    Values are never written into the rendered SQL. They are replaced by `%s` placeholders instead, and the values to
+    bind to them are returned by `get_select_parameters`, `get_update_parameters` and `get_delete_parameters`.
+
+    Conditions are kept as their shape (the type of condition and its field) rather than as SQL, and each shape of
+    query is compiled to SQL only once, so rendering a query that has been rendered before only looks it up.
+
+    Records can be filtered by the records of a related table (see `TABLE_RELATIONSHIPS`) with `add_related_query`,
+    which renders a correlated `EXISTS` subquery. Chains of related queries (e.g. customers who bought a product) are
+    planned as semi-joins, where chains of nested `IN` queries are planned badly by some versions of MariaDB. As the
+    best way depends on the DBMS, related queries are rendered as set by `default_related_query_style`, which should be
+    set to that of the database backend, unless another style is passed to the constructor.
+
+    Numbers such as row counts and stock totals are computed by the DBMS, rather than from every selected record, with
+    `render_count_query`, or with `add_aggregate`, `add_group` and the `add_having_*` conditions on groups of records.
+
+    Words can be searched for in fields with a FULLTEXT index with `add_condition_match`, which renders `MATCH ...
+    AGAINST` if `supports_fulltext_search` is set (as it should be for database backends that support it), and
+    `LIKE` conditions otherwise. Values ending with a string are searched for through the reversed copies of the fields
+    in `REVERSED_FIELDS` (added by a migration), unless `searches_reversed_fields` is set to False.
+
+    If `query_shape_recorder` is set (to a `QueryShapeRecorder`), every select, update and delete query rendered is
+    recorded in it, so that the plans of the queries made can be examined by the index advisor.
     """
-    def __init__(self, table_name: str, schema_name: str = ""):
-        """Initialise the object. Optionally pass a schema name to the constructor.
+    __slots__ = ("table_name", "schema_name", "related_query_style", "fields", "values", "conditions",
+                 "condition_parameters", "nested_table_names", "aggregates", "group_fields", "having_conditions",
+                 "having_parameters", "order", "incremented_fields")
+    default_related_query_style = RelatedQueryStyles.exists
+    supports_fulltext_search = True
+    searches_reversed_fields = True
+    query_shape_recorder = None
+
+    def __init__(self, table_name: str, schema_name: str = "", related_query_style: str = ""):
+        """Initialise the object. Optionally pass a schema name, and a style of rendering related queries (one of
+        those in `RelatedQueryStyles`), to the constructor.
         :type table_name: str
         :type schema_name: str
+        :type related_query_style: str
         """
-        self.table_name = table_name
-        self.schema_name = schema_name
-        self.field_list = []
-        self.value_list = []
-        self.condition = ""
-        self.order = ""
-
-    def reset(self):
-        """Clear the query in memory for this object. Essential before creating a new query."""
-        self.field_list.clear()
-        self.value_list.clear()
-        self.condition = ""
+        set_attribute = super().__setattr__
+        set_attribute("table_name", table_name)
+        set_attribute("schema_name", schema_name)
+        set_attribute("related_query_style", related_query_style)
+        set_attribute("fields", ())
+        set_attribute("values", ())
+        set_attribute("conditions", ())
+        set_attribute("condition_parameters", ())
+        set_attribute("nested_table_names", frozenset())
+        set_attribute("aggregates", ())
+        set_attribute("group_fields", ())
+        set_attribute("having_conditions", ())
+        set_attribute("having_parameters", ())
+        set_attribute("order", "")
+        set_attribute("incremented_fields", ())
+
+    def __setattr__(self, name, value):
+        raise AttributeError(Msg.DatabaseQueryConstructor.immutable.format(name))
+
+    def _replace(self, **changes) -> "QueryConstructor":
+        """Return a copy of the query constructor, with the attributes given changed."""
+        query_constructor = object.__new__(QueryConstructor)
+        for name in self.__slots__:
+            object.__setattr__(query_constructor, name, changes[name] if name in changes else getattr(self, name))
+        return query_constructor
 
     # Adding Conditions
-    def add_condition_exact_value(self, field: str, value: str):
+    def add_condition_exact_value(self, field: str, value: str) -> "QueryConstructor":
         """Add a condition to go along with the SQL query, where the value for the condition is a single fixed value.
         :type field: str
         :type value: str
         """
-        value = remove_unsafe_chars(value)
-
-        if self.condition:
-            self._add_and()
-        self.condition += '({} = "{}")'.format(field, value)
+        return self._replace(conditions=self.conditions + ((ConditionTypes.exact_value, field),),
+                             condition_parameters=self.condition_parameters + (value,))
 
-    def add_condition_ranged_values(self, field: str, lower_limit: str = "", upper_limit: str = ""):
+    def add_condition_ranged_values(self, field: str, lower_limit: str = "",
+                                    upper_limit: str = "") -> "QueryConstructor":
         """Add a condition to go along with the SQL query, where there is a range of values for the field in
         question.
         :type field: str
         :type lower_limit: str
         :type upper_limit: str
         """
-        lower_limit = remove_unsafe_chars(lower_limit)
-        upper_limit = remove_unsafe_chars(upper_limit)
-
-        if self.condition and (lower_limit or upper_limit):
-            self._add_and()
-        if not lower_limit and upper_limit:
-            self.condition += '({} <= "{}")'.format(field, upper_limit)
-        elif not upper_limit and lower_limit:
-            self.condition += '({} >= "{}")'.format(field, lower_limit)
-        elif lower_limit and upper_limit:
-            self.condition += '({} BETWEEN "{}" AND "{}")'.format(field, lower_limit, upper_limit)
-        else:
-            print_error(Msg.DatabaseQueryConstructor.missing_ranged_values_limits)
-            logger.log_error(Msg.DatabaseQueryConstructor.missing_ranged_values_limits)
-
-    def add_condition_like(self, field: str, like_value: str, at_beginning: bool = False, at_end: bool = False):
+        ranged_condition = _get_ranged_condition(field, lower_limit, upper_limit)
+        if ranged_condition is None:
+            return self
+        condition, parameters = ranged_condition
+        return self._replace(conditions=self.conditions + (condition,),
+                             condition_parameters=self.condition_parameters + parameters)
+
+    def add_condition_like(self, field: str, like_value: str, at_beginning: bool = False,
+                           at_end: bool = False) -> "QueryConstructor":
         """Add a condition to go along with the SQL query, where the value for the condition would be a subset
         of the full value.
         :type field: str
@@ -77,155 +146,413 @@ class QueryConstructor:
         :type at_beginning: bool
         :type at_end: bool
         """
-        like_value = remove_unsafe_chars(like_value)
-
-        if self.condition:
-            self._add_and()
         if not at_beginning and not at_end:
             like_value = "%" + like_value + "%"
         elif not at_end and at_beginning:
             like_value += "%"
         elif not at_beginning and at_end:
+            # Values ending with the string are searched for through the index on the reversed values, if there is one
+            # (escaped wildcards cannot be reversed, so those are searched for as they are)
+            reversed_field = QueryConstructor.searches_reversed_fields and REVERSED_FIELDS.get((self.table_name, field))
+            if reversed_field and "\\" not in like_value:
+                return self._replace(conditions=self.conditions + ((ConditionTypes.like, reversed_field),),
+                                     condition_parameters=self.condition_parameters + (like_value[::-1] + "%",))
             like_value = "%" + like_value
-        self.condition += '({} LIKE "{}")'.format(field, like_value)
-
-    def add_nested_query(self, field: str, select_statement: str):
-        """Add a select query as a nested query in the existing SQL query.
+        return self._replace(conditions=self.conditions + ((ConditionTypes.like, field),),
+                             condition_parameters=self.condition_parameters + (like_value,))
+
+    def add_condition_match(self, fields, search_text: str) -> "QueryConstructor":
+        """Add a condition to go along with the SQL query, where every word of the search text is at the beginning of
+        a word in at least one of the fields, searched for through the FULLTEXT index on exactly those fields. If the
+        DBMS does not support it, or if a word is too short to be in the index, the condition is instead that the
+        search text is a subset of the full value of at least one of the fields.
+        :type search_text: str
+        """
+        fields = tuple(fields)
+        words = FULLTEXT_WORD_PATTERN.findall(search_text)
+        if (QueryConstructor.supports_fulltext_search and words and
+                all(len(word) >= FULLTEXT_MIN_WORD_LENGTH for word in words)):
+            return self._replace(conditions=self.conditions + ((ConditionTypes.match, fields),),
+                                 condition_parameters=self.condition_parameters + (
+                                     " ".join("+{}*".format(word) for word in words),
+                                 ))
+        return self._replace(conditions=self.conditions + ((ConditionTypes.like_any, fields),),
+                             condition_parameters=self.condition_parameters + ("%" + search_text + "%",) * len(fields))
+
+    def add_nested_query(self, field: str, nested_query_constructor: "QueryConstructor") -> "QueryConstructor":
+        """Add the select query of another query constructor as a nested query in the existing SQL query.
         :type field: str
-        :type select_statement: str
+        :type nested_query_constructor: QueryConstructor
         """
-        if self.condition:
-            self._add_and()
-        self.condition += '({} IN ({}))'.format(field, select_statement)
+        return self._replace(
+            conditions=self.conditions + (
+                (ConditionTypes.nested_query, field, nested_query_constructor.get_select_shape()),
+            ),
+            condition_parameters=self.condition_parameters + nested_query_constructor.get_select_parameters(),
+            nested_table_names=self.nested_table_names | nested_query_constructor.get_table_names()
+        )
+
+    def add_related_query(self, related_query_constructor: "QueryConstructor") -> "QueryConstructor":
+        """Add a condition that there is at least one record, of the related table of another query constructor,
+        that is related to the record and meets the conditions of the other query constructor. The fields and order of
+        the other query constructor are ignored.
+        :type related_query_constructor: QueryConstructor
+        """
+        relationship = get_relationship(self.table_name, related_query_constructor.table_name)
+        if relationship is None:
+            message = Msg.DatabaseQueryConstructor.no_relationship.format(self.table_name,
+                                                                          related_query_constructor.table_name)
+            print_error(message)
+            logger.log_error(message)
+            return self
+        field, related_field = relationship
+        related_query_style = self.related_query_style or QueryConstructor.default_related_query_style
+        return self._replace(
+            conditions=self.conditions + (
+                (ConditionTypes.related_query, related_query_style, field, related_field,
+                 related_query_constructor.schema_name, related_query_constructor.table_name,
+                 related_query_constructor.conditions),
+            ),
+            condition_parameters=self.condition_parameters + related_query_constructor.condition_parameters,
+            nested_table_names=self.nested_table_names | related_query_constructor.get_table_names()
+        )
 
-    def _add_and(self):
-        self.condition += " AND "
+    # Adding Conditions on Groups
+    def add_having_exact_value(self, function: str, field: str, value: str) -> "QueryConstructor":
+        """Add a condition on the groups of records (see `add_group`), where the aggregate function of the field is a
+        single fixed value.
+        :type function: str
+        :type field: str
+        :type value: str
+        """
+        aggregate = get_aggregate_expression(function, field)
+        if not aggregate:
+            return self
+        return self._replace(having_conditions=self.having_conditions + ((ConditionTypes.exact_value, aggregate),),
+                             having_parameters=self.having_parameters + (value,))
+
+    def add_having_ranged_values(self, function: str, field: str, lower_limit: str = "",
+                                 upper_limit: str = "") -> "QueryConstructor":
+        """Add a condition on the groups of records (see `add_group`), where there is a range of values for the
+        aggregate function of the field.
+        :type function: str
+        :type field: str
+        :type lower_limit: str
+        :type upper_limit: str
+        """
+        aggregate = get_aggregate_expression(function, field)
+        ranged_condition = _get_ranged_condition(aggregate, lower_limit, upper_limit) if aggregate else None
+        if ranged_condition is None:
+            return self
+        condition, parameters = ranged_condition
+        return self._replace(having_conditions=self.having_conditions + (condition,),
+                             having_parameters=self.having_parameters + parameters)
 
     # Adding Fields and Values
-    def add_field(self, field: str):
+    def add_field(self, field: str) -> "QueryConstructor":
         """Add a field to the query."""
-        self.field_list.append(field)
+        return self._replace(fields=self.fields + (field,))
+
+    def add_fields(self, fields) -> "QueryConstructor":
+        """Add each of the fields to the query, so that only those fields are selected."""
+        return self._replace(fields=self.fields + tuple(fields))
+
+    def with_fields(self, fields) -> "QueryConstructor":
+        """Return a query constructor selecting only the fields given, from the records that meet the conditions of the
+        query constructor (e.g. the records that its update or delete query changes), without any values to update.
+        """
+        return self._replace(fields=tuple(fields), values=())
 
-    def add_value(self, value: str):
+    def add_value(self, value: str) -> "QueryConstructor":
         """Add a value to the query."""
-        self.value_list.append(remove_unsafe_chars(value))
+        return self._replace(values=self.values + (value,))
 
-    def add_field_and_value(self, field: str, value: str):
+    def add_field_and_value(self, field: str, value: str) -> "QueryConstructor":
         """Add a field and a value to the query."""
-        self.add_field(field)
-        self.add_value(value)
+        return self._replace(fields=self.fields + (field,), values=self.values + (value,))
+
+    def add_field_and_increment(self, field: str, amount: str) -> "QueryConstructor":
+        """Add a field and an amount to add to its value (a negative amount subtracts from it) to the update query, so
+        that the value is changed from the one in the database as the query is executed, instead of being set to a
+        value computed from one read before.
+        :type field: str
+        :type amount: str
+        """
+        return self._replace(fields=self.fields + (field,), values=self.values + (amount,),
+                             incremented_fields=self.incremented_fields + (field,))
+
+    def add_aggregate(self, function: str, field: str = "*", alias: str = "") -> "QueryConstructor":
+        """Add an aggregate function (one of those in `AggregateFunctions`) of the field to the query, selected after
+        the fields added with `add_field`. Optionally pass an alias to select it as.
+        :type function: str
+        :type field: str
+        :type alias: str
+        """
+        if not get_aggregate_expression(function, field):
+            return self
+        return self._replace(aggregates=self.aggregates + ((function, field, alias),))
+
+    def add_group(self, field: str) -> "QueryConstructor":
+        """Group the records by the field, so that aggregate functions are computed for each group. The field should
+        also be added with `add_field`, to tell the groups apart.
+        :type field: str
+        """
+        return self._replace(group_fields=self.group_fields + (field,))
 
-    def add_order(self, field: str, ascending: bool = True):
+    def add_order(self, field: str, ascending: bool = True) -> "QueryConstructor":
         if ascending:
-            self.order = "ORDER BY {} ASC".format(field)
+            return self._replace(order="ORDER BY {} ASC".format(field))
         else:
-            self.order = "ORDER BY {} DESC".format(field)
+            return self._replace(order="ORDER BY {} DESC".format(field))
 
     # Rendering the Queries
+    def get_select_shape(self) -> tuple:
+        """Return the shape of the constructed select SQL query, which is everything that it is compiled from, leaving
+        out the values bound to its placeholders.
+        """
+        return (self.schema_name, self.table_name, self.fields, self.conditions, self.order, self.aggregates,
+                self.group_fields, self.having_conditions)
+
     def render_select_query(self) -> str:
         """Return constructed select SQL query."""
-        schema_name = self.schema_name
-        table_name = self.table_name
-        condition = self.condition
-        order = self.order
-
-        if len(table_name) == 0:
+        if len(self.table_name) == 0:
             print_error(Msg.DatabaseQueryConstructor.missing_table_name)
             logger.log_error(Msg.DatabaseQueryConstructor.missing_table_name)
             return ""
-
-        if not schema_name:
-            schema_name = ""
-        else:
-            schema_name += "."
-
-        if len(self.field_list) == 0:
-            fields = "*"
-        else:
-            fields = self.field_list[0]
-            for i in range(1, len(self.field_list)):
-                fields += ", {}".format(self.field_list[i])
-
-        if len(condition) > 0:
-            condition = "WHERE ({})".format(condition)
-
-        return "SELECT {} FROM {}{} {} {}".format(
-            fields,
-            schema_name,
-            table_name,
-            condition,
-            order
-        )
+        query = compile_select_query(*self.get_select_shape())
+        if QueryConstructor.query_shape_recorder is not None:
+            QueryConstructor.query_shape_recorder.record(query, self.get_select_parameters(), self)
+        return query
+
+    def render_count_query(self) -> str:
+        """Return constructed SQL query counting the records that meet the conditions, or the groups of them if they
+        are grouped. The fields, aggregates and order are ignored.
+        """
+        if len(self.table_name) == 0:
+            print_error(Msg.DatabaseQueryConstructor.missing_table_name)
+            logger.log_error(Msg.DatabaseQueryConstructor.missing_table_name)
+            return ""
+        return compile_count_query(self.schema_name, self.table_name, self.conditions, self.group_fields,
+                                   self.having_conditions)
 
     def render_update_query(self) -> str:
         """Return constructed update SQL query."""
-        fields = self.field_list
-        values = self.value_list
-        schema_name = self.schema_name
-        table_name = self.table_name
-        condition = self.condition
-
-        if len(table_name) == 0:
+        if len(self.table_name) == 0:
             print_error(Msg.DatabaseQueryConstructor.missing_table_name)
             logger.log_error(Msg.DatabaseQueryConstructor.missing_table_name)
             return ""
 
-        if len(fields) == 0 or len(values) == 0:
+        if len(self.fields) == 0 or len(self.values) == 0:
             print_error(Msg.DatabaseQueryConstructor.missing_fields_or_values)
             logger.log_error(Msg.DatabaseQueryConstructor.missing_fields_or_values)
             return ""
 
-        if len(fields) != len(values):
+        if len(self.fields) != len(self.values):
             print_error(Msg.DatabaseQueryConstructor.number_of_field_and_value_mismatch)
             logger.log_error(Msg.DatabaseQueryConstructor.number_of_field_and_value_mismatch)
             return ""
 
-        if not schema_name:
-            schema_name = ""
-        else:
-            schema_name += "."
-
-        if len(condition) > 0:
-            condition = "WHERE ({})".format(condition)
-
-        set_result = '{}="{}",'.format(fields[0], values[0])
-        for i in range(1, len(fields) - 1):
-            set_result += ' {}="{}",'.format(fields[i], values[i])
-        set_result += ' {}="{}"'.format(fields[len(fields) - 1], values[len(fields) - 1])
-
-        return "UPDATE {}{} SET {} {}".format(
-            schema_name,
-            table_name,
-            set_result,
-            condition
-        )
+        query = compile_update_query(self.schema_name, self.table_name, self.fields, self.conditions,
+                                     self.incremented_fields)
+        if QueryConstructor.query_shape_recorder is not None:
+            QueryConstructor.query_shape_recorder.record(query, self.get_update_parameters(), self)
+        return query
 
     def render_delete_query(self) -> str:
         """Return constructed delete SQL query."""
-        schema_name = self.schema_name
-        table_name = self.table_name
-        condition = self.condition
-
-        if len(table_name) == 0:
+        if len(self.table_name) == 0:
             print_error(Msg.DatabaseQueryConstructor.missing_table_name)
             logger.log_error(Msg.DatabaseQueryConstructor.missing_table_name)
             return ""
 
-        if len(condition) == 0:
+        if len(self.conditions) == 0:
             print_error(Msg.DatabaseQueryConstructor.cannot_render)
             logger.log_error(Msg.DatabaseQueryConstructor.cannot_render)
             return ""
 
-        if not schema_name:
-            schema_name = ""
-        else:
-            schema_name += "."
+        query = compile_delete_query(self.schema_name, self.table_name, self.conditions)
+        if QueryConstructor.query_shape_recorder is not None:
+            QueryConstructor.query_shape_recorder.record(query, self.get_delete_parameters(), self)
+        return query
+
+    def get_table_names(self) -> frozenset:
+        """Return the names of the tables read by the constructed select SQL query, including its nested queries."""
+        return self.nested_table_names | {self.table_name}
+
+    # Rendering the Parameters
+    def get_select_parameters(self) -> tuple:
+        """Return the values to bind to the placeholders of the constructed select or count SQL query."""
+        return self.condition_parameters + self.having_parameters
 
-        if len(condition) > 0:
-            condition = "WHERE ({})".format(condition)
+    def get_update_parameters(self) -> tuple:
+        """Return the values to bind to the placeholders of the constructed update SQL query."""
+        return self.values + self.condition_parameters
 
-        return "DELETE FROM {}{} {}".format(
-            schema_name,
+    def get_delete_parameters(self) -> tuple:
+        """Return the values to bind to the placeholders of the constructed delete SQL query."""
+        return self.condition_parameters
+
+
+def _get_ranged_condition(field: str, lower_limit: str, upper_limit: str):
+    """Return a tuple of the shape of the condition that the field is within the limits given and the values of the
+    limits, or None if there are no limits.
+    """
+    if not lower_limit and upper_limit:
+        return (ConditionTypes.at_most, field), (upper_limit,)
+    elif not upper_limit and lower_limit:
+        return (ConditionTypes.at_least, field), (lower_limit,)
+    elif lower_limit and upper_limit:
+        return (ConditionTypes.between, field), (lower_limit, upper_limit)
+    print_error(Msg.DatabaseQueryConstructor.missing_ranged_values_limits)
+    logger.log_error(Msg.DatabaseQueryConstructor.missing_ranged_values_limits)
+    return None
+
+
+def get_aggregate_expression(function: str, field: str) -> str:
+    """Return the SQL of the aggregate function of the field, or an empty string if the function is unknown.
+    :type function: str
+    :type field: str
+    """
+    if function not in AGGREGATE_TEMPLATES:
+        print_error(Msg.DatabaseQueryConstructor.unknown_aggregate_function.format(function))
+        logger.log_error(Msg.DatabaseQueryConstructor.unknown_aggregate_function.format(function))
+        return ""
+    return AGGREGATE_TEMPLATES[function].format(field)
+
+
+# Compiling the Shapes of Queries
+def get_relationship(table_name: str, related_table_name: str):
+    """Return a tuple of the field of the table and the field of the related table that match their related records,
+    or None if the tables are not related.
+    :type table_name: str
+    :type related_table_name: str
+    """
+    if (table_name, related_table_name) in TABLE_RELATIONSHIPS:
+        return TABLE_RELATIONSHIPS[(table_name, related_table_name)]
+    if (related_table_name, table_name) in TABLE_RELATIONSHIPS:
+        return tuple(reversed(TABLE_RELATIONSHIPS[(related_table_name, table_name)]))
+    return None
+
+
+@lru_cache(maxsize=512)
+def compile_condition(conditions: tuple, table_name: str, is_qualified: bool = False) -> str:
+    """Return the WHERE clause of the conditions on the table, or an empty string if there are none. If
+    `is_qualified` is set to True, the fields are qualified with the name of the table, as in the subqueries of
+    related queries, where the fields of the outer queries can be referred to as well.
+    :type conditions: tuple
+    :type table_name: str
+    :type is_qualified: bool
+    """
+    if not conditions:
+        return ""
+    return "WHERE ({})".format(_compile_conditions(conditions, table_name, is_qualified))
+
+
+def _compile_conditions(conditions: tuple, table_name: str, is_qualified: bool) -> str:
+    qualifier = table_name + "." if is_qualified else ""
+    rendered_conditions = []
+    for condition in conditions:
+        if condition[0] == ConditionTypes.nested_query:
+            rendered_conditions.append(CONDITION_TEMPLATES[condition[0]].format(
+                qualifier + condition[1], compile_select_query(*condition[2])
+            ))
+        elif condition[0] == ConditionTypes.related_query and condition[1] == RelatedQueryStyles.nested_in:
+            condition_type, style, field, related_field, related_schema_name, related_table_name, related_conditions = \
+                condition
+            rendered_conditions.append(CONDITION_TEMPLATES[ConditionTypes.nested_query].format(
+                qualifier + field,
+                compile_select_query(related_schema_name, related_table_name, (related_field,), related_conditions, "")
+            ))
+        elif condition[0] == ConditionTypes.related_query:
+            condition_type, style, field, related_field, related_schema_name, related_table_name, related_conditions = \
+                condition
+            related_condition = _compile_conditions(related_conditions, related_table_name, True) \
+                if related_conditions else ""
+            rendered_conditions.append(CONDITION_TEMPLATES[condition_type].format(
+                _get_schema_prefix(related_schema_name), related_table_name, related_table_name, related_field,
+                table_name, field, " AND ({})".format(related_condition) if related_condition else ""
+            ))
+        elif condition[0] == ConditionTypes.match:
+            rendered_conditions.append(CONDITION_TEMPLATES[condition[0]].format(
+                ", ".join(qualifier + field for field in condition[1])
+            ))
+        elif condition[0] == ConditionTypes.like_any:
+            rendered_conditions.append("({})".format(" OR ".join(
+                CONDITION_TEMPLATES[ConditionTypes.like].format(qualifier + field) for field in condition[1]
+            )))
+        else:
+            rendered_conditions.append(CONDITION_TEMPLATES[condition[0]].format(qualifier + condition[1]))
+    return " AND ".join(rendered_conditions)
+
+
+def _get_schema_prefix(schema_name: str) -> str:
+    return schema_name + "." if schema_name else ""
+
+
+@lru_cache(maxsize=512)
+def compile_select_query(schema_name: str, table_name: str, fields: tuple, conditions: tuple, order: str,
+                         aggregates: tuple = (), group_fields: tuple = (), having_conditions: tuple = ()) -> str:
+    """Return the select SQL query of the shape given (see `QueryConstructor.get_select_shape`)."""
+    columns = list(fields)
+    for function, field, alias in aggregates:
+        columns.append(get_aggregate_expression(function, field) + (" AS " + alias if alias else ""))
+    return "SELECT {} FROM {}{} {}".format(
+        ", ".join(columns) if columns else "*",
+        _get_schema_prefix(schema_name),
+        table_name,
+        " ".join(_get_grouped_clauses(table_name, conditions, group_fields, having_conditions) + [order])
+    )
+
+
+@lru_cache(maxsize=128)
+def compile_count_query(schema_name: str, table_name: str, conditions: tuple, group_fields: tuple = (),
+                        having_conditions: tuple = ()) -> str:
+    """Return the SQL query counting the records where the conditions are met, or the groups of them if they are
+    grouped by the fields given.
+    """
+    if not group_fields:
+        return "SELECT COUNT(*) FROM {}{} {}".format(
+            _get_schema_prefix(schema_name),
             table_name,
-            condition
+            compile_condition(conditions, table_name)
         )
+    return "SELECT COUNT(*) FROM (SELECT {} FROM {}{} {}) AS grouped_records".format(
+        ", ".join(group_fields),
+        _get_schema_prefix(schema_name),
+        table_name,
+        " ".join(_get_grouped_clauses(table_name, conditions, group_fields, having_conditions))
+    )
+
+
+def _get_grouped_clauses(table_name: str, conditions: tuple, group_fields: tuple, having_conditions: tuple) -> list:
+    """Return the WHERE, GROUP BY and HAVING clauses of a select SQL query, leaving out the latter two if unused."""
+    clauses = [compile_condition(conditions, table_name)]
+    if group_fields:
+        clauses.append("GROUP BY {}".format(", ".join(group_fields)))
+    if having_conditions:
+        clauses.append("HAVING ({})".format(_compile_conditions(having_conditions, table_name, False)))
+    return clauses
+
+
+@lru_cache(maxsize=128)
+def compile_update_query(schema_name: str, table_name: str, fields: tuple, conditions: tuple,
+                         incremented_fields: tuple = ()) -> str:
+    """Return the update SQL query setting the fields (or adding to those of `incremented_fields`), where the
+    conditions are met.
+    """
+    return "UPDATE {}{} SET {} {}".format(
+        _get_schema_prefix(schema_name),
+        table_name,
+        ", ".join(("{0}={0}+%s" if field in incremented_fields else "{}=%s").format(field) for field in fields),
+        compile_condition(conditions, table_name)
+    )
+
+
+@lru_cache(maxsize=128)
+def compile_delete_query(schema_name: str, table_name: str, conditions: tuple) -> str:
+    """Return the delete SQL query deleting the records where the conditions are met."""
+    return "DELETE FROM {}{} {}".format(
+        _get_schema_prefix(schema_name),
+        table_name,
+        compile_condition(conditions, table_name)
+    )
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (c) 2019 Jared Recomendable.
+Licensed under the GNU General Public License Version 3.
+This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
+"""
+
+from array import array
+from itertools import starmap
+from keyword import iskeyword
+from threading import Lock
+from base.constants import *
+
+
+class Record:
+    """Base class of the compact record types, which keep the values of a selected record in slots named after its
+    fields, instead of in a tuple. The values can be read by field name (`record.first_name`) or, like a tuple, by
+    position (`record[2]`).
+    """
+    __slots__ = ()
+    fields = ()
+
+    def __init__(self, *values):
+        for field, value in zip(self.fields, values):
+            setattr(self, field, value)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(getattr(self, field) for field in self.fields[index])
+        return getattr(self, self.fields[index])
+
+    def __iter__(self):
+        return (getattr(self, field) for field in self.fields)
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Record, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __lt__(self, other) -> bool:
+        if isinstance(other, (Record, tuple)):
+            return tuple(self) < tuple(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(tuple(self))
+
+    def __repr__(self) -> str:
+        return "{}({})".format(type(self).__name__, ", ".join(
+            "{}={!r}".format(field, getattr(self, field)) for field in self.fields
+        ))
+
+
+def make_record_type(name: str, column_names) -> type:
+    """Return a new record type with a slot for every column. Column names that cannot be used as attribute names
+    (e.g. `COUNT(*)`), or that are repeated, are replaced by `column_<position>`.
+    :type name: str
+    """
+    fields = []
+    for i, column_name in enumerate(column_names):
+        if not column_name.isidentifier() or iskeyword(column_name) or column_name in fields:
+            column_name = "column_{}".format(i)
+        fields.append(column_name)
+    return type(name, (Record,), {"__slots__": tuple(fields), "fields": tuple(fields)})
+
+
+def _get_table_fields(fields_class) -> tuple:
+    """Return the names of the fields listed in the class in `DBFields`, in the order of the columns of the table."""
+    return tuple(value for key, value in vars(fields_class).items() if not key.startswith("__"))
+
+
+# Record types of whole records of each table, and of any other combination of columns selected so far
+RECORD_TYPES = {}
+_record_types_lock = Lock()
+for _fields_class in (DBFields.Customers, DBFields.CustomerLocations, DBFields.Locations, DBFields.CustomerOrderItems,
+                     DBFields.CustomerOrders, DBFields.Products, DBFields.CompanyOrders):
+    RECORD_TYPES[_get_table_fields(_fields_class)] = make_record_type(_fields_class.__name__,
+                                                                      _get_table_fields(_fields_class))
+
+
+def get_record_type(column_names) -> type:
+    """Return the record type for records with the columns given, which is the record type of a table if all of its
+    columns are selected.
+    """
+    column_names = tuple(column_names)
+    record_type = RECORD_TYPES.get(column_names)
+    if record_type is None:
+        with _record_types_lock:
+            record_type = RECORD_TYPES.setdefault(column_names, make_record_type("Record", column_names))
+    return record_type
+
+
+def to_records(rows, column_names):
+    """Return an iterator of the rows (tuples of values) as compact records with the columns given."""
+    return starmap(get_record_type(column_names), rows)
+
+
+def to_columns(rows, column_names) -> dict:
+    """Return a dictionary of the values of each column of the rows, in the order of the columns. Columns of only
+    integers or only floats are kept in an `array`, and the other columns in a list.
+    """
+    columns = {column_name: [] for column_name in column_names}
+    values_of_columns = list(columns.values())
+    for row in rows:
+        for values, value in zip(values_of_columns, row):
+            values.append(value)
+    for column_name, values in columns.items():
+        columns[column_name] = _to_array(values)
+    return columns
+
+
+def _to_array(values: list):
+    """Return the values in an `array` of the matching type if they are all integers or all floats, or else in the
+    list itself.
+    :type values: list
+    """
+    if values and all(type(value) is int for value in values):
+        try:
+            return array("q", values)
+        except OverflowError:
+            return values
+    elif values and all(type(value) is float for value in values):
+        return array("d", values)
+    return values
+
+
+def format_records(rows: list, column_names, result_format: str):
+    """Return the selected rows in the result format given, one of those in `ResultFormats`.
+    :type rows: list
+    :type result_format: str
+    """
+    if result_format == ResultFormats.records:
+        return list(to_records(rows, column_names))
+    elif result_format == ResultFormats.columns:
+        return to_columns(rows, column_names)
+    return rows
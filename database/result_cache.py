@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (c) 2019 Jared Recomendable.
+Licensed under the GNU General Public License Version 3.
+This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from base.utils import *
+from base.logger import Logger
+
+
+class MemoryResultCacheBackend:
+    """Result cache backend that keeps the cached results in the memory of this process, evicting the least recently
+    used results once they hold more rows than the budget allows.
+    """
+    def __init__(self, max_rows: int):
+        """Initialise the backend.
+        :type max_rows: int
+        """
+        self.max_rows = max_rows
+        self._entries = OrderedDict()
+        self._number_of_rows = 0
+        self._table_versions = {}
+        self._lock = Lock()
+
+    def get(self, key):
+        """Return the result cached under the key, or None if there is none or it has expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expiry_time, number_of_rows, result = entry
+            if expiry_time < monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def set(self, key, result, number_of_rows: int, ttl: float):
+        """Cache the result, made of the number of rows given, under the key for `ttl` seconds. Results with more
+        rows than the budget are not cached.
+        :type number_of_rows: int
+        :type ttl: float
+        """
+        if number_of_rows > self.max_rows:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (monotonic() + ttl, number_of_rows, result)
+            self._number_of_rows += number_of_rows
+            while self._number_of_rows > self.max_rows:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        self._number_of_rows -= self._entries.pop(key)[1]
+
+    def get_versions(self, table_names) -> tuple:
+        """Return the current version of each table given."""
+        with self._lock:
+            return tuple(self._table_versions.get(table_name, 0) for table_name in table_names)
+
+    def increment_versions(self, table_names):
+        """Increment the version of each table given, so that results cached under their older versions are no longer
+        returned.
+        """
+        with self._lock:
+            for table_name in table_names:
+                self._table_versions[table_name] = self._table_versions.get(table_name, 0) + 1
+
+    def clear(self):
+        """Remove every cached result."""
+        with self._lock:
+            self._entries.clear()
+            self._number_of_rows = 0
+
+
+RESULT_CACHE_BACKENDS = {
+    ResultCacheBackends.memory: MemoryResultCacheBackend
+}
+
+
+class ResultCache:
+    """Class to create an object that caches the results of select queries, keyed by the query, its parameters and
+    the versions of the tables it reads.
+
+    Every write to a table must be reported with `invalidate`, which increments the version of the table and of the
+    tables changed along with it by cascading foreign keys. Results read from older versions are then never returned
+    again, and are evicted by the backend in time.
+    """
+    def __init__(self, result_cache_config=None):
+        if result_cache_config is None:
+            result_cache_config = Config.DefaultKeyValuePairs.result_cache
+        self.logger = Logger(LoggerConfig.file_path)
+        backend_name = result_cache_config.get(
+            Config.Keys.ResultCache.backend,
+            Config.DefaultKeyValuePairs.result_cache[Config.Keys.ResultCache.backend]
+        )
+        if backend_name not in RESULT_CACHE_BACKENDS:
+            print_error(Msg.ResultCache.unknown_backend.format(backend_name))
+            self.logger.log_error(Msg.ResultCache.unknown_backend.format(backend_name))
+            exit(1)
+        self.max_rows = int(result_cache_config.get(
+            Config.Keys.ResultCache.max_rows,
+            Config.DefaultKeyValuePairs.result_cache[Config.Keys.ResultCache.max_rows]
+        ))
+        self.ttl = float(result_cache_config.get(
+            Config.Keys.ResultCache.ttl_seconds,
+            Config.DefaultKeyValuePairs.result_cache[Config.Keys.ResultCache.ttl_seconds]
+        ))
+        self.backend = RESULT_CACHE_BACKENDS[backend_name](self.max_rows)
+        self.is_enabled = self.max_rows > 0 and self.ttl > 0
+
+    def get_key(self, query: str, parameters: tuple, table_names) -> tuple:
+        """Return the key to cache the result of the query under, given the tables it reads. The key must be taken
+        before the query is executed, so that a result read while a table is written is cached under the old version
+        of the table.
+        :type query: str
+        :type parameters: tuple
+        """
+        table_names = tuple(sorted(table_names))
+        return query, tuple(parameters), table_names, self.backend.get_versions(table_names)
+
+    def get(self, key):
+        """Return the result cached under the key, or None if there is none."""
+        if not self.is_enabled:
+            return None
+        return self.backend.get(key)
+
+    def set(self, key, records: list):
+        """Cache the selected records under the key.
+        :type records: list
+        """
+        if self.is_enabled:
+            self.backend.set(key, tuple(records), len(records), self.ttl)
+
+    def invalidate(self, table_name: str):
+        """Stop returning cached results that read the table, or a table whose records are changed along with it.
+        :type table_name: str
+        """
+        self.backend.increment_versions(get_cascaded_tables(table_name))
+
+    def clear(self):
+        """Remove every cached result."""
+        self.backend.clear()
+
+
+def get_cascaded_tables(table_name: str) -> set:
+    """Return the table, along with every table whose records are changed by the DBMS when records of the table are
+    updated or deleted.
+    :type table_name: str
+    """
+    table_names = {table_name}
+    pending_table_names = [table_name]
+    while pending_table_names:
+        for cascaded_table_name in CASCADED_TABLES.get(pending_table_names.pop(), ()):
+            if cascaded_table_name not in table_names:
+                table_names.add(cascaded_table_name)
+                pending_table_names.append(cascaded_table_name)
+    return table_names
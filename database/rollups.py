@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (c) 2019 Jared Recomendable.
+Licensed under the GNU General Public License Version 3.
+This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
+"""
+
+from base.utils import *
+from base.logger import Logger
+from database.query_constructors import QueryConstructor
+
+# Range of the DATE type of MySQL, which holds every delivery date
+EARLIEST_DELIVERY_DATE = "1000-01-01"
+LATEST_DELIVERY_DATE = "9999-12-31"
+
+# The rollup tables, as the file of the query adding their rows of the delivery dates in a range (from the orders
+# delivered on them) and the field of their delivery date. Each row sums the orders of a product on a delivery date
+ROLLUPS = {
+    DBSchemaTableNames.daily_product_demand: (DBQueryFilePath.add_daily_product_demand,
+                                              DBFields.DailyProductDemand.delivery_date),
+    DBSchemaTableNames.daily_inbound_stock: (DBQueryFilePath.add_daily_inbound_stock,
+                                             DBFields.DailyInboundStock.delivery_date)
+}
+
+# The tables that the rollups are summed from, as the rollups of each table and its field that the delivery date of
+# its records is found by (the key of the customer order of customer order items)
+ROLLED_UP_TABLES = {
+    DBSchemaTableNames.customer_orders: ((DBSchemaTableNames.daily_product_demand,),
+                                         DBFields.CustomerOrders.delivery_date),
+    DBSchemaTableNames.customer_order_items: ((DBSchemaTableNames.daily_product_demand,),
+                                              DBFields.CustomerOrderItems.customer_order_id),
+    DBSchemaTableNames.company_orders: ((DBSchemaTableNames.daily_inbound_stock,),
+                                        DBFields.CompanyOrders.delivery_date)
+}
+
+logger = Logger(LoggerConfig.file_path)
+
+
+def refresh_rollup(database_connector, rollup_table_name: str, lower_limit: str, upper_limit: str) -> tuple:
+    """Replace the rows of the rollup table of the delivery dates in the range (inclusive) with those summed from the
+    orders delivered on them. Only the orders of those dates are read, so refreshing the dates of the orders just
+    written is much faster than rebuilding the whole table. This should be done in the same transaction as the writes,
+    so that the rollup never differs from the orders.
+
+    Returns a tuple to indicate status of execution, where index 0 is the status code and index 1 is the number of
+    rows added, or the error message, if any.
+    :type rollup_table_name: str
+    :type lower_limit: str
+    :type upper_limit: str
+    """
+    add_rows_query_file_path, delivery_date_field = ROLLUPS[rollup_table_name]
+    query_constructor = QueryConstructor(rollup_table_name, DBSchemaTableNames.schema).add_condition_ranged_values(
+        delivery_date_field, lower_limit, upper_limit
+    )
+    is_deleted = database_connector.execute_query(query_constructor.render_delete_query(), commit=True,
+                                                  parameters=query_constructor.get_delete_parameters(), prepared=True)
+    if is_deleted[0] == 1:
+        return is_deleted
+    schema_name = DBSchemaTableNames.schema
+    query = get_text_file_lines_as_single_line(add_rows_query_file_path).format(schema_name, schema_name, schema_name)
+    return database_connector.execute_query(query, commit=True, parameters=(lower_limit, upper_limit), prepared=True)
+
+
+def refresh_rollups(database_connector, table_name: str, delivery_dates) -> tuple:
+    """Refresh the rows of the delivery dates given in the rollups summed from the table written, one delivery date at
+    a time. Does nothing for tables that no rollup is summed from.
+
+    Returns a tuple to indicate status of execution, where index 0 is the status code and index 1 is the tuple of
+    rollup tables refreshed, or the error message, if any.
+    :type table_name: str
+    """
+    if table_name not in ROLLED_UP_TABLES or not delivery_dates:
+        return 0, ()
+    rollup_table_names = ROLLED_UP_TABLES[table_name][0]
+    for rollup_table_name in rollup_table_names:
+        for delivery_date in sorted({str(delivery_date) for delivery_date in delivery_dates}):
+            is_refreshed = refresh_rollup(database_connector, rollup_table_name, delivery_date, delivery_date)
+            if is_refreshed[0] == 1:
+                return is_refreshed
+    return 0, rollup_table_names
+
+
+def rebuild_rollups(database_connector) -> tuple:
+    """Rebuild every rollup table from all of the orders, in one transaction each, such as after orders have been
+    written without going through the web interface.
+
+    Returns a tuple to indicate status of execution, where index 0 is the status code and index 1 is the list of
+    rollup tables rebuilt, or the error message, if any.
+    """
+    rollup_table_names = []
+    for rollup_table_name in ROLLUPS:
+        with database_connector.transaction():
+            is_rebuilt = refresh_rollup(database_connector, rollup_table_name, EARLIEST_DELIVERY_DATE,
+                                        LATEST_DELIVERY_DATE)
+        if is_rebuilt[0] == 1:
+            message = Msg.Rollups.not_rebuilt.format(rollup_table_name, is_rebuilt[1])
+            print_error(message)
+            logger.log_error(message)
+            return 1, message
+        print_message(Msg.Rollups.rebuilt.format(rollup_table_name))
+        logger.log_message(Msg.Rollups.rebuilt.format(rollup_table_name))
+        rollup_table_names.append(rollup_table_name)
+    return 0, rollup_table_names
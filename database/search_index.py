@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (c) 2019 Jared Recomendable.
+Licensed under the GNU General Public License Version 3.
+This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
+"""
+
+from bisect import bisect_left, insort
+from threading import Lock
+
+# Length of the n-grams that values are indexed by. Searches for shorter text only find values beginning with it
+GRAM_LENGTH = 3
+
+
+class SearchIndex:
+    """Class to create an object that finds records by any part of the values of their searched fields, without
+    querying the database, to suggest records as their values are typed.
+
+    Each record is indexed as a document, identified by a tuple of its table name and key, with a label to show it by
+    and the values it can be found by. The values are kept in order, to find those beginning with the search text, and
+    in an inverted index of their n-grams (every part of them of `GRAM_LENGTH` characters), to find those containing
+    it without comparing it with every value. Searches ignore case.
+
+    The index is kept in the memory of this process, so every write to the records it holds must be reported with
+    `set_record` or `remove_record`.
+    """
+    def __init__(self):
+        self._documents = {}
+        self._sorted_values = []
+        self._grams = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def set_record(self, document: tuple, label: str, values):
+        """Index the record, replacing the record indexed as the same document, if any.
+        :type document: tuple
+        :type label: str
+        """
+        values = tuple(str(value) for value in values if value is not None)
+        folded_values = tuple(value.casefold() for value in values)
+        with self._lock:
+            self._remove(document)
+            self._documents[document] = (label, values, folded_values)
+            for folded_value in folded_values:
+                insort(self._sorted_values, (folded_value, document))
+            for gram in _get_grams(folded_values):
+                self._grams.setdefault(gram, set()).add(document)
+
+    def remove_record(self, document: tuple):
+        """Remove the record indexed as the document, if any.
+        :type document: tuple
+        """
+        with self._lock:
+            self._remove(document)
+
+    def _remove(self, document: tuple):
+        entry = self._documents.pop(document, None)
+        if entry is None:
+            return
+        for folded_value in entry[2]:
+            index = bisect_left(self._sorted_values, (folded_value, document))
+            del self._sorted_values[index]
+        for gram in _get_grams(entry[2]):
+            documents = self._grams[gram]
+            documents.discard(document)
+            if not documents:
+                del self._grams[gram]
+
+    def clear(self):
+        """Remove every indexed record."""
+        with self._lock:
+            self._documents.clear()
+            self._sorted_values.clear()
+            self._grams.clear()
+
+    def search(self, text: str, limit: int = 10, prefix_only: bool = False) -> list:
+        """Return a list of up to `limit` tuples of the document, label and matched value of the records with a value
+        beginning with the text, in the order of those values, followed (unless `prefix_only` is set to True) by other
+        records with a value containing it, in the order of their labels. Text shorter than `GRAM_LENGTH` is only
+        searched for at the beginning of the values.
+        :type text: str
+        :type limit: int
+        :type prefix_only: bool
+        """
+        text = text.casefold()
+        if not text or limit <= 0:
+            return []
+        results = {}
+        with self._lock:
+            # Values beginning with the text are next to each other in order
+            index = bisect_left(self._sorted_values, (text,))
+            while index < len(self._sorted_values) and len(results) < limit:
+                folded_value, document = self._sorted_values[index]
+                if not folded_value.startswith(text):
+                    break
+                if document not in results:
+                    results[document] = self._get_result(document, folded_value)
+                index += 1
+            if prefix_only or len(text) < GRAM_LENGTH or len(results) == limit:
+                return list(results.values())
+
+            # Values containing the text contain all of its n-grams, so only the documents indexed by all of them are
+            # compared with it, starting from the n-gram of the fewest documents
+            grams = sorted(_get_grams((text,)), key=lambda gram: len(self._grams.get(gram, ())))
+            candidates = self._grams.get(grams[0], set())
+            for gram in grams[1:]:
+                if not candidates:
+                    break
+                candidates = candidates & self._grams.get(gram, set())
+            containing_results = []
+            for document in candidates:
+                if document in results:
+                    continue
+                for folded_value in self._documents[document][2]:
+                    if text in folded_value:
+                        containing_results.append(self._get_result(document, folded_value))
+                        break
+                if len(results) + len(containing_results) == limit:
+                    break
+        containing_results.sort(key=lambda result: result[1])
+        return list(results.values()) + containing_results
+
+    def _get_result(self, document: tuple, folded_value: str) -> tuple:
+        """Return the result of the document, with the original value of the folded value matched."""
+        label, values, folded_values = self._documents[document]
+        return document, label, values[folded_values.index(folded_value)]
+
+
+def _get_grams(folded_values) -> set:
+    """Return the set of n-grams of the values."""
+    return {value[i:i + GRAM_LENGTH] for value in folded_values for i in range(len(value) - GRAM_LENGTH + 1)}
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (c) 2019 Jared Recomendable.
+Licensed under the GNU General Public License Version 3.
+This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
+"""
+
+import re
+
+DELIMITER_DIRECTIVE_PATTERN = re.compile(r"DELIMITER[ \t]+(\S+)[ \t]*(?:\r?\n|$)", re.IGNORECASE)
+
+
+def split_statements(script: str) -> list:
+    """Return the list of SQL statements in the script, without their delimiters and comments. Comments (`-- `, `#`
+    and `/* */`) and delimiters inside quoted strings and identifiers are left as they are. Like the MySQL client,
+    the delimiter can be changed with a `DELIMITER` line, so that statements such as triggers can contain `;`.
+    :type script: str
+    """
+    statements = []
+    current = []
+    delimiter = ";"
+    i = 0
+    length = len(script)
+    at_line_start = True
+    while i < length:
+        char = script[i]
+
+        # `DELIMITER` directive, only recognised at the beginning of a line outside of a statement
+        if at_line_start and not "".join(current).strip():
+            match = DELIMITER_DIRECTIVE_PATTERN.match(script, i)
+            if match:
+                delimiter = match.group(1)
+                i = match.end()
+                continue
+        at_line_start = char == "\n"
+
+        # Comments
+        if script.startswith("--", i) and (i + 2 == length or script[i + 2] in " \t\r\n"):
+            i = _find_line_end(script, i)
+            continue
+        elif char == "#":
+            i = _find_line_end(script, i)
+            continue
+        elif script.startswith("/*", i):
+            end = script.find("*/", i + 2)
+            i = length if end == -1 else end + 2
+            current.append(" ")
+            continue
+
+        # Quoted strings and identifiers
+        if char in "'\"`":
+            end = _find_closing_quote(script, i)
+            current.append(script[i:end])
+            i = end
+            continue
+
+        # End of a statement
+        if script.startswith(delimiter, i):
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+            i += len(delimiter)
+            continue
+
+        current.append(char)
+        i += 1
+
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def _find_line_end(script: str, start: int) -> int:
+    """Return the index of the end of the line that the index `start` is on, keeping the line break."""
+    end = script.find("\n", start)
+    return len(script) if end == -1 else end
+
+
+def _find_closing_quote(script: str, start: int) -> int:
+    """Return the index right after the quote closing the one at index `start`. Quotes escaped with a backslash (except
+    in identifiers) or by doubling them do not close it.
+    """
+    quote = script[start]
+    i = start + 1
+    while i < len(script):
+        char = script[i]
+        if char == "\\" and quote != "`":
+            i += 2
+            continue
+        if char == quote:
+            if script.startswith(quote, i + 1):
+                i += 2
+                continue
+            return i + 1
+        i += 1
+    return len(script)
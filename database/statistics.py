@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (c) 2019 Jared Recomendable.
+Licensed under the GNU General Public License Version 3.
+This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
+"""
+
+import re
+from collections import deque
+from math import ceil
+from threading import Lock
+
+STRING_LITERAL_PATTERN = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+NUMBER_LITERAL_PATTERN = re.compile(r"\b\d+(?:\.\d+)?\b")
+VALUE_LIST_PATTERN = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def get_fingerprint(statement: str) -> str:
+    """Return the normalised form of the SQL statement, where literal values and placeholders are replaced by `?` and
+    lists of values are collapsed, so that statements of the same shape share the same fingerprint.
+    :type statement: str
+    """
+    fingerprint = STRING_LITERAL_PATTERN.sub("?", statement)
+    fingerprint = NUMBER_LITERAL_PATTERN.sub("?", fingerprint)
+    fingerprint = fingerprint.replace("%s", "?")
+    fingerprint = VALUE_LIST_PATTERN.sub("(?+)", fingerprint)
+    return WHITESPACE_PATTERN.sub(" ", fingerprint).strip()
+
+
+def get_percentile(sorted_samples: list, percentile: float) -> float:
+    """Return the percentile (from 0 to 100) of the samples, which must be sorted, using the nearest-rank method.
+    :type sorted_samples: list
+    :type percentile: float
+    """
+    if not sorted_samples:
+        return 0.0
+    rank = max(ceil(percentile / 100 * len(sorted_samples)), 1)
+    return sorted_samples[rank - 1]
+
+
+class QueryStatistics:
+    """Class to create an object that aggregates the execution times and number of rows of SQL statements, grouped by
+    the fingerprint of the statement. Percentiles are computed from the most recent execution times of each
+    fingerprint.
+    """
+    def __init__(self, max_number_of_samples: int = 1000):
+        """Initialise the statistics.
+        :type max_number_of_samples: int
+        """
+        self.max_number_of_samples = max_number_of_samples
+        self._statistics = {}
+        self._lock = Lock()
+
+    def record(self, statement: str, elapsed_time: float, number_of_rows: int = 0):
+        """Add an execution of the SQL statement, which took `elapsed_time` seconds and selected or affected
+        `number_of_rows` rows, to the statistics.
+        :type statement: str
+        :type elapsed_time: float
+        :type number_of_rows: int
+        """
+        fingerprint = get_fingerprint(statement)
+        with self._lock:
+            statistics = self._statistics.get(fingerprint)
+            if statistics is None:
+                statistics = {"count": 0, "total_time": 0.0, "max_time": 0.0, "rows": 0,
+                              "samples": deque(maxlen=self.max_number_of_samples)}
+                self._statistics[fingerprint] = statistics
+            statistics["count"] += 1
+            statistics["total_time"] += elapsed_time
+            statistics["max_time"] = max(statistics["max_time"], elapsed_time)
+            statistics["rows"] += max(number_of_rows, 0)
+            statistics["samples"].append(elapsed_time)
+
+    def get_statistics(self) -> list:
+        """Return a list of dictionaries, one per fingerprint, with the number of executions, the total, mean, p50,
+        p95, p99 and maximum execution times in seconds, and the total number of rows. The fingerprints that took the
+        most time in total come first.
+        """
+        with self._lock:
+            items = [(fingerprint, dict(statistics, samples=sorted(statistics["samples"])))
+                     for fingerprint, statistics in self._statistics.items()]
+        report = []
+        for fingerprint, statistics in items:
+            samples = statistics["samples"]
+            report.append({
+                "fingerprint": fingerprint,
+                "count": statistics["count"],
+                "total_time": statistics["total_time"],
+                "mean_time": statistics["total_time"] / statistics["count"],
+                "p50_time": get_percentile(samples, 50),
+                "p95_time": get_percentile(samples, 95),
+                "p99_time": get_percentile(samples, 99),
+                "max_time": statistics["max_time"],
+                "rows": statistics["rows"]
+            })
+        report.sort(key=lambda statistics: statistics["total_time"], reverse=True)
+        return report
+
+    def reset(self):
+        """Remove all statistics recorded so far."""
+        with self._lock:
+            self._statistics.clear()
@@ -10,6 +10,12 @@ This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
 from base.utils import *
 from base.logger import Logger
 from database import connector
+from database.query_constructors import QueryConstructor
+from database.async_connector import AsyncDatabaseConnector
+from database.result_cache import ResultCache
+from database.search_index import SearchIndex
+from database.migrations import run_pending_migrations
+from database.index_advisor import QueryShapeRecorder
 
 # If configuration exists, read it. Else, make one for editing by the user.
 config = read_config(Config.file_path)
@@ -18,7 +24,9 @@ config_exists = check_if_config_exists(Config.file_path)
 if not config_exists:
     config[Config.Headers.system] = Config.DefaultKeyValuePairs.system
     config[Config.Headers.database] = Config.DefaultKeyValuePairs.database
+    config[Config.Headers.database_replicas] = Config.DefaultKeyValuePairs.database_replicas
     config[Config.Headers.web_interface] = Config.DefaultKeyValuePairs.web_interface
+    config[Config.Headers.result_cache] = Config.DefaultKeyValuePairs.result_cache
     config[Config.Headers.logger] = Config.DefaultKeyValuePairs.logger
     with open(Config.file_path, "w+", newline=Config.newline_char) as config_file:
         config.write(config_file)
@@ -32,26 +40,47 @@ logger = Logger(LoggerConfig.file_path)
 logger.trim(int(
     config[Config.Headers.logger][Config.Keys.Logger.max_number_of_lines]
 ))
+slow_query_logger = Logger(LoggerConfig.slow_query_file_path)
+slow_query_logger.trim(int(
+    config[Config.Headers.logger][Config.Keys.Logger.max_number_of_lines]
+))
 
 DBSchemaTableNames.schema = config[Config.Headers.database][Config.Keys.Database.schema]
 import webfrontend
 
 
-def add_sample_data(query_file_path, data_source_file_path, db_connector):
-    query = get_text_file_lines_as_single_line(query_file_path)
-    for line in get_text_file_lines(data_source_file_path):
-        line = line.strip()
-        line_elements = line.split(";")
-        db_connector.execute_query(
-            query.format(DBSchemaTableNames.schema, *line_elements),
-            commit=True
-        )
+def add_sample_data(query_file_path, data_source_file_path, db_connector) -> tuple:
+    """Insert the records of the sample data file with the insert query, in batches. Return the tuple of status code
+    and result of `insert_many`.
+    """
+    query = read_insert_query(query_file_path)[0]
+    rows = (line.strip().split(";") for line in get_text_file_lines(data_source_file_path))
+    return db_connector.insert_many(query, rows, skip_invalid_rows=True)
+
+
+def load_sample_data(query_file_path, data_source_file_path, db_connector) -> tuple:
+    """Stream the sample data file into the table that the insert query refers to, using the columns listed in the
+    insert query. Return the tuple of status code and result of `load_data_file`, whose status code is 2 if the
+    database server does not allow loading local files.
+    """
+    _, table_name, columns = read_insert_query(query_file_path)
+    with open(data_source_file_path, "rb") as data_source_file:
+        line_terminator = "\r\n" if data_source_file.readline().endswith(b"\r\n") else "\n"
+    is_loaded = db_connector.load_data_file(data_source_file_path,
+                                            "`{}`.`{}`".format(DBSchemaTableNames.schema, table_name),
+                                            columns, line_terminator=line_terminator)
+    return is_loaded
 
 
 def main_activity():
     # Initialise Connection to Database
-    database_connector = connector.DatabaseConnector(config[Config.Headers.database])
+    replicas_config = config[Config.Headers.database_replicas] \
+        if config.has_section(Config.Headers.database_replicas) else None
+    database_connector = connector.DatabaseConnector(config[Config.Headers.database], config[Config.Headers.logger],
+                                                     replicas_config)
     database_connector.start_connection()
+    QueryConstructor.default_related_query_style = database_connector.backend.related_query_style
+    QueryConstructor.supports_fulltext_search = database_connector.backend.supports_fulltext_search
 
     if (config[Config.Headers.system][Config.Keys.System.is_initialised] ==
             Config.DefaultKeyValuePairs.system[Config.Keys.System.is_initialised]):
@@ -61,34 +90,72 @@ def main_activity():
         database_connector.execute_queries_sequentially(schema_definition)
 
         # Addition of Sample Data (before modification during demonstration, provided the data has not been added yet)
-        add_sample_data(DBQueryFilePath.add_customer,
-                        SampleDataFilePath.customers, database_connector)
-        add_sample_data(DBQueryFilePath.add_product,
-                        SampleDataFilePath.products, database_connector)
-        add_sample_data(DBQueryFilePath.add_location,
-                        SampleDataFilePath.locations, database_connector)
-        add_sample_data(DBQueryFilePath.add_customer_location,
-                        SampleDataFilePath.customer_locations, database_connector)
-        add_sample_data(DBQueryFilePath.add_company_order,
-                        SampleDataFilePath.company_orders, database_connector)
-        add_sample_data(DBQueryFilePath.add_customer_order,
-                        SampleDataFilePath.customer_orders, database_connector)
-        add_sample_data(DBQueryFilePath.add_customer_order_item,
-                        SampleDataFilePath.customer_order_items, database_connector)
-        
+        # Files are loaded with LOAD DATA LOCAL INFILE, unless configured otherwise or not supported by the backend
+        use_load_data = config[Config.Headers.system].get(
+            Config.Keys.System.sample_data_loader,
+            Config.DefaultKeyValuePairs.system[Config.Keys.System.sample_data_loader]
+        ) == SampleDataLoaders.load_data and database_connector.backend.supports_load_data
+        # A file that fails to load is added with INSERT instead, and if that fails too, the database is left
+        # uninitialised, so that the sample data is added again the next time
+        for query_file_path, data_source_file_path in SAMPLE_DATA_SOURCES:
+            if use_load_data:
+                is_loaded = load_sample_data(query_file_path, data_source_file_path, database_connector)
+                if is_loaded[0] == 0:
+                    continue
+                elif is_loaded[0] == 2:
+                    use_load_data = False
+                    print_warning(Msg.DatabaseConnector.local_infile_rejected)
+                    logger.log_warning(Msg.DatabaseConnector.local_infile_rejected)
+                else:
+                    message = Msg.DatabaseConnector.load_data_failed.format(data_source_file_path, is_loaded[1])
+                    print_warning(message)
+                    logger.log_warning(message)
+            is_added = add_sample_data(query_file_path, data_source_file_path, database_connector)
+            if is_added[0] == 1:
+                message = Msg.DatabaseConnector.sample_data_not_added.format(data_source_file_path, is_added[1])
+                print_error(message)
+                logger.log_error(message)
+                database_connector.stop_connection()
+                exit(1)
+
         # Update Config File
         config[Config.Headers.system][Config.Keys.System.is_initialised] = "1"
         # noinspection PyShadowingNames
         with open(Config.file_path, "w+", newline=Config.newline_char) as config_file:
             config.write(config_file)
 
-    # Set-Up Database Connector in and Activate Web Interface
-    database_connector.execute_queries_sequentially(get_text_file_lines(DBQueryFilePath.startup))
+    # Apply the Migrations of the Schema that the Database does not have yet (all of them, for a new database)
+    if run_pending_migrations(database_connector)[0] == 1:
+        database_connector.stop_connection()
+        exit(1)
+
+    # Set-Up Database Connector in and Activate Web Interface (the startup commands are run on every connection)
+    database_connector.set_session_queries(get_text_file_lines(DBQueryFilePath.startup))
     webfrontend.utils.database_connector = database_connector
-    webfrontend.app.run(debug=True, host=config[Config.Headers.web_interface][Config.Keys.WebInterface.host],
+    async_database_connector = AsyncDatabaseConnector(database_connector)
+    webfrontend.utils.async_database_connector = async_database_connector
+    webfrontend.utils.result_cache = ResultCache(config[Config.Headers.result_cache]
+                                                 if config.has_section(Config.Headers.result_cache) else None)
+    # the search index is built from the records already in the database, and kept up to date as they are written
+    webfrontend.utils.search_index = SearchIndex()
+    is_built = webfrontend.utils.build_search_index()
+    if is_built[0] == 1:
+        print_warning(Msg.SearchIndex.not_built.format(is_built[1]))
+        logger.log_warning(Msg.SearchIndex.not_built.format(is_built[1]))
+    # the shapes of the queries made by requests are recorded for the index advisor, if set to in the config file
+    if config[Config.Headers.logger].get(
+            Config.Keys.Logger.record_query_shapes,
+            Config.DefaultKeyValuePairs.logger[Config.Keys.Logger.record_query_shapes]
+    ) == "1":
+        QueryConstructor.query_shape_recorder = QueryShapeRecorder()
+    # requests build their own queries, and change stock relative to the qty in the database as they write it (instead
+    # of writing back a qty read before), so they can be handled on several threads at once
+    webfrontend.app.run(debug=True, threaded=True,
+                        host=config[Config.Headers.web_interface][Config.Keys.WebInterface.host],
                         port=config[Config.Headers.web_interface][Config.Keys.WebInterface.port])
 
     # Stop Connection to Database
+    async_database_connector.shutdown()
     database_connector.stop_connection()
 
 
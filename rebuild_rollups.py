@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (c) 2019 Jared Recomendable.
+Licensed under the GNU General Public License Version 3.
+This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
+"""
+
+from base.utils import *
+from database.connector import DatabaseConnector
+from database.migrations import run_pending_migrations
+from database.rollups import rebuild_rollups
+
+
+def main_activity():
+    """Rebuild the rollup tables of the database in `config.cfg` from all of its orders. The web interface keeps them
+    up to date as it writes orders, so this is only needed after orders are written some other way.
+    """
+    if not check_if_config_exists(Config.file_path):
+        print_error(Msg.Config.not_found)
+        exit(1)
+    config = read_config(Config.file_path)
+    DBSchemaTableNames.schema = config[Config.Headers.database][Config.Keys.Database.schema]
+    database_connector = DatabaseConnector(config[Config.Headers.database], config[Config.Headers.logger])
+    database_connector.start_connection()
+    # the rollup tables are created by a migration
+    is_rebuilt = run_pending_migrations(database_connector)
+    if is_rebuilt[0] == 0:
+        is_rebuilt = rebuild_rollups(database_connector)
+    database_connector.stop_connection()
+    exit(is_rebuilt[0])
+
+
+if __name__ == "__main__":
+    main_activity()
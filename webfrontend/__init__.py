@@ -8,22 +8,29 @@ This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
 """
 
 # Import Utils from System
-from flask import Flask, request, render_template, redirect, url_for, make_response
+from flask import Flask, request, render_template, redirect, url_for, make_response, session, jsonify, abort
+from flask import Response
 from os import urandom
 from datetime import datetime
+from time import time
 
 # Import Utils and Constants from Application
 from base.constants import *
 from webfrontend.constants import *
 import webfrontend.utils
-from webfrontend.utils import flash_success, flash_info, flash_danger, QueryConstructor, prepare_for_latin1
+from webfrontend.utils import flash_success, flash_info, flash_danger, prepare_for_latin1
+from webfrontend.utils import render_streamed_template, remember_data_filter, get_remembered_data_filter
 from pdf_report import PDF
 
 # Import Database Actions
-from webfrontend.utils import get_selected_records, update_record, add_record, delete_record
-from webfrontend.utils import filter_customer_selection, filter_product_selection
-from webfrontend.utils import filter_customer_order_selection, filter_company_order_selection
-from webfrontend.utils import filter_location_selection
+from webfrontend.utils import get_selected_records, get_streamed_records, update_record, add_record, delete_record
+from webfrontend.utils import get_selected_records_async, run_concurrently, transaction, get_record_count
+from webfrontend.utils import TransactionFailed
+from webfrontend.utils import new_query_constructor, get_customers_query_constructor, get_products_query_constructor
+from webfrontend.utils import get_customer_orders_query_constructor, get_company_orders_query_constructor
+from webfrontend.utils import get_product_demand_query_constructor, get_product_inbound_stock_query_constructor
+from webfrontend.utils import get_product_deliveries, PRODUCT_REPORT_FIELDS, search_records
+from webfrontend.utils import get_index_advice_report
 
 # Import Web Interface Forms
 from webfrontend.forms.select_filters import CustomersDataFilterForm, ProductsDataFilterForm
@@ -37,25 +44,28 @@ from webfrontend.forms.data_fields import CustomerLocationsDetailsForm, Customer
 app = Flask(__name__)
 app.secret_key = urandom(16)
 
-# Create the Query Constructor Objects
-customers_query_constructor = QueryConstructor(DBSchemaTableNames.customers, DBSchemaTableNames.schema)
-locations_query_constructor = QueryConstructor(DBSchemaTableNames.locations, DBSchemaTableNames.schema)
-customer_locations_query_constructor = QueryConstructor(DBSchemaTableNames.customer_locations,
-                                                        DBSchemaTableNames.schema)
-products_query_constructor = QueryConstructor(DBSchemaTableNames.products, DBSchemaTableNames.schema)
-customer_orders_query_constructor = QueryConstructor(DBSchemaTableNames.customer_orders, DBSchemaTableNames.schema)
-customer_order_items_query_constructor = QueryConstructor(DBSchemaTableNames.customer_order_items,
-                                                          DBSchemaTableNames.schema)
-company_orders_query_constructor = QueryConstructor(DBSchemaTableNames.company_orders, DBSchemaTableNames.schema)
-
-# Assign the Query Constructor Objects as Variables in Utils for use
-webfrontend.utils.customers_query_constructor = customers_query_constructor
-webfrontend.utils.locations_query_constructor = locations_query_constructor
-webfrontend.utils.customer_locations_query_constructor = customer_locations_query_constructor
-webfrontend.utils.products_query_constructor = products_query_constructor
-webfrontend.utils.customer_orders_query_constructor = customer_orders_query_constructor
-webfrontend.utils.customer_order_items_query_constructor = customer_order_items_query_constructor
-webfrontend.utils.company_orders_query_constructor = company_orders_query_constructor
+# DATABASE CONNECTIONS
+# Lend each request a pooled database connection, and return it once the request is done. Requests made shortly after
+# the same user wrote to the database read from the primary, so that they see their own changes even if the replicas
+# have not caught up yet
+@app.before_request
+def check_out_database_connection():
+    database_connector = webfrontend.utils.database_connector
+    database_connector.checkout(read_from_primary=(
+        time() - session.get(SESSION_LAST_DATABASE_WRITE, 0) < database_connector.sticky_seconds
+    ))
+
+
+@app.after_request
+def remember_database_write(response):
+    if webfrontend.utils.database_connector.has_written():
+        session[SESSION_LAST_DATABASE_WRITE] = time()
+    return response
+
+
+@app.teardown_request
+def release_database_connection(exception):
+    webfrontend.utils.database_connector.release()
 
 
 # WEB INTERFACE ROUTING
@@ -69,44 +79,50 @@ def default_route():
 # Display Reports
 @app.route("/customers/report")
 def report_customers():
-    customers_query_constructor.add_order(DBFields.Customers.id, ascending=True)
+    form_result = get_remembered_data_filter("customers")
+    customers_query_constructor = get_customers_query_constructor(form_result)
+    # the records are read in full first, as related records are selected for each of them, and the connection
+    # cannot execute other queries while it streams records
     selection = get_selected_records(customers_query_constructor)
     if selection[0] == 0:
         pdf = PDF("Online Shop Logistics Management", "Selection of Customers", "View of Customers")
         for record in selection[1]:
-            pdf.auto_write("Customer {}".format(prepare_for_latin1(record[0])), fill=1, bold=True)
+            pdf.auto_write("Customer {}".format(prepare_for_latin1(record.id)), fill=1, bold=True)
 
             pdf.auto_write("Name:", width=20, line_break=0)
-            pdf.auto_write("{} {}".format(prepare_for_latin1(record[2]), prepare_for_latin1(record[1])))
+            pdf.auto_write("{} {}".format(prepare_for_latin1(record.first_name), prepare_for_latin1(record.last_name)))
 
             pdf.auto_write("Email:", width=20, line_break=0)
-            pdf.auto_write("{}".format(prepare_for_latin1(record[3])))
+            pdf.auto_write("{}".format(prepare_for_latin1(record.email_address)))
 
             pdf.auto_write("Phone:", width=20, line_break=0)
-            pdf.auto_write("{}".format(prepare_for_latin1(record[4])))
+            pdf.auto_write("{}".format(prepare_for_latin1(record.phone)))
 
-            customer_locations_query_constructor.reset()
-            customer_locations_query_constructor.add_condition_exact_value(DBFields.CustomerLocations.customer_id,
-                                                                           str(record[0]))
-            customer_locations_query_constructor.add_field(DBFields.CustomerLocations.location_id)
+            customer_locations_query_constructor = (
+                new_query_constructor(DBSchemaTableNames.customer_locations)
+                .add_condition_exact_value(DBFields.CustomerLocations.customer_id, str(record.id))
+                .add_field(DBFields.CustomerLocations.location_id)
+            )
             location_id_list = get_selected_records(customer_locations_query_constructor)[1]
             location_records = []
             for location_id in location_id_list:
-                locations_query_constructor.reset()
-                locations_query_constructor.add_condition_exact_value(DBFields.Locations.id, str(location_id[0]))
-                locations_query_constructor.add_field(DBFields.Locations.id)
-                locations_query_constructor.add_field(DBFields.Locations.place_no)
-                locations_query_constructor.add_field(DBFields.Locations.road_name)
-                locations_query_constructor.add_field(DBFields.Locations.city)
+                locations_query_constructor = (
+                    new_query_constructor(DBSchemaTableNames.locations)
+                    .add_condition_exact_value(DBFields.Locations.id, str(location_id.location_id))
+                    .add_field(DBFields.Locations.id)
+                    .add_field(DBFields.Locations.place_no)
+                    .add_field(DBFields.Locations.road_name)
+                    .add_field(DBFields.Locations.city)
+                )
                 location = get_selected_records(locations_query_constructor)[1][0]
                 location_records.append(location)
             sorted(location_records)
             pdf.auto_write("Locations:")
             for location in location_records:
-                pdf.auto_write("        ID [{}]:   {} {}, {}".format(prepare_for_latin1(location[0]),
-                                                                     prepare_for_latin1(location[1]),
-                                                                     prepare_for_latin1(location[2]),
-                                                                     prepare_for_latin1(location[3])))
+                pdf.auto_write("        ID [{}]:   {} {}, {}".format(prepare_for_latin1(location.id),
+                                                                     prepare_for_latin1(location.place_no),
+                                                                     prepare_for_latin1(location.road_name),
+                                                                     prepare_for_latin1(location.city)))
 
             pdf.ln()
         response = make_response(pdf.output(dest="S").encode("latin-1"))
@@ -118,22 +134,23 @@ def report_customers():
 
 @app.route("/products/report")
 def report_products():
-    products_query_constructor.add_order(DBFields.Products.gtin14, ascending=True)
-    selection = get_selected_records(products_query_constructor)
+    form_result = get_remembered_data_filter("products")
+    products_query_constructor = get_products_query_constructor(form_result, PRODUCT_REPORT_FIELDS)
+    selection = get_streamed_records(products_query_constructor)
     if selection[0] == 0:
         pdf = PDF("Online Shop Logistics Management", "Selection of Products", "View of Products")
         for record in selection[1]:
-            pdf.auto_write("Product {}".format(prepare_for_latin1(record[0])), fill=1, bold=True)
+            pdf.auto_write("Product {}".format(prepare_for_latin1(record.gtin14)), fill=1, bold=True)
 
             pdf.auto_write("Name:", width=32, line_break=0)
-            pdf.auto_write("{}".format(prepare_for_latin1(record[1])))
+            pdf.auto_write("{}".format(prepare_for_latin1(record.name)))
 
             pdf.auto_write("Qty in Stock:", width=32, line_break=0)
-            pdf.auto_write("{}".format(prepare_for_latin1(record[3])))
+            pdf.auto_write("{}".format(prepare_for_latin1(record.qty_in_stock)))
 
-            if len(record[2]):
+            if len(record.description):
                 pdf.auto_write("Description:", width=32, line_break=1)
-                pdf.write(5, "{}".format(prepare_for_latin1(record[2])))
+                pdf.write(5, "{}".format(prepare_for_latin1(record.description)))
                 pdf.ln()
 
             pdf.ln()
@@ -147,54 +164,65 @@ def report_products():
 
 @app.route("/customer-orders/report")
 def report_customer_orders():
-    customer_orders_query_constructor.add_order(DBFields.CustomerOrders.id, ascending=True)
+    form_result = get_remembered_data_filter("customer-orders")
+    customer_orders_query_constructor = get_customer_orders_query_constructor(form_result)
+    # the records are read in full first, as related records are selected for each of them, and the connection
+    # cannot execute other queries while it streams records
     selection = get_selected_records(customer_orders_query_constructor)
     if selection[0] == 0:
         pdf = PDF("Online Shop Logistics Management", "Selection of Customer Orders", "View of Customer Orders")
         for record in selection[1]:
-            pdf.auto_write("Customer Order {}".format(prepare_for_latin1(record[0])), fill=1, bold=True)
+            pdf.auto_write("Customer Order {}".format(prepare_for_latin1(record.id)), fill=1, bold=True)
 
-            customers_query_constructor.reset()
-            customers_query_constructor.add_condition_exact_value(DBFields.Customers.id, str(record[1]))
-            customers_query_constructor.add_field(DBFields.Customers.first_name)
-            customers_query_constructor.add_field(DBFields.Customers.last_name)
+            customers_query_constructor = (
+                new_query_constructor(DBSchemaTableNames.customers)
+                .add_condition_exact_value(DBFields.Customers.id, str(record.customer_id))
+                .add_field(DBFields.Customers.first_name)
+                .add_field(DBFields.Customers.last_name)
+            )
             name = get_selected_records(customers_query_constructor)[1][0]
             pdf.auto_write("Customer:", width=44, line_break=0)
-            pdf.auto_write("[{}] {} {}".format(prepare_for_latin1(record[1]), name[0], name[1]))
+            pdf.auto_write("[{}] {} {}".format(prepare_for_latin1(record.customer_id), name.first_name, name.last_name))
 
             pdf.auto_write("Date/Time Ordered", width=44, line_break=0)
-            pdf.auto_write("{}".format(prepare_for_latin1(record[2])))
+            pdf.auto_write("{}".format(prepare_for_latin1(record.datetime_ordered)))
 
             pdf.auto_write("Target Delivery Date:", width=44, line_break=0)
-            pdf.auto_write("{}".format(prepare_for_latin1(record[3])))
-
-            locations_query_constructor.reset()
-            locations_query_constructor.add_condition_exact_value(DBFields.Locations.id, str(record[4]))
-            locations_query_constructor.add_field(DBFields.Locations.place_no)
-            locations_query_constructor.add_field(DBFields.Locations.road_name)
-            locations_query_constructor.add_field(DBFields.Locations.city)
+            pdf.auto_write("{}".format(prepare_for_latin1(record.delivery_date)))
+
+            locations_query_constructor = (
+                new_query_constructor(DBSchemaTableNames.locations)
+                .add_condition_exact_value(DBFields.Locations.id, str(record.delivery_location))
+                .add_field(DBFields.Locations.place_no)
+                .add_field(DBFields.Locations.road_name)
+                .add_field(DBFields.Locations.city)
+            )
             location = get_selected_records(locations_query_constructor)[1][0]
             pdf.auto_write("Delivery Location:", width=44, line_break=0)
-            pdf.auto_write("{} {}, {}".format(prepare_for_latin1(location[0]), prepare_for_latin1(location[1]),
-                                              prepare_for_latin1(location[2])))
-
-            customer_order_items_query_constructor.reset()
-            customer_order_items_query_constructor.add_condition_exact_value(
-                DBFields.CustomerOrderItems.customer_order_id, str(record[0])
+            pdf.auto_write("{} {}, {}".format(prepare_for_latin1(location.place_no),
+                                              prepare_for_latin1(location.road_name),
+                                              prepare_for_latin1(location.city)))
+
+            customer_order_items_query_constructor = (
+                new_query_constructor(DBSchemaTableNames.customer_order_items)
+                .add_condition_exact_value(DBFields.CustomerOrderItems.customer_order_id, str(record.id))
+                .add_field(DBFields.CustomerOrderItems.product_gtin14)
+                .add_field(DBFields.CustomerOrderItems.qty_bought)
             )
-            customer_order_items_query_constructor.add_field(DBFields.CustomerOrderItems.product_gtin14)
-            customer_order_items_query_constructor.add_field(DBFields.CustomerOrderItems.qty_bought)
             customer_order_items_records = get_selected_records(customer_order_items_query_constructor)[1]
             pdf.auto_write("Products Involved:")
             for customer_order_item in customer_order_items_records:
-                products_query_constructor.reset()
-                products_query_constructor.add_condition_exact_value(DBFields.Products.gtin14,
-                                                                     str(customer_order_item[0]))
-                products_query_constructor.add_field(DBFields.Products.name)
-                product = get_selected_records(products_query_constructor)[1][0][0]
-                pdf.auto_write("        {} Orders of [{}] {}".format(prepare_for_latin1(customer_order_item[1]),
-                                                                     prepare_for_latin1(customer_order_item[0]),
-                                                                     prepare_for_latin1(product)))
+                products_query_constructor = (
+                    new_query_constructor(DBSchemaTableNames.products)
+                    .add_condition_exact_value(DBFields.Products.gtin14, str(customer_order_item.product_gtin14))
+                    .add_field(DBFields.Products.name)
+                )
+                product = get_selected_records(products_query_constructor)[1][0].name
+                pdf.auto_write("        {} Orders of [{}] {}".format(
+                    prepare_for_latin1(customer_order_item.qty_bought),
+                    prepare_for_latin1(customer_order_item.product_gtin14),
+                    prepare_for_latin1(product)
+                ))
 
             pdf.ln()
         response = make_response(pdf.output(dest="S").encode("latin-1"))
@@ -206,28 +234,34 @@ def report_customer_orders():
 
 @app.route("/company-orders/report")
 def report_company_orders():
-    company_orders_query_constructor.add_order(DBFields.CompanyOrders.id, ascending=True)
+    form_result = get_remembered_data_filter("company-orders")
+    company_orders_query_constructor = get_company_orders_query_constructor(form_result)
+    # the records are read in full first, as related records are selected for each of them, and the connection
+    # cannot execute other queries while it streams records
     selection = get_selected_records(company_orders_query_constructor)
     if selection[0] == 0:
         pdf = PDF("Online Shop Logistics Management", "Selection of Company Orders", "View of Company Orders")
         for record in selection[1]:
-            pdf.auto_write("Company Order {}".format(prepare_for_latin1(record[0])), fill=1, bold=True)
+            pdf.auto_write("Company Order {}".format(prepare_for_latin1(record.id)), fill=1, bold=True)
 
-            products_query_constructor.reset()
-            products_query_constructor.add_condition_exact_value(DBFields.Products.gtin14, str(record[1]))
-            products_query_constructor.add_field(DBFields.Products.name)
+            products_query_constructor = (
+                new_query_constructor(DBSchemaTableNames.products)
+                .add_condition_exact_value(DBFields.Products.gtin14, str(record.product_gtin14))
+                .add_field(DBFields.Products.name)
+            )
             product = get_selected_records(products_query_constructor)[1][0]
             pdf.auto_write("Product:", width=44, line_break=0)
-            pdf.auto_write("[{}] {}".format(prepare_for_latin1(record[1]), prepare_for_latin1(product[0])))
+            pdf.auto_write("[{}] {}".format(prepare_for_latin1(record.product_gtin14),
+                                            prepare_for_latin1(product.name)))
 
             pdf.auto_write("Qty Bought:", width=44, line_break=0)
-            pdf.auto_write("{}".format(prepare_for_latin1(record[3])))
+            pdf.auto_write("{}".format(prepare_for_latin1(record.qty_bought)))
 
             pdf.auto_write("Date/Time Ordered:", width=44, line_break=0)
-            pdf.auto_write("{}".format(prepare_for_latin1(record[2])))
+            pdf.auto_write("{}".format(prepare_for_latin1(record.datetime_ordered)))
 
             pdf.auto_write("Target Delivery Date:", width=44, line_break=0)
-            pdf.auto_write("{}".format(prepare_for_latin1(record[4])))
+            pdf.auto_write("{}".format(prepare_for_latin1(record.delivery_date)))
 
             pdf.ln()
         response = make_response(pdf.output(dest="S").encode("latin-1", "replace"))
@@ -237,58 +271,57 @@ def report_company_orders():
     return selection[1]
 
 
+# WEB INTERFACE ROUTING
+# Search Records
+# Pages showing the records suggested by the search, as the endpoint of the page of each table and the name of the
+# argument that the key of the record is passed as (locations have no page of their own)
+SEARCH_RESULT_PAGES = {
+    DBSchemaTableNames.customers: ("show_customer_details", "customer_id"),
+    DBSchemaTableNames.products: ("show_product_details", "product_gtin14")
+}
+
+
+@app.route("/search")
+def search():
+    # suggest records as their values are typed, answered from the search index instead of the database
+    limit = request.args.get("limit", SEARCH_RESULTS_LIMIT, type=int)
+    results = search_records(request.args.get("q", ""), limit=max(1, min(limit, SEARCH_RESULTS_MAX_LIMIT)),
+                             prefix_only=(request.args.get("match") == "prefix"))
+    for result in results:
+        page = SEARCH_RESULT_PAGES.get(result["table"])
+        result["url"] = url_for(page[0], **{page[1]: result["key"]}) if page else None
+    return jsonify(results=results)
+
+
+# WEB INTERFACE ROUTING
+# Diagnostics
+@app.route("/diagnostics/index-advice")
+def show_index_advice():
+    # the plans of the queries recorded, with the indexes suggested for them, as plain text to copy into a migration
+    report = get_index_advice_report()
+    if report is None:
+        abort(404)
+    return Response(report, mimetype="text/plain")
+
+
 # WEB INTERFACE ROUTING
 # Show Data
 @app.route("/customers/", methods=["GET", "POST"])
 def list_customers():
     form = CustomersDataFilterForm()
 
-    customers_query_constructor.reset()
-    customers_query_constructor.add_order(DBFields.Customers.id, ascending=True)
+    form_result = None
     if request.method == "POST":
-        result = request.form.to_dict(flat=False)
-        filter_customer_selection(result)
-        if filter_location_selection(result):
-            locations_query_constructor.add_field(DBFields.Locations.id)
-            customer_locations_query_constructor.reset()
-            customer_locations_query_constructor.add_nested_query(
-                DBFields.CustomerLocations.location_id,
-                locations_query_constructor.render_select_query()
-            )
-            customer_locations_query_constructor.add_field(DBFields.CustomerLocations.customer_id)
-            customers_query_constructor.add_nested_query(
-                DBFields.Customers.id,
-                customer_locations_query_constructor.render_select_query()
-            )
-        if filter_customer_order_selection(result):
-            customer_orders_query_constructor.add_field(DBFields.CustomerOrders.customer_id)
-            customers_query_constructor.add_nested_query(
-                DBFields.Customers.id,
-                customer_orders_query_constructor.render_select_query()
-            )
-        if filter_product_selection(result):
-            products_query_constructor.add_field(DBFields.Products.gtin14)
-            customer_order_items_query_constructor.reset()
-            customer_order_items_query_constructor.add_nested_query(
-                DBFields.CustomerOrderItems.product_gtin14,
-                products_query_constructor.render_select_query()
-            )
-            customer_order_items_query_constructor.add_field(DBFields.CustomerOrderItems.customer_order_id)
-            customer_orders_query_constructor.reset()
-            customer_orders_query_constructor.add_nested_query(
-                DBFields.CustomerOrders.id,
-                customer_order_items_query_constructor.render_select_query()
-            )
-            customer_orders_query_constructor.add_field(DBFields.CustomerOrders.customer_id)
-            customers_query_constructor.add_nested_query(
-                DBFields.Customers.id,
-                customer_orders_query_constructor.render_select_query()
-            )
+        form_result = request.form.to_dict(flat=False)
         flash_success(FLASH_DATA_FILTERED)
+    # remember the filter, so that the report of the page is of the same records
+    remember_data_filter("customers", form_result)
+    customers_query_constructor = get_customers_query_constructor(form_result)
 
-    selection = get_selected_records(customers_query_constructor)
+    selection = get_streamed_records(customers_query_constructor)
     if selection[0] == 0:
-        return render_template("dataTables/customers.html", selection=selection[1], form=form, link_name="customers")
+        return render_streamed_template("dataTables/customers.html", selection=selection[1], form=form,
+                                        link_name="customers")
     return selection[1]
 
 
@@ -296,70 +329,18 @@ def list_customers():
 def list_products():
     form = ProductsDataFilterForm()
 
-    products_query_constructor.reset()
-    products_query_constructor.add_order(DBFields.Products.gtin14, ascending=True)
+    form_result = None
     if request.method == "POST":
-        result = request.form.to_dict(flat=False)
-        filter_product_selection(result)
-        if filter_customer_selection(result):
-            customers_query_constructor.add_field(DBFields.Customers.id)
-            customer_orders_query_constructor.reset()
-            customer_orders_query_constructor.add_nested_query(
-                DBFields.CustomerOrders.customer_id,
-                customers_query_constructor.render_select_query()
-            )
-            customer_orders_query_constructor.add_field(DBFields.CustomerOrders.id)
-            customer_order_items_query_constructor.reset()
-            customer_order_items_query_constructor.add_nested_query(
-                DBFields.CustomerOrderItems.customer_order_id,
-                customer_orders_query_constructor.render_select_query()
-            )
-            customer_order_items_query_constructor.add_field(DBFields.CustomerOrderItems.product_gtin14)
-            products_query_constructor.add_nested_query(
-                DBFields.Products.gtin14,
-                customer_order_items_query_constructor.render_select_query()
-            )
-        if filter_location_selection(result):
-            locations_query_constructor.add_field(DBFields.Locations.id)
-            customer_orders_query_constructor.reset()
-            customer_orders_query_constructor.add_nested_query(
-                DBFields.CustomerOrders.delivery_location,
-                locations_query_constructor.render_select_query()
-            )
-            customer_orders_query_constructor.add_field(DBFields.CustomerOrders.id)
-            customer_order_items_query_constructor.reset()
-            customer_order_items_query_constructor.add_nested_query(
-                DBFields.CustomerOrderItems.customer_order_id,
-                customer_orders_query_constructor.render_select_query()
-            )
-            customer_order_items_query_constructor.add_field(DBFields.CustomerOrderItems.product_gtin14)
-            products_query_constructor.add_nested_query(
-                DBFields.Products.gtin14,
-                customer_order_items_query_constructor.render_select_query()
-            )
-        if filter_customer_order_selection(result):
-            customer_orders_query_constructor.add_field(DBFields.CustomerOrders.id)
-            customer_order_items_query_constructor.reset()
-            customer_order_items_query_constructor.add_nested_query(
-                DBFields.CustomerOrderItems.customer_order_id,
-                customer_orders_query_constructor.render_select_query()
-            )
-            customer_order_items_query_constructor.add_field(DBFields.CustomerOrderItems.product_gtin14)
-            products_query_constructor.add_nested_query(
-                DBFields.Products.gtin14,
-                customer_order_items_query_constructor.render_select_query()
-            )
-        if filter_company_order_selection(result):
-            company_orders_query_constructor.add_field(DBFields.CompanyOrders.product_gtin14)
-            products_query_constructor.add_nested_query(
-                DBFields.Products.gtin14,
-                company_orders_query_constructor.render_select_query()
-            )
+        form_result = request.form.to_dict(flat=False)
         flash_success(FLASH_DATA_FILTERED)
+    # remember the filter, so that the report of the page is of the same records
+    remember_data_filter("products", form_result)
+    products_query_constructor = get_products_query_constructor(form_result)
 
-    selection = get_selected_records(products_query_constructor)
+    selection = get_streamed_records(products_query_constructor)
     if selection[0] == 0:
-        return render_template("dataTables/products.html", selection=selection[1], form=form, link_name="products")
+        return render_streamed_template("dataTables/products.html", selection=selection[1], form=form,
+                                        link_name="products")
     return selection[1]
 
 
@@ -367,41 +348,18 @@ def list_products():
 def list_customer_orders():
     form = CustomerOrdersDataFilterForm()
 
-    customer_orders_query_constructor.reset()
-    customer_orders_query_constructor.add_order(DBFields.CustomerOrders.id, ascending=True)
+    form_result = None
     if request.method == "POST":
-        result = request.form.to_dict(flat=False)
-        filter_customer_order_selection(result)
-        if filter_customer_selection(result):
-            customers_query_constructor.add_field(DBFields.Customers.id)
-            customer_orders_query_constructor.add_nested_query(
-                DBFields.CustomerOrders.customer_id,
-                customers_query_constructor.render_select_query()
-            )
-        if filter_location_selection(result):
-            locations_query_constructor.add_field(DBFields.Locations.id)
-            customer_orders_query_constructor.add_nested_query(
-                DBFields.CustomerOrders.delivery_location,
-                locations_query_constructor.render_select_query()
-            )
-        if filter_product_selection(result):
-            products_query_constructor.add_field(DBFields.Products.gtin14)
-            customer_order_items_query_constructor.reset()
-            customer_order_items_query_constructor.add_nested_query(
-                DBFields.CustomerOrderItems.product_gtin14,
-                products_query_constructor.render_select_query()
-            )
-            customer_order_items_query_constructor.add_field(DBFields.CustomerOrderItems.customer_order_id)
-            customer_orders_query_constructor.add_nested_query(
-                DBFields.CustomerOrders.id,
-                customer_order_items_query_constructor.render_select_query()
-            )
+        form_result = request.form.to_dict(flat=False)
         flash_success(FLASH_DATA_FILTERED)
+    # remember the filter, so that the report of the page is of the same records
+    remember_data_filter("customer-orders", form_result)
+    customer_orders_query_constructor = get_customer_orders_query_constructor(form_result)
 
-    selection = get_selected_records(customer_orders_query_constructor)
+    selection = get_streamed_records(customer_orders_query_constructor)
     if selection[0] == 0:
-        return render_template("dataTables/customerOrders.html", selection=selection[1], form=form,
-                               link_name="customer-orders")
+        return render_streamed_template("dataTables/customerOrders.html", selection=selection[1], form=form,
+                                        link_name="customer-orders")
     return selection[1]
 
 
@@ -409,23 +367,18 @@ def list_customer_orders():
 def list_company_orders():
     form = CompanyOrdersDataFilterForm()
 
-    company_orders_query_constructor.reset()
-    company_orders_query_constructor.add_order(DBFields.CompanyOrders.id, ascending=True)
+    form_result = None
     if request.method == "POST":
-        result = request.form.to_dict(flat=False)
-        filter_company_order_selection(result)
-        if filter_product_selection(result):
-            products_query_constructor.add_field(DBFields.Products.gtin14)
-            company_orders_query_constructor.add_nested_query(
-                DBFields.CompanyOrders.product_gtin14,
-                products_query_constructor.render_select_query()
-            )
+        form_result = request.form.to_dict(flat=False)
         flash_success(FLASH_DATA_FILTERED)
+    # remember the filter, so that the report of the page is of the same records
+    remember_data_filter("company-orders", form_result)
+    company_orders_query_constructor = get_company_orders_query_constructor(form_result)
 
-    selection = get_selected_records(company_orders_query_constructor)
+    selection = get_streamed_records(company_orders_query_constructor)
     if selection[0] == 0:
-        return render_template("dataTables/companyOrders.html", selection=selection[1], form=form,
-                               link_name="company-orders")
+        return render_streamed_template("dataTables/companyOrders.html", selection=selection[1], form=form,
+                                        link_name="company-orders")
     return selection[1]
 
 
@@ -437,26 +390,13 @@ def show_customer_details(customer_id):
 
     if request.method == "POST":
         result = request.form.to_dict(flat=False)
-        customers_query_constructor.reset()
-        customers_query_constructor.add_condition_exact_value(
-            DBFields.Customers.id,
-            customer_id
-        )
-        customers_query_constructor.add_field_and_value(
-            DBFields.Customers.first_name,
-            result["first_name_string"][0]
-        )
-        customers_query_constructor.add_field_and_value(
-            DBFields.Customers.last_name,
-            result["last_name_string"][0]
-        )
-        customers_query_constructor.add_field_and_value(
-            DBFields.Customers.email_address,
-            result["email_address_string"][0]
-        )
-        customers_query_constructor.add_field_and_value(
-            DBFields.Customers.phone,
-            result["phone_string"][0]
+        customers_query_constructor = (
+            new_query_constructor(DBSchemaTableNames.customers)
+            .add_condition_exact_value(DBFields.Customers.id, customer_id)
+            .add_field_and_value(DBFields.Customers.first_name, result["first_name_string"][0])
+            .add_field_and_value(DBFields.Customers.last_name, result["last_name_string"][0])
+            .add_field_and_value(DBFields.Customers.email_address, result["email_address_string"][0])
+            .add_field_and_value(DBFields.Customers.phone, result["phone_string"][0])
         )
         is_updated = update_record(customers_query_constructor)
 
@@ -470,37 +410,37 @@ def show_customer_details(customer_id):
         else:
             flash_success(FLASH_RECORD_UPDATED)
 
-    customers_query_constructor.reset()
-    customers_query_constructor.add_condition_exact_value(
-        DBFields.Customers.id,
-        customer_id
+    customers_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.customers)
+        .add_condition_exact_value(DBFields.Customers.id, customer_id)
     )
-    selection = get_selected_records(customers_query_constructor)
-    details = selection[1]
+    selection = get_selected_records_async(customers_query_constructor)
 
-    customer_locations_query_constructor.reset()
-    customer_locations_query_constructor.add_condition_exact_value(
-        DBFields.CustomerLocations.customer_id,
-        customer_id
+    customer_locations_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.customer_locations)
+        .add_condition_exact_value(DBFields.CustomerLocations.customer_id, customer_id)
+        .add_field(DBFields.CustomerLocations.location_id)
     )
-    customer_locations_query_constructor.add_field(DBFields.CustomerLocations.location_id)
-    locations_query_constructor.reset()
-    locations_query_constructor.add_nested_query(
-        DBFields.Locations.id,
-        customer_locations_query_constructor.render_select_query()
+    locations_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.locations)
+        .add_nested_query(DBFields.Locations.id, customer_locations_query_constructor)
     )
-    location_selection = get_selected_records(locations_query_constructor)
+    location_selection = get_selected_records_async(locations_query_constructor)
+
+    # select the customer and their locations at the same time
+    selection, location_selection = run_concurrently(selection, location_selection)
+    details = selection[1]
 
     if selection[0] == 0 and not details:
         flash_danger(FLASH_RECORD_NOT_EXISTS)
         return redirect(url_for("list_customers"))
     elif selection[0] == 0 and location_selection[0] == 0:
         details = selection[1]
-        form.customer_id_string.data = details[0][0]
-        form.first_name_string.data = details[0][2]
-        form.last_name_string.data = details[0][1]
-        form.email_address_string.data = details[0][3]
-        form.phone_string.data = details[0][4]
+        form.customer_id_string.data = details[0].id
+        form.first_name_string.data = details[0].first_name
+        form.last_name_string.data = details[0].last_name
+        form.email_address_string.data = details[0].email_address
+        form.phone_string.data = details[0].phone
         return render_template("detailsView/customer.html", form=form, customer_id=customer_id, table_exists=True,
                                locations=location_selection[1])
     return "{}\n{}".format(selection[1], location_selection[1])
@@ -512,22 +452,12 @@ def show_product_details(product_gtin14):
 
     if request.method == "POST":
         result = request.form.to_dict(flat=False)
-        products_query_constructor.reset()
-        products_query_constructor.add_condition_exact_value(
-            DBFields.Products.gtin14,
-            product_gtin14
-        )
-        products_query_constructor.add_field_and_value(
-            DBFields.Products.name,
-            result["name_string"][0]
-        )
-        products_query_constructor.add_field_and_value(
-            DBFields.Products.description,
-            result["desc_string"][0]
-        )
-        products_query_constructor.add_field_and_value(
-            DBFields.Products.qty_in_stock,
-            result["qty_in_stock_string"][0]
+        products_query_constructor = (
+            new_query_constructor(DBSchemaTableNames.products)
+            .add_condition_exact_value(DBFields.Products.gtin14, product_gtin14)
+            .add_field_and_value(DBFields.Products.name, result["name_string"][0])
+            .add_field_and_value(DBFields.Products.description, result["desc_string"][0])
+            .add_field_and_value(DBFields.Products.qty_in_stock, result["qty_in_stock_string"][0])
         )
         is_updated = update_record(products_query_constructor)
 
@@ -541,25 +471,31 @@ def show_product_details(product_gtin14):
         else:
             flash_success(FLASH_RECORD_UPDATED)
 
-    products_query_constructor.reset()
-    products_query_constructor.add_condition_exact_value(
-        DBFields.Products.gtin14,
-        product_gtin14
+    products_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.products)
+        .add_condition_exact_value(DBFields.Products.gtin14, product_gtin14)
     )
-    selection = get_selected_records(products_query_constructor)
+    selection = get_selected_records_async(products_query_constructor)
+    demand_selection = get_selected_records_async(get_product_demand_query_constructor(product_gtin14))
+    inbound_stock_selection = get_selected_records_async(get_product_inbound_stock_query_constructor(product_gtin14))
+
+    # select the product and its deliveries at the same time
+    selection, demand_selection, inbound_stock_selection = run_concurrently(selection, demand_selection,
+                                                                            inbound_stock_selection)
     details = selection[1]
 
     if selection[0] == 0 and not details:
         flash_danger(FLASH_RECORD_NOT_EXISTS)
         return redirect(url_for("list_products"))
-    elif selection[0] == 0:
+    elif selection[0] == 0 and demand_selection[0] == 0 and inbound_stock_selection[0] == 0:
         details = selection[1]
-        form.gtin14_string.data = details[0][0]
-        form.name_string.data = details[0][1]
-        form.desc_string.data = details[0][2]
-        form.qty_in_stock_string.data = details[0][3]
-        return render_template("detailsView/product.html", form=form, product_gtin14=product_gtin14, table_exists=False)
-    return selection[1]
+        form.gtin14_string.data = details[0].gtin14
+        form.name_string.data = details[0].name
+        form.desc_string.data = details[0].description
+        form.qty_in_stock_string.data = details[0].qty_in_stock
+        return render_template("detailsView/product.html", form=form, product_gtin14=product_gtin14, table_exists=True,
+                               deliveries=get_product_deliveries(demand_selection[1], inbound_stock_selection[1]))
+    return "{}\n{}\n{}".format(selection[1], demand_selection[1], inbound_stock_selection[1])
 
 
 @app.route("/customer-orders/<customer_order_id>", methods=["GET", "POST"])
@@ -568,18 +504,14 @@ def show_customer_order_details(customer_order_id):
 
     if request.method == "POST":
         result = request.form.to_dict(flat=False)
-        customer_orders_query_constructor.reset()
-        customer_orders_query_constructor.add_condition_exact_value(
-            DBFields.CustomerOrders.id,
-            customer_order_id
-        )
-        customer_orders_query_constructor.add_field_and_value(
-            DBFields.CustomerOrders.delivery_date,
-            result["customer_order_delivery_date_string"][0]
-        )
-        customer_orders_query_constructor.add_field_and_value(
-            DBFields.CustomerOrders.delivery_location,
-            result["delivery_location_string"][0]
+        customer_orders_query_constructor = (
+            new_query_constructor(DBSchemaTableNames.customer_orders)
+            .add_condition_exact_value(DBFields.CustomerOrders.id, customer_order_id)
+            .add_field_and_value(
+                DBFields.CustomerOrders.delivery_date,
+                result["customer_order_delivery_date_string"][0]
+            )
+            .add_field_and_value(DBFields.CustomerOrders.delivery_location, result["delivery_location_string"][0])
         )
         is_updated = update_record(customer_orders_query_constructor)
 
@@ -593,31 +525,32 @@ def show_customer_order_details(customer_order_id):
         else:
             flash_success(FLASH_RECORD_UPDATED)
 
-    customer_orders_query_constructor.reset()
-    customer_orders_query_constructor.add_condition_exact_value(
-        DBFields.CustomerOrders.id,
-        customer_order_id
+    customer_orders_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.customer_orders)
+        .add_condition_exact_value(DBFields.CustomerOrders.id, customer_order_id)
     )
-    selection = get_selected_records(customer_orders_query_constructor)
-    details = selection[1]
+    selection = get_selected_records_async(customer_orders_query_constructor)
 
-    customer_order_items_query_constructor.reset()
-    customer_order_items_query_constructor.add_condition_exact_value(
-        DBFields.CustomerOrderItems.customer_order_id,
-        customer_order_id
+    customer_order_items_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.customer_order_items)
+        .add_condition_exact_value(DBFields.CustomerOrderItems.customer_order_id, customer_order_id)
     )
-    customer_order_items_selection = get_selected_records(customer_order_items_query_constructor)
+    customer_order_items_selection = get_selected_records_async(customer_order_items_query_constructor)
+
+    # select the customer order and its items at the same time
+    selection, customer_order_items_selection = run_concurrently(selection, customer_order_items_selection)
+    details = selection[1]
 
     if selection[0] == 0 and not details:
         flash_danger(FLASH_RECORD_NOT_EXISTS)
         return redirect(url_for("list_customer_orders"))
     elif selection[0] == 0 and customer_order_items_selection[0] == 0:
         details = selection[1]
-        form.customer_order_id_string.data = details[0][0]
-        form.customer_id_string.data = details[0][1]
-        form.customer_order_datetime_ordered_string.data = details[0][2]
-        form.customer_order_delivery_date_string.data = details[0][3]
-        form.delivery_location_string.data = details[0][4]
+        form.customer_order_id_string.data = details[0].id
+        form.customer_id_string.data = details[0].customer_id
+        form.customer_order_datetime_ordered_string.data = details[0].datetime_ordered
+        form.customer_order_delivery_date_string.data = details[0].delivery_date
+        form.delivery_location_string.data = details[0].delivery_location
         return render_template("detailsView/customerOrder.html", form=form, customer_order_id=customer_order_id,
                                table_exists=True, customer_order_items=customer_order_items_selection[1])
     return "{}\n{}".format(selection[1], customer_order_items_selection[1])
@@ -629,18 +562,11 @@ def show_company_order_details(company_order_id):
 
     if request.method == "POST":
         result = request.form.to_dict(flat=False)
-        company_orders_query_constructor.reset()
-        company_orders_query_constructor.add_condition_exact_value(
-            DBFields.CompanyOrders.id,
-            company_order_id
-        )
-        company_orders_query_constructor.add_field_and_value(
-            DBFields.CompanyOrders.qty_bought,
-            result["company_order_qty_bought_string"][0]
-        )
-        company_orders_query_constructor.add_field_and_value(
-            DBFields.CompanyOrders.delivery_date,
-            result["company_order_delivery_date_string"][0]
+        company_orders_query_constructor = (
+            new_query_constructor(DBSchemaTableNames.company_orders)
+            .add_condition_exact_value(DBFields.CompanyOrders.id, company_order_id)
+            .add_field_and_value(DBFields.CompanyOrders.qty_bought, result["company_order_qty_bought_string"][0])
+            .add_field_and_value(DBFields.CompanyOrders.delivery_date, result["company_order_delivery_date_string"][0])
         )
         is_updated = update_record(company_orders_query_constructor)
 
@@ -654,10 +580,9 @@ def show_company_order_details(company_order_id):
         else:
             flash_success(FLASH_RECORD_UPDATED)
 
-    company_orders_query_constructor.reset()
-    company_orders_query_constructor.add_condition_exact_value(
-        DBFields.CompanyOrders.id,
-        company_order_id
+    company_orders_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.company_orders)
+        .add_condition_exact_value(DBFields.CompanyOrders.id, company_order_id)
     )
     selection = get_selected_records(company_orders_query_constructor)
     details = selection[1]
@@ -667,11 +592,11 @@ def show_company_order_details(company_order_id):
         return redirect(url_for("list_company_orders"))
     elif selection[0] == 0:
         details = selection[1]
-        form.company_order_id_string.data = details[0][0]
-        form.company_order_product_gtin14_string.data = details[0][1]
-        form.company_order_datetime_ordered_string.data = details[0][2]
-        form.company_order_qty_bought_string.data = details[0][3]
-        form.company_order_delivery_date_string.data = details[0][4]
+        form.company_order_id_string.data = details[0].id
+        form.company_order_product_gtin14_string.data = details[0].product_gtin14
+        form.company_order_datetime_ordered_string.data = details[0].datetime_ordered
+        form.company_order_qty_bought_string.data = details[0].qty_bought
+        form.company_order_delivery_date_string.data = details[0].delivery_date
         return render_template("detailsView/companyOrder.html", form=form, company_order_id=company_order_id,
                                table_exists=False)
     return selection[1]
@@ -699,13 +624,10 @@ def add_customer():
                 flash_danger(FLASH_ERROR.format(is_added[1]))
         else:
             flash_success(FLASH_RECORD_ADDED)
-            customers_query_constructor.reset()
-            customers_query_constructor.add_condition_exact_value(
-                DBFields.Customers.email_address,
-                email_address
-            )
-            customers_query_constructor.add_field(
-                DBFields.Customers.id
+            customers_query_constructor = (
+                new_query_constructor(DBSchemaTableNames.customers)
+                .add_condition_exact_value(DBFields.Customers.email_address, email_address)
+                .add_field(DBFields.Customers.id)
             )
 
             selection = get_selected_records(customers_query_constructor)
@@ -720,8 +642,10 @@ def add_customer():
 @app.route("/customers/<customer_id>/add-location", methods=["GET", "POST"])
 def add_customer_location(customer_id):
     # check if customer exists
-    customers_query_constructor.reset()
-    customers_query_constructor.add_condition_exact_value(DBFields.Customers.id, customer_id)
+    customers_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.customers)
+        .add_condition_exact_value(DBFields.Customers.id, customer_id)
+    )
     selection = get_selected_records(customers_query_constructor)
     if selection[0] == 0 and not selection[1]:
         flash_danger(FLASH_RECORD_NOT_EXISTS)
@@ -739,59 +663,69 @@ def add_customer_location(customer_id):
         road_name = result["road_name_string"][0]
         place_no = result["place_no_string"][0]
 
-        # find out if location already exists, and set the location query constructor conditions accordingly
-        locations_query_constructor.reset()
-        locations_query_constructor.add_condition_like(DBFields.Locations.city, city)
-        locations_query_constructor.add_condition_exact_value(DBFields.Locations.road_name, road_name)
-        locations_query_constructor.add_condition_exact_value(DBFields.Locations.place_no, place_no)
-        locations_query_constructor.add_field(DBFields.Locations.id)
-        selection = get_selected_records(locations_query_constructor)
-        # stop and display errors at next screen if errors are found
-        if selection[0] == 1:
-            flash_danger(FLASH_ERROR.format(selection[1]))
-            return redirect(url_for("add_customer_location", customer_id=customer_id))
-
-        # check for any ID present, which means location exists, otherwise, must create new location
-        selection = selection[1]
-        # if no ID present, create new location
-        if not selection:
-            # insert into database the new location record
-            values = [city, road_name, place_no]
-            is_added = add_record(DBQueryFilePath.add_location, values)
-            # check for any errors in inserting the record
-            if is_added[0] == 1:
-                if "HY000" in is_added[1] and "3819" in is_added[1]:
-                    flash_danger(FLASH_INVALID_INPUT_TO_ADD)
-                elif "23000" in is_added[1] and "1452" in is_added[1]:
-                    flash_danger(FLASH_INVALID_INPUT_KEY_CONSTRAINT)
+        # find or create the location and add the customer location as a single transaction, which is rolled back if
+        # any of them fails, and reports an error if it cannot be committed
+        try:
+            with transaction():
+                # find out if location already exists, and set the location query constructor conditions accordingly
+                locations_query_constructor = (
+                    new_query_constructor(DBSchemaTableNames.locations)
+                    .add_condition_like(DBFields.Locations.city, city)
+                    .add_condition_exact_value(DBFields.Locations.road_name, road_name)
+                    .add_condition_exact_value(DBFields.Locations.place_no, place_no)
+                    .add_field(DBFields.Locations.id)
+                )
+                selection = get_selected_records(locations_query_constructor)
+                # stop and display errors at next screen if errors are found
+                if selection[0] == 1:
+                    flash_danger(FLASH_ERROR.format(selection[1]))
+                    return redirect(url_for("add_customer_location", customer_id=customer_id))
+
+                # check for any ID present, which means location exists, otherwise, must create new location
+                selection = selection[1]
+                # if no ID present, create new location
+                if not selection:
+                    # insert into database the new location record
+                    values = [city, road_name, place_no]
+                    is_added = add_record(DBQueryFilePath.add_location, values)
+                    # check for any errors in inserting the record
+                    if is_added[0] == 1:
+                        if "HY000" in is_added[1] and "3819" in is_added[1]:
+                            flash_danger(FLASH_INVALID_INPUT_TO_ADD)
+                        elif "23000" in is_added[1] and "1452" in is_added[1]:
+                            flash_danger(FLASH_INVALID_INPUT_KEY_CONSTRAINT)
+                        else:
+                            flash_danger(FLASH_ERROR.format(is_added[1]))
+                        return redirect(url_for("add_customer_location", customer_id=customer_id))
+
+                    # retrieve the ID of the newly-inserted record, using the exact same location query conditions set
+                    # earlier
+                    location_target = get_selected_records(locations_query_constructor)
+                    # check for any errors in retrieving the ID of the newly-inserted record
+                    if location_target[0] == 1:
+                        flash_danger(FLASH_ERROR.format(location_target[1]))
+                        return redirect(url_for("add_customer_location", customer_id=customer_id))
+
+                    # set the ID to that of the newly-created location
+                    location_id = location_target[1][0][0]
+                # otherwise, if ID is present, then location must be present, so use the ID of that location
                 else:
-                    flash_danger(FLASH_ERROR.format(is_added[1]))
-                return redirect(url_for("add_customer_location", customer_id=customer_id))
-
-            # retrieve the ID of the newly-inserted record, using the exact same location query conditions set earlier
-            location_target = get_selected_records(locations_query_constructor)
-            # check for any errors in retrieving the ID of the newly-inserted record
-            if location_target[0] == 1:
-                flash_danger(FLASH_ERROR.format(is_added[1]))
-                return redirect(url_for("add_customer_location", customer_id=customer_id))
-
-            # set the ID to that of the newly-created location
-            location_id = location_target[1][0][0]
-        # otherwise, if ID is present, then location must be present, so use the ID of that location
-        else:
-            location_id = selection[0][0]
-
-        # after finding existing or creating new location record, create now the customer location record
-        values = [customer_id, location_id]
-        is_added = add_record(DBQueryFilePath.add_customer_location, values)
-        # check for any errors in adding the new customer location record
-        if is_added[0] == 1:
-            if "HY000" in is_added[1] and "3819" in is_added[1]:
-                flash_danger(FLASH_INVALID_INPUT_TO_ADD)
-            elif "23000" in is_added[1] and "1452" in is_added[1]:
-                flash_danger(FLASH_INVALID_INPUT_KEY_CONSTRAINT)
-            else:
-                flash_danger(FLASH_ERROR.format(is_added[1]))
+                    location_id = selection[0][0]
+
+                # after finding existing or creating new location record, create now the customer location record
+                values = [customer_id, location_id]
+                is_added = add_record(DBQueryFilePath.add_customer_location, values)
+                # check for any errors in adding the new customer location record
+                if is_added[0] == 1:
+                    if "HY000" in is_added[1] and "3819" in is_added[1]:
+                        flash_danger(FLASH_INVALID_INPUT_TO_ADD)
+                    elif "23000" in is_added[1] and "1452" in is_added[1]:
+                        flash_danger(FLASH_INVALID_INPUT_KEY_CONSTRAINT)
+                    else:
+                        flash_danger(FLASH_ERROR.format(is_added[1]))
+                    return redirect(url_for("add_customer_location", customer_id=customer_id))
+        except TransactionFailed as err:
+            flash_danger(str(err))
             return redirect(url_for("add_customer_location", customer_id=customer_id))
 
         # if customer location record successfuly added, redirect back to the customer details, where the new location
@@ -822,12 +756,11 @@ def add_product():
                 flash_danger(FLASH_ERROR.format(is_added[1]))
         else:
             flash_success(FLASH_RECORD_ADDED)
-            products_query_constructor.reset()
-            products_query_constructor.add_condition_exact_value(
-                DBFields.Products.gtin14,
-                gtin14
+            products_query_constructor = (
+                new_query_constructor(DBSchemaTableNames.products)
+                .add_condition_exact_value(DBFields.Products.gtin14, gtin14)
+                .add_field(DBFields.Products.gtin14)
             )
-            products_query_constructor.add_field(DBFields.Products.gtin14)
 
             selection = get_selected_records(products_query_constructor)
             if selection[0] == 1:
@@ -859,17 +792,11 @@ def add_customer_order():
                 flash_danger(FLASH_ERROR.format(is_added[1]))
         else:
             flash_success(FLASH_RECORD_ADDED)
-            customer_orders_query_constructor.reset()
-            customer_orders_query_constructor.add_condition_exact_value(
-                DBFields.CustomerOrders.customer_id,
-                customer_id
-            )
-            customer_orders_query_constructor.add_condition_exact_value(
-                DBFields.CustomerOrders.datetime_ordered,
-                datetime_ordered
-            )
-            customer_orders_query_constructor.add_field(
-                DBFields.CustomerOrders.id
+            customer_orders_query_constructor = (
+                new_query_constructor(DBSchemaTableNames.customer_orders)
+                .add_condition_exact_value(DBFields.CustomerOrders.customer_id, customer_id)
+                .add_condition_exact_value(DBFields.CustomerOrders.datetime_ordered, datetime_ordered)
+                .add_field(DBFields.CustomerOrders.id)
             )
 
             selection = get_selected_records(customer_orders_query_constructor)
@@ -883,8 +810,10 @@ def add_customer_order():
 
 @app.route("/customer-orders/<customer_order_id>/add-item", methods=["GET", "POST"])
 def add_customer_order_item(customer_order_id):
-    customer_orders_query_constructor.reset()
-    customer_orders_query_constructor.add_condition_exact_value(DBFields.CustomerOrders.id, customer_order_id)
+    customer_orders_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.customer_orders)
+        .add_condition_exact_value(DBFields.CustomerOrders.id, customer_order_id)
+    )
     selection = get_selected_records(customer_orders_query_constructor)
     if selection[0] == 0 and not selection[1]:
         flash_danger(FLASH_RECORD_NOT_EXISTS)
@@ -936,17 +865,11 @@ def add_company_order():
                 flash_danger(FLASH_ERROR.format(is_added[1]))
         else:
             flash_success(FLASH_RECORD_ADDED)
-            company_orders_query_constructor.reset()
-            company_orders_query_constructor.add_condition_exact_value(
-                DBFields.CompanyOrders.product_gtin14,
-                product_gtin14
-            )
-            company_orders_query_constructor.add_condition_exact_value(
-                DBFields.CompanyOrders.datetime_ordered,
-                datetime_ordered
-            )
-            company_orders_query_constructor.add_field(
-                DBFields.CompanyOrders.id
+            company_orders_query_constructor = (
+                new_query_constructor(DBSchemaTableNames.company_orders)
+                .add_condition_exact_value(DBFields.CompanyOrders.product_gtin14, product_gtin14)
+                .add_condition_exact_value(DBFields.CompanyOrders.datetime_ordered, datetime_ordered)
+                .add_field(DBFields.CompanyOrders.id)
             )
 
             selection = get_selected_records(company_orders_query_constructor)
@@ -966,22 +889,12 @@ def update_customer_order_item(customer_order_id, product_gtin14):
 
     if request.method == "POST":
         result = request.form.to_dict(flat=False)
-        customer_order_items_query_constructor.reset()
-        customer_order_items_query_constructor.add_condition_exact_value(
-            DBFields.CustomerOrderItems.customer_order_id,
-            customer_order_id
-        )
-        customer_order_items_query_constructor.add_condition_exact_value(
-            DBFields.CustomerOrderItems.product_gtin14,
-            product_gtin14
-        )
-        customer_order_items_query_constructor.add_field_and_value(
-            DBFields.CustomerOrderItems.product_gtin14,
-            result["product_gtin14_string"][0]
-        )
-        customer_order_items_query_constructor.add_field_and_value(
-            DBFields.CustomerOrderItems.qty_bought,
-            result["qty_bought_string"][0]
+        customer_order_items_query_constructor = (
+            new_query_constructor(DBSchemaTableNames.customer_order_items)
+            .add_condition_exact_value(DBFields.CustomerOrderItems.customer_order_id, customer_order_id)
+            .add_condition_exact_value(DBFields.CustomerOrderItems.product_gtin14, product_gtin14)
+            .add_field_and_value(DBFields.CustomerOrderItems.product_gtin14, result["product_gtin14_string"][0])
+            .add_field_and_value(DBFields.CustomerOrderItems.qty_bought, result["qty_bought_string"][0])
         )
         is_updated = update_record(customer_order_items_query_constructor)
 
@@ -996,14 +909,10 @@ def update_customer_order_item(customer_order_id, product_gtin14):
             flash_success(FLASH_RECORD_UPDATED)
             return redirect(url_for("show_customer_order_details", customer_order_id=customer_order_id))
 
-    customer_order_items_query_constructor.reset()
-    customer_order_items_query_constructor.add_condition_exact_value(
-        DBFields.CustomerOrderItems.customer_order_id,
-        customer_order_id
-    )
-    customer_order_items_query_constructor.add_condition_exact_value(
-        DBFields.CustomerOrderItems.product_gtin14,
-        product_gtin14
+    customer_order_items_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.customer_order_items)
+        .add_condition_exact_value(DBFields.CustomerOrderItems.customer_order_id, customer_order_id)
+        .add_condition_exact_value(DBFields.CustomerOrderItems.product_gtin14, product_gtin14)
     )
     selection = get_selected_records(customer_order_items_query_constructor)
     details = selection[1]
@@ -1022,10 +931,9 @@ def update_customer_order_item(customer_order_id, product_gtin14):
 # Delete Records
 @app.route("/customers/<customer_id>/delete", methods=["GET", "POST"])
 def delete_customer(customer_id):
-    customers_query_constructor.reset()
-    customers_query_constructor.add_condition_exact_value(
-        DBFields.Customers.id,
-        customer_id
+    customers_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.customers)
+        .add_condition_exact_value(DBFields.Customers.id, customer_id)
     )
     selection = get_selected_records(customers_query_constructor)
     if selection[0] == 0 and not selection[1]:
@@ -1040,10 +948,9 @@ def delete_customer(customer_id):
         result = request.form.to_dict(flat=False)
         response_customer_id = result["customer_id_string"][0]
         if customer_id == response_customer_id:
-            customers_query_constructor.reset()
-            customers_query_constructor.add_condition_exact_value(
-                DBFields.Customers.id,
-                customer_id
+            customers_query_constructor = (
+                new_query_constructor(DBSchemaTableNames.customers)
+                .add_condition_exact_value(DBFields.Customers.id, customer_id)
             )
             is_deleted = delete_record(customers_query_constructor)
             if is_deleted[0] == 1:
@@ -1058,14 +965,10 @@ def delete_customer(customer_id):
 
 @app.route("/customers/<customer_id>/delete-location/<location_id>")
 def delete_customer_location(customer_id,  location_id):
-    customer_locations_query_constructor.reset()
-    customer_locations_query_constructor.add_condition_exact_value(
-        DBFields.CustomerLocations.location_id,
-        location_id
-    )
-    customer_locations_query_constructor.add_condition_exact_value(
-        DBFields.CustomerLocations.customer_id,
-        customer_id
+    customer_locations_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.customer_locations)
+        .add_condition_exact_value(DBFields.CustomerLocations.location_id, location_id)
+        .add_condition_exact_value(DBFields.CustomerLocations.customer_id, customer_id)
     )
     selection = get_selected_records(customer_locations_query_constructor)
     if selection[0] == 0 and not selection[1]:
@@ -1075,34 +978,47 @@ def delete_customer_location(customer_id,  location_id):
         flash_danger(FLASH_ERROR.format(selection[1]))
         return redirect(url_for("show_customer_details", customer_id=customer_id))
 
-    customer_locations_query_constructor.reset()
-    customer_locations_query_constructor.add_condition_exact_value(DBFields.CustomerLocations.location_id, location_id)
-    selection = get_selected_records(customer_locations_query_constructor)
+    customer_locations_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.customer_locations)
+        .add_condition_exact_value(DBFields.CustomerLocations.location_id, location_id)
+    )
+    selection = get_record_count(customer_locations_query_constructor)
     if selection[0] == 1:
         flash_danger(FLASH_ERROR.format(selection[1]))
         return redirect(url_for("show_customer_details", customer_id=customer_id))
-    count = len(selection[1])
-    customer_locations_query_constructor.add_condition_exact_value(DBFields.CustomerLocations.customer_id, customer_id)
-    is_deleted = delete_record(customer_locations_query_constructor)
-    if is_deleted[0] == 1:
-        flash_danger(FLASH_RECORD_NOT_DELETED)
+    count = selection[1]
+    # delete the customer location, and the location itself if no other customer uses it, as a single transaction,
+    # which is rolled back as a whole if either of them fails
+    try:
+        with transaction():
+            customer_locations_query_constructor = (
+                customer_locations_query_constructor
+                .add_condition_exact_value(DBFields.CustomerLocations.customer_id, customer_id)
+            )
+            is_deleted = delete_record(customer_locations_query_constructor)
+            if is_deleted[0] == 1:
+                raise TransactionFailed(FLASH_RECORD_NOT_DELETED)
+            if not count > 1:
+                locations_query_constructor = (
+                    new_query_constructor(DBSchemaTableNames.locations)
+                    .add_condition_exact_value(DBFields.Locations.id, location_id)
+                )
+                is_deleted = delete_record(locations_query_constructor)
+                if is_deleted[0] == 1:
+                    raise TransactionFailed(FLASH_ERROR.format(is_deleted[1]))
+    except TransactionFailed as err:
+        flash_danger(str(err))
     else:
+        # only once the transaction has been committed
         flash_info(FLASH_RECORD_DELETED)
-        if not count > 1:
-            locations_query_constructor.reset()
-            locations_query_constructor.add_condition_exact_value(DBFields.Locations.id, location_id)
-            is_deleted = delete_record(locations_query_constructor)
-            if is_deleted[0] == 1:
-                flash_danger(is_deleted[1])
     return redirect(url_for("show_customer_details", customer_id=customer_id))
 
 
 @app.route("/products/<product_gtin14>/delete", methods=["GET", "POST"])
 def delete_product(product_gtin14):
-    products_query_constructor.reset()
-    products_query_constructor.add_condition_exact_value(
-        DBFields.Products.gtin14,
-        product_gtin14
+    products_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.products)
+        .add_condition_exact_value(DBFields.Products.gtin14, product_gtin14)
     )
     selection = get_selected_records(products_query_constructor)
     if selection[0] == 0 and not selection[1]:
@@ -1117,10 +1033,9 @@ def delete_product(product_gtin14):
         result = request.form.to_dict(flat=False)
         response_product_id = result["gtin14_string"][0]
         if product_gtin14 == response_product_id:
-            products_query_constructor.reset()
-            products_query_constructor.add_condition_exact_value(
-                DBFields.Products.gtin14,
-                product_gtin14
+            products_query_constructor = (
+                new_query_constructor(DBSchemaTableNames.products)
+                .add_condition_exact_value(DBFields.Products.gtin14, product_gtin14)
             )
             is_deleted = delete_record(products_query_constructor)
             if is_deleted[0] == 1:
@@ -1135,10 +1050,9 @@ def delete_product(product_gtin14):
 
 @app.route("/customer-orders/<customer_order_id>/delete", methods=["GET", "POST"])
 def delete_customer_order(customer_order_id):
-    customer_orders_query_constructor.reset()
-    customer_orders_query_constructor.add_condition_exact_value(
-        DBFields.CustomerOrders.id,
-        customer_order_id
+    customer_orders_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.customer_orders)
+        .add_condition_exact_value(DBFields.CustomerOrders.id, customer_order_id)
     )
     selection = get_selected_records(customer_orders_query_constructor)
     if selection[0] == 0 and not selection[1]:
@@ -1153,10 +1067,9 @@ def delete_customer_order(customer_order_id):
         result = request.form.to_dict(flat=False)
         response_customer_order_id = result["customer_order_id_string"][0]
         if customer_order_id == response_customer_order_id:
-            customer_orders_query_constructor.reset()
-            customer_orders_query_constructor.add_condition_exact_value(
-                DBFields.CustomerOrders.id,
-                customer_order_id
+            customer_orders_query_constructor = (
+                new_query_constructor(DBSchemaTableNames.customer_orders)
+                .add_condition_exact_value(DBFields.CustomerOrders.id, customer_order_id)
             )
             is_deleted = delete_record(customer_orders_query_constructor)
             if is_deleted[0] == 1:
@@ -1172,14 +1085,10 @@ def delete_customer_order(customer_order_id):
 
 @app.route("/customer-orders/<customer_order_id>/delete-item/<product_gtin14>")
 def delete_customer_order_item(customer_order_id, product_gtin14):
-    customer_order_items_query_constructor.reset()
-    customer_order_items_query_constructor.add_condition_exact_value(
-        DBFields.CustomerOrderItems.customer_order_id,
-        customer_order_id
-    )
-    customer_order_items_query_constructor.add_condition_exact_value(
-        DBFields.CustomerOrderItems.product_gtin14,
-        product_gtin14
+    customer_order_items_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.customer_order_items)
+        .add_condition_exact_value(DBFields.CustomerOrderItems.customer_order_id, customer_order_id)
+        .add_condition_exact_value(DBFields.CustomerOrderItems.product_gtin14, product_gtin14)
     )
     is_deleted = delete_record(customer_order_items_query_constructor)
     if is_deleted[0] == 1:
@@ -1191,10 +1100,9 @@ def delete_customer_order_item(customer_order_id, product_gtin14):
 
 @app.route("/company-orders/<company_order_id>/delete", methods=["GET", "POST"])
 def delete_company_order(company_order_id):
-    company_orders_query_constructor.reset()
-    company_orders_query_constructor.add_condition_exact_value(
-        DBFields.CompanyOrders.id,
-        company_order_id
+    company_orders_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.company_orders)
+        .add_condition_exact_value(DBFields.CompanyOrders.id, company_order_id)
     )
     selection = get_selected_records(company_orders_query_constructor)
     if selection[0] == 0 and not selection[1]:
@@ -1209,10 +1117,9 @@ def delete_company_order(company_order_id):
         result = request.form.to_dict(flat=False)
         response_company_order_id = result["company_order_id_string"][0]
         if company_order_id == response_company_order_id:
-            company_orders_query_constructor.reset()
-            company_orders_query_constructor.add_condition_exact_value(
-                DBFields.CompanyOrders.id,
-                company_order_id
+            company_orders_query_constructor = (
+                new_query_constructor(DBSchemaTableNames.company_orders)
+                .add_condition_exact_value(DBFields.CompanyOrders.id, company_order_id)
             )
             is_deleted = delete_record(company_orders_query_constructor)
             if is_deleted[0] == 1:
@@ -1230,10 +1137,9 @@ def delete_company_order(company_order_id):
 @app.route("/customer-orders/<customer_order_id>/confirm", methods=["GET", "POST"])
 def confirm_customer_order(customer_order_id):
     # ensure that customer order exists
-    customer_orders_query_constructor.reset()
-    customer_orders_query_constructor.add_condition_exact_value(
-        DBFields.CustomerOrders.id,
-        customer_order_id
+    customer_orders_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.customer_orders)
+        .add_condition_exact_value(DBFields.CustomerOrders.id, customer_order_id)
     )
     selection = get_selected_records(customer_orders_query_constructor)
     # if customer order does not exist, redirect to customer order listing and show that it does not exist
@@ -1248,10 +1154,9 @@ def confirm_customer_order(customer_order_id):
     form = CustomerOrderDetailsForm()
 
     # also obtain the customer order items involved
-    customer_order_items_query_constructor.reset()
-    customer_order_items_query_constructor.add_condition_exact_value(
-        DBFields.CustomerOrderItems.customer_order_id,
-        customer_order_id
+    customer_order_items_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.customer_order_items)
+        .add_condition_exact_value(DBFields.CustomerOrderItems.customer_order_id, customer_order_id)
     )
     # show any error and stop operation immediately
     selection = get_selected_records(customer_order_items_query_constructor)
@@ -1267,70 +1172,49 @@ def confirm_customer_order(customer_order_id):
         response_customer_order_id = result["customer_order_id_string"][0]
         # if user submits expected answer
         if customer_order_id == response_customer_order_id:
-            # check that all intended order will not deplete product qty in stock to negative
-            not_exceeding_stock = True
-            qty_after_order = []
-            for item in selection[1]:
-                products_query_constructor.reset()
-                products_query_constructor.add_condition_exact_value(
-                    DBFields.Products.gtin14,
-                    item[1]
-                )
-                products_query_constructor.add_field(DBFields.Products.qty_in_stock)
-                qty_left = get_selected_records(products_query_constructor)
-                if qty_left[0] == 1:
-                    flash_danger(FLASH_ERROR.format(qty_left[1]))
-                    return redirect(url_for("confirm_customer_order", customer_order_id=customer_order_id))
-                elif qty_left[0] == 0 and qty_left[1]:
-                    qty = qty_left[1][0][0]
-                    if int(qty) < int(item[2]):
-                        not_exceeding_stock = False
-                        break
-                    qty_after_order.append(int(qty) - int(item[2]))
-
-            # if intended order will indeed not deplete product qty in stock to negative
-            if not_exceeding_stock:
-                # decrease the product qty in stock as the order will involve taking the product(s)
-                for item in selection[1]:
-                    products_query_constructor.reset()
-                    products_query_constructor.add_condition_exact_value(
-                        DBFields.Products.gtin14,
-                        item[1]
+            # update the stock, then delete the customer order items and the customer order as a single
+            # transaction, which stops and is rolled back as a whole at the first of them that fails
+            try:
+                with transaction():
+                    # decrease the product qty in stock as the order will involve taking the product(s), only if it
+                    # will not deplete it to negative, as checked by the DBMS along with the update (so that orders
+                    # confirmed at the same time cannot both take the same stock)
+                    for item in selection[1]:
+                        products_query_constructor = (
+                            new_query_constructor(DBSchemaTableNames.products)
+                            .add_condition_exact_value(DBFields.Products.gtin14, item[1])
+                            .add_condition_ranged_values(DBFields.Products.qty_in_stock, lower_limit=str(item[2]))
+                            .add_field_and_increment(DBFields.Products.qty_in_stock, str(-int(item[2])))
+                        )
+                        is_updated = update_record(products_query_constructor)
+                        if is_updated[0] == 1:
+                            raise TransactionFailed(FLASH_ERROR.format(is_updated[1]))
+                        elif is_updated[1] == 0:
+                            raise TransactionFailed(FLASH_NOT_ENOUGH_STOCK)
+
+                    # then delete the customer order items
+                    customer_order_items_query_constructor = (
+                        new_query_constructor(DBSchemaTableNames.customer_order_items)
+                        .add_condition_exact_value(DBFields.CustomerOrderItems.customer_order_id, customer_order_id)
                     )
-                    products_query_constructor.add_field_and_value(
-                        DBFields.Products.qty_in_stock,
-                        str(qty_after_order[0])
+                    is_deleted = delete_record(customer_order_items_query_constructor)
+                    if is_deleted[0] == 1:
+                        raise TransactionFailed(FLASH_ERROR.format(is_deleted[1]))
+
+                    # finally, delete customer order
+                    customer_orders_query_constructor = (
+                        new_query_constructor(DBSchemaTableNames.customer_orders)
+                        .add_condition_exact_value(DBFields.CustomerOrders.id, customer_order_id)
                     )
-                    qty_after_order.pop(0)
-                    is_updated = update_record(products_query_constructor)
-                    if is_updated[0] == 1:
-                        flash_danger(FLASH_ERROR.format(is_updated[1]))
-                        return redirect(url_for("confirm_customer_order", customer_order_id=customer_order_id))
-
-                # then delete the customer order items
-                customer_order_items_query_constructor.reset()
-                customer_order_items_query_constructor.add_condition_exact_value(
-                    DBFields.CustomerOrderItems.customer_order_id,
-                    customer_order_id
-                )
-                is_deleted = delete_record(customer_order_items_query_constructor)
-                if is_deleted[0] == 1:
-                    flash_danger(FLASH_ERROR.format(is_deleted[1]))
-
-                # finally, delete customer order
-                customer_orders_query_constructor.reset()
-                customer_orders_query_constructor.add_condition_exact_value(
-                    DBFields.CustomerOrders.id,
-                    customer_order_id
-                )
-                is_deleted = delete_record(customer_orders_query_constructor)
-                if is_deleted[0] == 0:
-                    flash_success(FLASH_ORDER_FULFILLED)
-                    return redirect(url_for("list_customer_orders"))
-                else:
-                    flash_danger(FLASH_ERROR.format(is_deleted[1]))
+                    is_deleted = delete_record(customer_orders_query_constructor)
+                    if is_deleted[0] == 1:
+                        raise TransactionFailed(FLASH_ERROR.format(is_deleted[1]))
+            except TransactionFailed as err:
+                flash_danger(str(err))
             else:
-                flash_danger(FLASH_NOT_ENOUGH_STOCK)
+                # only once the transaction has been committed
+                flash_success(FLASH_ORDER_FULFILLED)
+                return redirect(url_for("list_customer_orders"))
         # otherwise, show user that he/she did not submit correct answer
         else:
             flash_danger(FLASH_RECORD_ID_NO_MATCH)
@@ -1342,10 +1226,9 @@ def confirm_customer_order(customer_order_id):
 @app.route("/company-orders/<company_order_id>/confirm", methods=["GET", "POST"])
 def confirm_company_order(company_order_id):
     # ensure that company order exists
-    company_orders_query_constructor.reset()
-    company_orders_query_constructor.add_condition_exact_value(
-        DBFields.CompanyOrders.id,
-        company_order_id
+    company_orders_query_constructor = (
+        new_query_constructor(DBSchemaTableNames.company_orders)
+        .add_condition_exact_value(DBFields.CompanyOrders.id, company_order_id)
     )
     selection = get_selected_records(company_orders_query_constructor)
     # if company order does not exist, redirect to company order listing and show that it does not exist
@@ -1370,39 +1253,35 @@ def confirm_company_order(company_order_id):
         response_company_order_id = result["company_order_id_string"][0]
         # if user submits expected answer
         if company_order_id == response_company_order_id:
-            # get current qty in stock of product
-            products_query_constructor.reset()
-            products_query_constructor.add_condition_exact_value(
-                DBFields.Products.gtin14,
-                product_gtin14
-            )
-            products_query_constructor.add_field(DBFields.Products.qty_in_stock)
-            selection = get_selected_records(products_query_constructor)
-            if selection[0] == 1:
-                flash_danger(FLASH_ERROR.format(selection[1]))
-                return redirect(url_for("confirm_company_order", company_order_id=company_order_id))
-
-            # then attempt to increase the qty in stock as the company order will add product stockpile
-            current_qty = int(selection[1][0][0])
-            new_qty = current_qty + qty_ordered
-            products_query_constructor.add_value(str(new_qty))
-            is_updated = update_record(products_query_constructor)
-            if is_updated[0] == 1:
-                flash_danger(FLASH_ERROR.format(selection[1]))
-                return redirect(url_for("confirm_company_order", company_order_id=company_order_id))
+            # update the stock and delete the company order as a single transaction, which stops and is rolled back
+            # as a whole at the first of them that fails
+            try:
+                with transaction():
+                    # increase the qty in stock as the company order will add product stockpile, adding to the qty
+                    # in the database as the update is made (so that orders confirmed at the same time both add theirs)
+                    products_query_constructor = (
+                        new_query_constructor(DBSchemaTableNames.products)
+                        .add_condition_exact_value(DBFields.Products.gtin14, product_gtin14)
+                        .add_field_and_increment(DBFields.Products.qty_in_stock, str(qty_ordered))
+                    )
+                    is_updated = update_record(products_query_constructor)
+                    if is_updated[0] == 1:
+                        raise TransactionFailed(FLASH_ERROR.format(is_updated[1]))
 
-            # finally, delete company order to finish the operation
-            company_orders_query_constructor.reset()
-            company_orders_query_constructor.add_condition_exact_value(
-                DBFields.CompanyOrders.id,
-                company_order_id
-            )
-            is_deleted = delete_record(company_orders_query_constructor)
-            if is_deleted[0] == 0:
+                    # finally, delete company order to finish the operation
+                    company_orders_query_constructor = (
+                        new_query_constructor(DBSchemaTableNames.company_orders)
+                        .add_condition_exact_value(DBFields.CompanyOrders.id, company_order_id)
+                    )
+                    is_deleted = delete_record(company_orders_query_constructor)
+                    if is_deleted[0] == 1:
+                        raise TransactionFailed(FLASH_ERROR.format(is_deleted[1]))
+            except TransactionFailed as err:
+                flash_danger(str(err))
+            else:
+                # only once the transaction has been committed
                 flash_success(FLASH_ORDER_FULFILLED)
                 return redirect(url_for("list_company_orders"))
-            else:
-                flash_danger(FLASH_ERROR.format(is_deleted[1]))
         # otherwise, show user that he/she did not submit correct answer
         else:
             flash_danger(FLASH_RECORD_ID_NO_MATCH)
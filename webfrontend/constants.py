@@ -7,6 +7,28 @@ Licensed under the GNU General Public License Version 3.
 This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
 """
 
+SESSION_LAST_DATABASE_WRITE = "last_database_write"
+# Result of the data filter form last used on each list page, given the name of its link
+SESSION_DATA_FILTER = "data_filter_{}"
+
+FILTER_EXACT_VALUE = "exact_value"
+FILTER_LIKE = "like"
+FILTER_RANGED_VALUES = "ranged_values"
+FILTER_LOCATION = "location"
+FILTER_FULLTEXT = "fulltext"
+# Suffixes of the names of the form fields read by each type of filter
+FILTER_FORM_FIELD_SUFFIXES = {
+    FILTER_EXACT_VALUE: ("_string",),
+    FILTER_LIKE: ("_string", "_at_beginning", "_at_end"),
+    FILTER_RANGED_VALUES: ("_lower_limit_string", "_upper_limit_string"),
+    FILTER_LOCATION: ("_place_no", "_road_name", "_city"),
+    FILTER_FULLTEXT: ("_string",)
+}
+
+# Number of records suggested by the search endpoint, unless asked for otherwise, and the most it suggests
+SEARCH_RESULTS_LIMIT = 10
+SEARCH_RESULTS_MAX_LIMIT = 50
+
 FLASH_ERROR = "Error: {}"
 FLASH_DATA_FILTERED = "Data filtered."
 FLASH_RECORD_NOT_EXISTS = "Record does not exist."
@@ -85,6 +85,10 @@ class ProductsDataBasicForm(Form):
     desc_string = StringField("Product Description")
     desc_at_beginning, desc_at_end = gen_beg_end_bool_fields()
 
+    # Full-Text Search of Name and Description
+    product_search_selection = gen_selection("Full-Text Search of Name and Description")
+    product_search_string = StringField("Words in Product Name or Description")
+
     # Qty in Stock
     qty_in_stock_selection = gen_selection("Qty in Stock", ranged=True)
     qty_in_stock_lower_limit_string, qty_in_stock_upper_limit_string = gen_ranged_fields("Qty in Stock")
@@ -7,19 +7,24 @@ Licensed under the GNU General Public License Version 3.
 This program DOES NOT COME WITH ANY WARRANTY, EXPRESS OR IMPLIED.
 """
 
-from flask import flash
+import asyncio
+from contextlib import contextmanager, nullcontext
+from threading import local
+from flask import flash, get_flashed_messages, current_app, session, Response, stream_with_context
 from database.query_constructors import QueryConstructor
+from database.rollups import ROLLED_UP_TABLES, refresh_rollups
+from database.index_advisor import get_index_advice, format_index_advice
 from base.constants import *
-from base.utils import get_text_file_lines_as_single_line, remove_unsafe_chars
+from webfrontend.constants import *
+from base.utils import read_insert_query
 
 database_connector = None
-customers_query_constructor = None
-locations_query_constructor = None
-customer_locations_query_constructor = None
-products_query_constructor = None
-customer_orders_query_constructor = None
-customer_order_items_query_constructor = None
-company_orders_query_constructor = None
+async_database_connector = None
+result_cache = None
+search_index = None
+
+# Tables written by the transaction of each thread, whose cached results are invalidated once it ends
+_transaction_writes = local()
 
 
 # Flash Messages
@@ -45,21 +50,122 @@ def flash_danger(message: str):
 
 
 # Manipulate Database
+def new_query_constructor(table_name: str) -> QueryConstructor:
+    """Return a new query constructor for the table in the schema of the web interface. Query constructors are
+    immutable, so each request builds its queries from new ones, without sharing any state with other requests.
+    :type table_name: str
+    """
+    return QueryConstructor(table_name, DBSchemaTableNames.schema)
+
+
 def get_selected_records(query_constructor: QueryConstructor) -> list:
-    """Return selected records.
+    """Return selected records, whose values can be read by field name or by position. The records are taken from the
+    result cache if the same query has been made since the tables it reads were last written.
     :type query_constructor: QueryConstructor
     """
     query = query_constructor.render_select_query()
-    selection = database_connector.execute_query(query, select=True)
+    parameters = query_constructor.get_select_parameters()
+    key = _get_result_cache_key(query, parameters, query_constructor)
+    cached_records = _get_cached_records(key)
+    if cached_records is not None:
+        return 0, cached_records
+    selection = database_connector.execute_query(query, select=True, parameters=parameters, prepared=True,
+                                                 result_format=ResultFormats.records)
+    _cache_records(key, selection, database_connector.reads_from_primary())
     return selection
 
 
+def get_record_count(query_constructor: QueryConstructor) -> tuple:
+    """Return the number of records that meet the conditions of the query constructor, counted by the DBMS instead of
+    selecting them. Like selected records, the count is taken from the result cache if possible.
+    :type query_constructor: QueryConstructor
+    """
+    query = query_constructor.render_count_query()
+    parameters = query_constructor.get_select_parameters()
+    key = _get_result_cache_key(query, parameters, query_constructor)
+    selection = _get_cached_records(key)
+    if selection is None:
+        selection = database_connector.execute_query(query, select=True, parameters=parameters, prepared=True)
+        _cache_records(key, selection, database_connector.reads_from_primary())
+        if selection[0] != 0:
+            return selection
+        selection = selection[1]
+    return 0, selection[0][0]
+
+
+def get_selected_records_async(query_constructor: QueryConstructor):
+    """Return an awaitable of the selected records, so that they can be selected together with other independent
+    records using `run_concurrently`. The query is rendered straight away, so the query constructor can be reused
+    before the records are awaited.
+    :type query_constructor: QueryConstructor
+    """
+    query = query_constructor.render_select_query()
+    parameters = query_constructor.get_select_parameters()
+    return _select_records_async(query, parameters, _get_result_cache_key(query, parameters, query_constructor),
+                                 database_connector.reads_from_primary())
+
+
+async def _select_records_async(query: str, parameters: tuple, key, primary: bool) -> tuple:
+    cached_records = _get_cached_records(key)
+    if cached_records is not None:
+        return 0, cached_records
+    selection = await async_database_connector.execute_query(query, select=True, parameters=parameters,
+                                                             prepared=True, result_format=ResultFormats.records,
+                                                             primary=primary)
+    _cache_records(key, selection, primary)
+    return selection
+
+
+def run_concurrently(*awaitables) -> list:
+    """Wait for all of the awaitables (e.g. from `get_selected_records_async`) to finish at the same time, and return
+    their results in the same order.
+    """
+    async def gather():
+        return await asyncio.gather(*awaitables)
+    return asyncio.run(gather())
+
+
+def get_streamed_records(query_constructor: QueryConstructor) -> tuple:
+    """Return selected records as a generator, which reads them from the database in batches as it is iterated over.
+    :type query_constructor: QueryConstructor
+    """
+    query = query_constructor.render_select_query()
+    parameters = query_constructor.get_select_parameters()
+    key = _get_result_cache_key(query, parameters, query_constructor)
+    cached_records = _get_cached_records(key)
+    if cached_records is not None:
+        return 0, cached_records
+    selection = database_connector.iter_query(query, parameters=parameters, result_format=ResultFormats.records)
+    # like `_cache_records`, records streamed from a replica are not cached
+    if key is None or not database_connector.reads_from_primary() or selection[0] != 0:
+        return selection
+    return 0, _cache_streamed_records(key, selection[1])
+
+
 def update_record(query_constructor: QueryConstructor):
     """Update record(s) that the query_constructor will select, given condition(s) set to it.
     :type query_constructor: QueryConstructor
     """
     query = query_constructor.render_update_query()
-    return database_connector.execute_query(query, commit=True)
+    searched_keys = None
+    if set(query_constructor.fields) & set(_get_search_index_fields(query_constructor.table_name)):
+        searched_keys = _select_searched_keys(query_constructor)
+    with _rolled_up_write(query_constructor.table_name):
+        delivery_dates = _select_rolled_up_delivery_dates(query_constructor)
+        result = delivery_dates if delivery_dates[0] == 1 else database_connector.execute_query(
+            query, commit=True, parameters=query_constructor.get_update_parameters(), prepared=True
+        )
+        # records moved to another delivery date are summed in the rows of both delivery dates
+        result = _refresh_rollups(query_constructor.table_name, result, delivery_dates, _select_written_delivery_dates(
+            query_constructor.table_name, query_constructor.fields, query_constructor.values
+        ))
+    _invalidate_cached_results(query_constructor.table_name)
+    if searched_keys is not None and result[0] == 0:
+        key_field = SEARCHED_TABLES[query_constructor.table_name][0]
+        if key_field in query_constructor.fields:
+            searched_keys.append(query_constructor.values[query_constructor.fields.index(key_field)])
+        _update_search_index(query_constructor.table_name, searched_keys)
+    return result
 
 
 def add_record(insert_query_filepath: str, values: list):
@@ -67,11 +173,18 @@ def add_record(insert_query_filepath: str, values: list):
     :type insert_query_filepath: str
     :type values: list
     """
-    query = get_text_file_lines_as_single_line(insert_query_filepath)
-    values_processed = []
-    for value in values:
-        values_processed.append(remove_unsafe_chars(str(value)))
-    return database_connector.execute_query(query.format(DBSchemaTableNames.schema, *values_processed), commit=True)
+    query, table_name, columns = read_insert_query(insert_query_filepath)
+    with _rolled_up_write(table_name):
+        result = database_connector.execute_query(query, commit=True, parameters=tuple(values), prepared=True)
+        result = _refresh_rollups(table_name, result, _select_written_delivery_dates(table_name, columns, values))
+    _invalidate_cached_results(table_name)
+    if table_name in SEARCHED_TABLES and result[0] == 0:
+        # The record added is found by all of its values, as its key may have been generated by the DBMS
+        query_constructor = new_query_constructor(table_name)
+        for column, value in zip(columns, values):
+            query_constructor = query_constructor.add_condition_exact_value(column, value)
+        _update_search_index(table_name, _select_searched_keys(query_constructor))
+    return result
 
 
 def delete_record(query_constructor: QueryConstructor):
@@ -79,198 +192,677 @@ def delete_record(query_constructor: QueryConstructor):
     :type query_constructor: QueryConstructor
     """
     query = query_constructor.render_delete_query()
-    return database_connector.execute_query(query, commit=True)
+    searched_keys = None
+    if query_constructor.table_name in SEARCHED_TABLES:
+        searched_keys = _select_searched_keys(query_constructor)
+    with _rolled_up_write(query_constructor.table_name):
+        delivery_dates = _select_rolled_up_delivery_dates(query_constructor)
+        result = delivery_dates if delivery_dates[0] == 1 else database_connector.execute_query(
+            query, commit=True, parameters=query_constructor.get_delete_parameters(), prepared=True
+        )
+        result = _refresh_rollups(query_constructor.table_name, result, delivery_dates)
+    _invalidate_cached_results(query_constructor.table_name)
+    if searched_keys is not None and result[0] == 0:
+        _update_search_index(query_constructor.table_name, searched_keys)
+    return result
+
+
+class TransactionFailed(Exception):
+    """Raised in the `with` block of `transaction` to roll back the whole transaction, including the transactions it
+    is nested in, such as when one of its database actions fails (as a failed action nested in a transaction of its
+    own, like writes to tables that rollups are summed from, only rolls back that transaction). Also raised by
+    `transaction` if the transaction could not be committed. The message is the one to flash to the user.
+    """
+    pass
+
+
+@contextmanager
+def transaction():
+    """Return a context manager that groups the database actions in its `with` block into a single transaction,
+    committed once at the end of the block and rolled back if any of the actions fails, or if the block raises an
+    exception (such as `TransactionFailed`).
+    """
+    is_outermost_transaction = not database_connector.is_in_transaction()
+    if is_outermost_transaction:
+        _transaction_writes.table_names = set()
+        _transaction_writes.searched_keys = set()
+    try:
+        with database_connector.transaction():
+            yield
+    except database_connector.errors as err:
+        raise TransactionFailed(FLASH_ERROR.format(err)) from err
+    finally:
+        if is_outermost_transaction:
+            table_names = _transaction_writes.table_names
+            searched_keys = _transaction_writes.searched_keys
+            _transaction_writes.table_names = None
+            _transaction_writes.searched_keys = None
+            for table_name in table_names:
+                _invalidate_cached_results(table_name)
+            for table_name, key in searched_keys:
+                _refresh_search_index(table_name, key)
+
+
+# Cache Selected Records
+def _get_result_cache_key(query: str, parameters: tuple, query_constructor: QueryConstructor):
+    """Return the key to cache the selected records under, or None if they must not be cached, such as when they are
+    selected inside a transaction (which could still be rolled back).
+    """
+    if result_cache is None or not result_cache.is_enabled or database_connector.is_in_transaction():
+        return None
+    return result_cache.get_key(query, parameters, query_constructor.get_table_names())
+
+
+def _get_cached_records(key):
+    """Return a new list of the records cached under the key, or None if there are none."""
+    if key is None:
+        return None
+    cached_records = result_cache.get(key)
+    return None if cached_records is None else list(cached_records)
+
+
+def _cache_records(key, selection: tuple, primary: bool):
+    """Cache the selected records under the key, if they have been selected successfully from the primary (`primary`
+    being whether they were). Records selected from a replica are not cached, as the replica may not have caught up
+    with the writes made before the key was made, so they could be served under it long after the replica has, and
+    to users who must see their own writes (see `DatabaseConnector.reads_from_primary`).
+    :type selection: tuple
+    :type primary: bool
+    """
+    if key is not None and primary and selection[0] == 0:
+        result_cache.set(key, selection[1])
+
+
+def _cache_streamed_records(key, records):
+    """Yield the streamed records, caching them once they have all been read, unless there are more than the result
+    cache can hold.
+    """
+    cached_records = []
+    for record in records:
+        if cached_records is not None:
+            cached_records.append(record)
+            if len(cached_records) > result_cache.max_rows:
+                cached_records = None
+        yield record
+    if cached_records is not None:
+        result_cache.set(key, cached_records)
+
+
+def _invalidate_cached_results(table_name: str):
+    """Stop returning cached records read from the table written. Inside a transaction, this is done once the
+    transaction ends instead, as other threads read the old records until then.
+    :type table_name: str
+    """
+    if result_cache is None:
+        return
+    table_names_written_in_transaction = getattr(_transaction_writes, "table_names", None)
+    if database_connector.is_in_transaction() and table_names_written_in_transaction is not None:
+        table_names_written_in_transaction.add(table_name)
+    else:
+        result_cache.invalidate(table_name)
+
+
+# Keep Rollups Up to Date
+def _rolled_up_write(table_name: str):
+    """Return a context manager grouping a write to the table into one transaction with the refresh of the rollups
+    summed from it, if any, so that the rollups are rolled back along with the write if the refresh fails.
+    :type table_name: str
+    """
+    return transaction() if table_name in ROLLED_UP_TABLES else nullcontext()
+
+
+def _select_rolled_up_delivery_dates(query_constructor: QueryConstructor) -> tuple:
+    """Return a tuple to indicate status of execution, where index 0 is the status code and index 1 is the set of
+    delivery dates of the records that meet the conditions of the query constructor (on a table that rollups are
+    summed from), read from the primary, or the error message, if any. The set is empty for other tables.
+    :type query_constructor: QueryConstructor
+    """
+    if query_constructor.table_name not in ROLLED_UP_TABLES:
+        return 0, set()
+    query_constructor = query_constructor.with_fields((ROLLED_UP_TABLES[query_constructor.table_name][1],))
+    if query_constructor.table_name == DBSchemaTableNames.customer_order_items:
+        # customer order items are delivered on the delivery date of their customer order
+        query_constructor = new_query_constructor(DBSchemaTableNames.customer_orders).add_field(
+            DBFields.CustomerOrders.delivery_date
+        ).add_nested_query(DBFields.CustomerOrders.id, query_constructor)
+    selection = database_connector.execute_query(query_constructor.render_select_query(), select=True,
+                                                 parameters=query_constructor.get_select_parameters(), prepared=True,
+                                                 primary=True)
+    if selection[0] == 1:
+        return selection
+    return 0, {record[0] for record in selection[1]}
+
+
+def _select_written_delivery_dates(table_name: str, fields, values) -> tuple:
+    """Return the result of `_select_rolled_up_delivery_dates` for the delivery date that the fields written to the
+    table set their records to, if any, once they have been written.
+    :type table_name: str
+    """
+    if table_name not in ROLLED_UP_TABLES or ROLLED_UP_TABLES[table_name][1] not in fields:
+        return 0, set()
+    delivery_date_field = ROLLED_UP_TABLES[table_name][1]
+    return _select_rolled_up_delivery_dates(new_query_constructor(table_name).add_condition_exact_value(
+        delivery_date_field, values[list(fields).index(delivery_date_field)]
+    ))
+
+
+def _refresh_rollups(table_name: str, result: tuple, *delivery_date_selections) -> tuple:
+    """Refresh the rows of the delivery dates selected in the rollups summed from the table, after the write with the
+    result given, returning that result, or the result of the selection or refresh that failed, if any (which rolls
+    back the transaction of the write).
+    :type table_name: str
+    :type result: tuple
+    """
+    if result[0] == 1:
+        return result
+    delivery_dates = set()
+    for delivery_date_selection in delivery_date_selections:
+        if delivery_date_selection[0] == 1:
+            return delivery_date_selection
+        delivery_dates.update(delivery_date_selection[1])
+    is_refreshed = refresh_rollups(database_connector, table_name, delivery_dates)
+    if is_refreshed[0] == 1:
+        return is_refreshed
+    for rollup_table_name in is_refreshed[1]:
+        _invalidate_cached_results(rollup_table_name)
+    return result
+
+
+# Search Records
+# The records suggested by the search endpoint, as the key field of each table searched, the fields that its records
+# are found by, and the fields that they are labelled by
+SEARCHED_TABLES = {
+    DBSchemaTableNames.customers: (
+        DBFields.Customers.id,
+        (DBFields.Customers.first_name, DBFields.Customers.last_name, DBFields.Customers.email_address),
+        (DBFields.Customers.first_name, DBFields.Customers.last_name)
+    ),
+    DBSchemaTableNames.products: (
+        DBFields.Products.gtin14,
+        (DBFields.Products.name, DBFields.Products.gtin14),
+        (DBFields.Products.name,)
+    ),
+    DBSchemaTableNames.locations: (
+        DBFields.Locations.id,
+        (DBFields.Locations.city, DBFields.Locations.road_name),
+        (DBFields.Locations.place_no, DBFields.Locations.road_name, DBFields.Locations.city)
+    )
+}
+
+
+def build_search_index() -> tuple:
+    """Index the records of every table searched in the search index, replacing the records it held.
+
+    Returns a tuple to indicate status of execution, where index 0 is the status code and index 1 is the number of
+    records indexed or the error message, if any.
+    """
+    search_index.clear()
+    for table_name in SEARCHED_TABLES:
+        query_constructor = new_query_constructor(table_name).add_fields(_get_search_index_fields(table_name))
+        selection = database_connector.iter_query(query_constructor.render_select_query(),
+                                                  result_format=ResultFormats.records, primary=True)
+        if selection[0] == 1:
+            search_index.clear()
+            return selection
+        for record in selection[1]:
+            _set_search_index_record(table_name, record)
+    return 0, len(search_index)
+
+
+def search_records(text: str, limit: int = SEARCH_RESULTS_LIMIT, prefix_only: bool = False) -> list:
+    """Return a list of the records suggested for the search text, as dictionaries of the table and key of each
+    record, its label and its value found. Records with a value beginning with the text come first, followed (unless
+    `prefix_only` is set to True) by those with a value containing it.
+    :type text: str
+    :type limit: int
+    :type prefix_only: bool
+    """
+    if search_index is None:
+        return []
+    return [{"table": table_name, "key": key, "label": label, "value": value}
+            for (table_name, key), label, value in search_index.search(text, limit, prefix_only)]
+
+
+def get_index_advice_report() -> str:
+    """Return the report of the index advisor on the shapes of queries recorded since the web interface started, or
+    None if they are not recorded (see `record_query_shapes` in the config file). Every shape is explained by the
+    primary database, so this takes a while when many have been recorded.
+    """
+    if QueryConstructor.query_shape_recorder is None:
+        return None
+    return format_index_advice(get_index_advice(database_connector,
+                                                QueryConstructor.query_shape_recorder.get_shapes()))
+
+
+def _get_search_index_fields(table_name: str) -> tuple:
+    """Return the fields of the records of the table that the search index reads, or an empty tuple if the table is
+    not searched.
+    :type table_name: str
+    """
+    if table_name not in SEARCHED_TABLES:
+        return ()
+    key_field, searched_fields, label_fields = SEARCHED_TABLES[table_name]
+    return tuple(dict.fromkeys((key_field,) + searched_fields + label_fields))
+
+
+def _set_search_index_record(table_name: str, record):
+    """Index the record of the table, selected with the fields of `_get_search_index_fields`.
+    :type table_name: str
+    """
+    key_field, searched_fields, label_fields = SEARCHED_TABLES[table_name]
+    search_index.set_record((table_name, getattr(record, key_field)),
+                            " ".join(str(getattr(record, field)) for field in label_fields),
+                            [getattr(record, field) for field in searched_fields])
+
+
+def _select_searched_keys(query_constructor: QueryConstructor) -> list:
+    """Return the list of keys of the records of a table searched that meet the conditions of the query constructor,
+    read from the primary, or an empty list if there is no search index or the keys could not be selected.
+    :type query_constructor: QueryConstructor
+    """
+    if search_index is None:
+        return []
+    key_field = SEARCHED_TABLES[query_constructor.table_name][0]
+    query_constructor = query_constructor.with_fields((key_field,))
+    selection = database_connector.execute_query(query_constructor.render_select_query(), select=True,
+                                                 parameters=query_constructor.get_select_parameters(), prepared=True,
+                                                 primary=True)
+    if selection[0] == 1:
+        return []
+    return [record[0] for record in selection[1]]
+
+
+def _update_search_index(table_name: str, keys):
+    """Bring the records of the table with the keys given up to date in the search index, after they have been
+    written. Inside a transaction, this is done once the transaction ends instead, as the records may still be rolled
+    back until then.
+    :type table_name: str
+    """
+    searched_keys_written_in_transaction = getattr(_transaction_writes, "searched_keys", None)
+    if database_connector.is_in_transaction() and searched_keys_written_in_transaction is not None:
+        searched_keys_written_in_transaction.update((table_name, key) for key in keys)
+    else:
+        for key in keys:
+            _refresh_search_index(table_name, key)
+
+
+def _refresh_search_index(table_name: str, key):
+    """Index the record of the table with the key as it is in the database, or remove it from the search index if
+    there is no such record any more. The record is left as it is if it cannot be selected.
+    :type table_name: str
+    """
+    if search_index is None:
+        return
+    query_constructor = new_query_constructor(table_name).add_fields(
+        _get_search_index_fields(table_name)
+    ).add_condition_exact_value(SEARCHED_TABLES[table_name][0], key)
+    selection = database_connector.execute_query(query_constructor.render_select_query(), select=True,
+                                                 parameters=query_constructor.get_select_parameters(), prepared=True,
+                                                 result_format=ResultFormats.records, primary=True)
+    if selection[0] == 1:
+        return
+    if selection[1]:
+        _set_search_index_record(table_name, selection[1][0])
+    else:
+        search_index.remove_record((table_name, key))
 
 
 # Filter Data from Forms
-def filter_customer_selection(form_result: dict) -> bool:
-    """Add the conditions for customers to the SQL query constructor, if any, and return True if at least one condition
-    is added.
+def compile_filters(filters: tuple) -> tuple:
+    """Return the filters with the keys of their form fields in the form result, which `apply_filters` reads, worked
+    out beforehand.
+    :type filters: tuple
+    """
+    return tuple(
+        (name + "_selection", filter_type, field,
+         tuple(name + suffix for suffix in FILTER_FORM_FIELD_SUFFIXES[filter_type]))
+        for name, filter_type, field in filters
+    )
+
+
+# The filters of each data filter form, as tuples of the name of the filter (which the names of its form fields start
+# with), the type of filter and the field it filters on. They are compiled once, when the module is imported
+CUSTOMER_FILTERS = compile_filters((
+    ("customer_id", FILTER_EXACT_VALUE, DBFields.Customers.id),
+    ("first_name", FILTER_LIKE, DBFields.Customers.first_name),
+    ("last_name", FILTER_LIKE, DBFields.Customers.last_name),
+    ("email_address", FILTER_EXACT_VALUE, DBFields.Customers.email_address),
+    ("phone", FILTER_EXACT_VALUE, DBFields.Customers.phone)
+))
+LOCATION_FILTERS = compile_filters((
+    ("location", FILTER_LOCATION, None),
+))
+PRODUCT_FILTERS = compile_filters((
+    ("gtin14", FILTER_LIKE, DBFields.Products.gtin14),
+    ("name", FILTER_LIKE, DBFields.Products.name),
+    ("desc", FILTER_LIKE, DBFields.Products.description),
+    ("product_search", FILTER_FULLTEXT, (DBFields.Products.name, DBFields.Products.description)),
+    ("qty_in_stock", FILTER_RANGED_VALUES, DBFields.Products.qty_in_stock)
+))
+CUSTOMER_ORDER_FILTERS = compile_filters((
+    ("customer_order_id", FILTER_EXACT_VALUE, DBFields.CustomerOrders.id),
+    ("customer_datetime_ordered", FILTER_RANGED_VALUES, DBFields.CustomerOrders.datetime_ordered),
+    ("customer_delivery_date", FILTER_RANGED_VALUES, DBFields.CustomerOrders.delivery_date)
+))
+CUSTOMER_ORDER_LOCATION_FILTERS = compile_filters((
+    ("customer_order_location", FILTER_LOCATION, None),
+))
+COMPANY_ORDER_FILTERS = compile_filters((
+    ("company_order_id", FILTER_EXACT_VALUE, DBFields.CompanyOrders.id),
+    ("company_datetime_ordered", FILTER_RANGED_VALUES, DBFields.CompanyOrders.datetime_ordered),
+    ("company_delivery_date", FILTER_RANGED_VALUES, DBFields.CompanyOrders.delivery_date),
+    ("qty_bought", FILTER_RANGED_VALUES, DBFields.CompanyOrders.qty_bought)
+))
+
+
+def apply_filters(query_constructor: QueryConstructor, filters: tuple, form_result: dict) -> tuple:
+    """Return a tuple of the query constructor with the condition of each filter that is selected in the form added,
+    and whether at least one condition is added. The filters must be compiled with `compile_filters`.
+    :type query_constructor: QueryConstructor
+    :type filters: tuple
+    :type form_result: dict
     """
-    customers_query_constructor.reset()
     condition_count = 0
-    if form_result["customer_id_selection"][0] == "filter":
-        customers_query_constructor.add_condition_exact_value(
-            DBFields.Customers.id,
-            form_result["customer_id_string"][0]
-        )
+    for selection_key, filter_type, field, keys in filters:
+        if form_result[selection_key][0] != "filter":
+            continue
+        if filter_type == FILTER_EXACT_VALUE:
+            query_constructor = query_constructor.add_condition_exact_value(field, form_result[keys[0]][0])
+        elif filter_type == FILTER_LIKE:
+            query_constructor = query_constructor.add_condition_like(field, form_result[keys[0]][0],
+                                                                     at_beginning=(keys[1] in form_result),
+                                                                     at_end=(keys[2] in form_result))
+        elif filter_type == FILTER_RANGED_VALUES:
+            query_constructor = query_constructor.add_condition_ranged_values(
+                field, lower_limit=form_result[keys[0]][0], upper_limit=form_result[keys[1]][0]
+            )
+        elif filter_type == FILTER_LOCATION:
+            query_constructor = (
+                query_constructor
+                .add_condition_like(DBFields.Locations.place_no, form_result[keys[0]][0])
+                .add_condition_like(DBFields.Locations.road_name, form_result[keys[1]][0])
+                .add_condition_like(DBFields.Locations.city, form_result[keys[2]][0])
+            )
+        elif filter_type == FILTER_FULLTEXT:
+            query_constructor = query_constructor.add_condition_match(field, form_result[keys[0]][0])
         condition_count += 1
-    if form_result["first_name_selection"][0] == "filter":
-        customers_query_constructor.add_condition_like(
-            DBFields.Customers.first_name,
-            form_result["first_name_string"][0],
-            at_beginning=("first_name_at_beginning" in form_result),
-            at_end=("first_name_at_end" in form_result)
-        )
-        condition_count += 1
-    if form_result["last_name_selection"][0] == "filter":
-        customers_query_constructor.add_condition_like(
-            DBFields.Customers.last_name,
-            form_result["last_name_string"][0],
-            at_beginning=("last_name_at_beginning" in form_result),
-            at_end=("last_name_at_end" in form_result)
-        )
-        condition_count += 1
-    if form_result["email_address_selection"][0] == "filter":
-        customers_query_constructor.add_condition_exact_value(
-            DBFields.Customers.email_address,
-            form_result["email_address_string"][0]
-        )
-        condition_count += 1
-    if form_result["phone_selection"][0] == "filter":
-        customers_query_constructor.add_condition_exact_value(
-            DBFields.Customers.phone,
-            form_result["phone_string"][0]
-        )
-        condition_count += 1
-    return bool(condition_count)
+    return query_constructor, bool(condition_count)
 
 
-def filter_location_selection(form_result: dict) -> bool:
-    """Add the conditions for locations to the SQL query constructor, if any, and return True if at least one condition
-    is added.
+def filter_customer_selection(form_result: dict, query_constructor: QueryConstructor = None) -> tuple:
+    """Return a tuple of the query constructor for customers with their conditions added, if any, and whether at
+    least one condition is added. A new query constructor is used if none is given.
     """
-    locations_query_constructor.reset()
-    if form_result["location_selection"][0] == "filter":
-        locations_query_constructor.add_condition_like(
-            DBFields.Locations.place_no,
-            form_result["location_place_no"][0]
-        )
-        locations_query_constructor.add_condition_like(
-            DBFields.Locations.road_name,
-            form_result["location_road_name"][0]
-        )
-        locations_query_constructor.add_condition_like(
-            DBFields.Locations.city,
-            form_result["location_city"][0]
-        )
-        return True
-    return False
+    if query_constructor is None:
+        query_constructor = new_query_constructor(DBSchemaTableNames.customers)
+    return apply_filters(query_constructor, CUSTOMER_FILTERS, form_result)
 
 
-def filter_product_selection(form_result: dict) -> bool:
-    """Add the condition for products to the SQL query constructor, if any, and return True if at least one condition
-    is added.
+def filter_location_selection(form_result: dict, query_constructor: QueryConstructor = None) -> tuple:
+    """Return a tuple of the query constructor for locations with their conditions added, if any, and whether at
+    least one condition is added. A new query constructor is used if none is given.
     """
-    products_query_constructor.reset()
-    condition_count = 0
-    if form_result["gtin14_selection"][0] == "filter":
-        products_query_constructor.add_condition_like(
-            DBFields.Products.gtin14,
-            form_result["gtin14_string"][0],
-            at_beginning=("gtin14_at_beginning" in form_result),
-            at_end=("gtin14_at_end" in form_result)
-        )
-        condition_count += 1
-    if form_result["name_selection"][0] == "filter":
-        products_query_constructor.add_condition_like(
-            DBFields.Products.name,
-            form_result["name_string"][0],
-            at_beginning=("name_at_beginning" in form_result),
-            at_end=("name_at_end" in form_result)
-        )
-        condition_count += 1
-    if form_result["desc_selection"][0] == "filter":
-        products_query_constructor.add_condition_like(
-            DBFields.Products.description,
-            form_result["desc_string"][0],
-            at_beginning=("desc_at_beginning" in form_result),
-            at_end=("desc_at_end" in form_result)
+    if query_constructor is None:
+        query_constructor = new_query_constructor(DBSchemaTableNames.locations)
+    return apply_filters(query_constructor, LOCATION_FILTERS, form_result)
+
+
+def filter_product_selection(form_result: dict, query_constructor: QueryConstructor = None) -> tuple:
+    """Return a tuple of the query constructor for products with their conditions added, if any, and whether at least
+    one condition is added. A new query constructor is used if none is given.
+    """
+    if query_constructor is None:
+        query_constructor = new_query_constructor(DBSchemaTableNames.products)
+    return apply_filters(query_constructor, PRODUCT_FILTERS, form_result)
+
+
+def filter_customer_order_selection(form_result: dict, query_constructor: QueryConstructor = None) -> tuple:
+    """Return a tuple of the query constructor for customer orders with their conditions added, if any, and whether at
+    least one condition is added. A new query constructor is used if none is given.
+    """
+    if query_constructor is None:
+        query_constructor = new_query_constructor(DBSchemaTableNames.customer_orders)
+    query_constructor, is_filtered = apply_filters(query_constructor, CUSTOMER_ORDER_FILTERS, form_result)
+    if form_result["customer_order_location_selection"][0] == "filter":
+        locations_query_constructor = apply_filters(new_query_constructor(DBSchemaTableNames.locations),
+                                                    CUSTOMER_ORDER_LOCATION_FILTERS, form_result)[0]
+        query_constructor = query_constructor.add_related_query(locations_query_constructor)
+        is_filtered = True
+    return query_constructor, is_filtered
+
+
+def filter_company_order_selection(form_result: dict, query_constructor: QueryConstructor = None) -> tuple:
+    """Return a tuple of the query constructor for company orders with their conditions added, if any, and whether at
+    least one condition is added. A new query constructor is used if none is given.
+    """
+    if query_constructor is None:
+        query_constructor = new_query_constructor(DBSchemaTableNames.company_orders)
+    return apply_filters(query_constructor, COMPANY_ORDER_FILTERS, form_result)
+
+
+# Select Data Listed
+# Each list of records is selected with the same query by its page and by its report, filtered by the last result of
+# the data filter form of the page, if any. Only the fields shown by the table of the page (in `templates/dataTables`)
+# are selected, so that large text such as the descriptions of products is only read by the details view and the
+# report that show it
+CUSTOMER_LIST_FIELDS = (DBFields.Customers.id, DBFields.Customers.first_name, DBFields.Customers.last_name,
+                        DBFields.Customers.email_address, DBFields.Customers.phone)
+PRODUCT_LIST_FIELDS = (DBFields.Products.gtin14, DBFields.Products.name, DBFields.Products.qty_in_stock)
+PRODUCT_REPORT_FIELDS = PRODUCT_LIST_FIELDS + (DBFields.Products.description,)
+CUSTOMER_ORDER_LIST_FIELDS = (DBFields.CustomerOrders.id, DBFields.CustomerOrders.customer_id,
+                              DBFields.CustomerOrders.datetime_ordered, DBFields.CustomerOrders.delivery_date,
+                              DBFields.CustomerOrders.delivery_location)
+COMPANY_ORDER_LIST_FIELDS = (DBFields.CompanyOrders.id, DBFields.CompanyOrders.product_gtin14,
+                             DBFields.CompanyOrders.datetime_ordered, DBFields.CompanyOrders.qty_bought,
+                             DBFields.CompanyOrders.delivery_date)
+
+
+def remember_data_filter(link_name: str, form_result: dict = None):
+    """Remember the result of the data filter form of the list page in the session of the user, or forget it if no
+    result is given.
+    :type link_name: str
+    :type form_result: dict
+    """
+    if form_result is None:
+        session.pop(SESSION_DATA_FILTER.format(link_name), None)
+    else:
+        session[SESSION_DATA_FILTER.format(link_name)] = form_result
+
+
+def get_remembered_data_filter(link_name: str):
+    """Return the result of the data filter form last used on the list page by the user, or None if there is none.
+    :type link_name: str
+    """
+    return session.get(SESSION_DATA_FILTER.format(link_name))
+
+
+def get_customers_query_constructor(form_result: dict = None, fields=CUSTOMER_LIST_FIELDS) -> QueryConstructor:
+    """Return the query constructor of the fields of the customers listed, filtered by the result of the data filter
+    form if given.
+    :type form_result: dict
+    """
+    customers_query_constructor = new_query_constructor(DBSchemaTableNames.customers).add_fields(fields).add_order(
+        DBFields.Customers.id, ascending=True
+    )
+    if form_result is None:
+        return customers_query_constructor
+    customers_query_constructor = filter_customer_selection(form_result, customers_query_constructor)[0]
+    locations_query_constructor, is_filtered = filter_location_selection(form_result)
+    if is_filtered:
+        customers_query_constructor = customers_query_constructor.add_related_query(
+            new_query_constructor(DBSchemaTableNames.customer_locations).add_related_query(locations_query_constructor)
         )
-        condition_count += 1
-    if form_result["qty_in_stock_selection"][0] == "filter":
-        products_query_constructor.add_condition_ranged_values(
-            DBFields.Products.qty_in_stock,
-            lower_limit=form_result["qty_in_stock_lower_limit_string"][0],
-            upper_limit=form_result["qty_in_stock_upper_limit_string"][0]
+    customer_orders_query_constructor, is_filtered = filter_customer_order_selection(form_result)
+    if is_filtered:
+        customers_query_constructor = customers_query_constructor.add_related_query(customer_orders_query_constructor)
+    products_query_constructor, is_filtered = filter_product_selection(form_result)
+    if is_filtered:
+        customer_order_items_query_constructor = new_query_constructor(
+            DBSchemaTableNames.customer_order_items
+        ).add_related_query(products_query_constructor)
+        customers_query_constructor = customers_query_constructor.add_related_query(
+            new_query_constructor(DBSchemaTableNames.customer_orders).add_related_query(
+                customer_order_items_query_constructor
+            )
         )
-        condition_count += 1
-    return bool(condition_count)
+    return customers_query_constructor
 
 
-def filter_customer_order_selection(form_result: dict) -> bool:
-    """Add the condition for customer orders to the SQL query constructor, if any, and return True if at least one
-    condition is added.
+def get_products_query_constructor(form_result: dict = None, fields=PRODUCT_LIST_FIELDS) -> QueryConstructor:
+    """Return the query constructor of the fields of the products listed, filtered by the result of the data filter
+    form if given.
+    :type form_result: dict
     """
-    customer_orders_query_constructor.reset()
-    condition_count = 0
-    if form_result["customer_order_id_selection"][0] == "filter":
-        customer_orders_query_constructor.add_condition_exact_value(
-            DBFields.CustomerOrders.id,
-            form_result["customer_order_id_string"][0]
+    products_query_constructor = new_query_constructor(DBSchemaTableNames.products).add_fields(fields).add_order(
+        DBFields.Products.gtin14, ascending=True
+    )
+    if form_result is None:
+        return products_query_constructor
+    products_query_constructor = filter_product_selection(form_result, products_query_constructor)[0]
+    customers_query_constructor, is_filtered = filter_customer_selection(form_result)
+    if is_filtered:
+        products_query_constructor = products_query_constructor.add_related_query(
+            _get_customer_order_items_of_orders(
+                new_query_constructor(DBSchemaTableNames.customer_orders).add_related_query(customers_query_constructor)
+            )
         )
-        condition_count += 1
-    if form_result["customer_datetime_ordered_selection"][0] == "filter":
-        customer_orders_query_constructor.add_condition_ranged_values(
-            DBFields.CustomerOrders.datetime_ordered,
-            lower_limit=form_result["customer_datetime_ordered_lower_limit_string"][0],
-            upper_limit=form_result["customer_datetime_ordered_upper_limit_string"][0]
+    locations_query_constructor, is_filtered = filter_location_selection(form_result)
+    if is_filtered:
+        products_query_constructor = products_query_constructor.add_related_query(
+            _get_customer_order_items_of_orders(
+                new_query_constructor(DBSchemaTableNames.customer_orders).add_related_query(locations_query_constructor)
+            )
         )
-        condition_count += 1
-    if form_result["customer_delivery_date_selection"][0] == "filter":
-        customer_orders_query_constructor.add_condition_ranged_values(
-            DBFields.CustomerOrders.delivery_date,
-            lower_limit=form_result["customer_delivery_date_lower_limit_string"][0],
-            upper_limit=form_result["customer_delivery_date_upper_limit_string"][0]
+    customer_orders_query_constructor, is_filtered = filter_customer_order_selection(form_result)
+    if is_filtered:
+        products_query_constructor = products_query_constructor.add_related_query(
+            _get_customer_order_items_of_orders(customer_orders_query_constructor)
         )
-        condition_count += 1
-    if form_result["customer_order_location_selection"][0] == "filter":
-        locations_query_constructor.reset()
-        locations_query_constructor.add_condition_like(
-            DBFields.Locations.place_no,
-            form_result["customer_order_location_place_no"][0]
-        )
-        locations_query_constructor.add_condition_like(
-            DBFields.Locations.road_name,
-            form_result["customer_order_location_road_name"][0]
+    company_orders_query_constructor, is_filtered = filter_company_order_selection(form_result)
+    if is_filtered:
+        products_query_constructor = products_query_constructor.add_related_query(company_orders_query_constructor)
+    return products_query_constructor
+
+
+def _get_customer_order_items_of_orders(customer_orders_query_constructor: QueryConstructor) -> QueryConstructor:
+    """Return a query constructor for the customer order items of the customer orders of the query constructor."""
+    return new_query_constructor(DBSchemaTableNames.customer_order_items).add_related_query(
+        customer_orders_query_constructor
+    )
+
+
+def get_customer_orders_query_constructor(form_result: dict = None,
+                                          fields=CUSTOMER_ORDER_LIST_FIELDS) -> QueryConstructor:
+    """Return the query constructor of the fields of the customer orders listed, filtered by the result of the data
+    filter form if given.
+    :type form_result: dict
+    """
+    customer_orders_query_constructor = new_query_constructor(DBSchemaTableNames.customer_orders).add_fields(
+        fields
+    ).add_order(DBFields.CustomerOrders.id, ascending=True)
+    if form_result is None:
+        return customer_orders_query_constructor
+    customer_orders_query_constructor = filter_customer_order_selection(form_result,
+                                                                        customer_orders_query_constructor)[0]
+    customers_query_constructor, is_filtered = filter_customer_selection(form_result)
+    if is_filtered:
+        customer_orders_query_constructor = customer_orders_query_constructor.add_related_query(
+            customers_query_constructor
         )
-        locations_query_constructor.add_condition_like(
-            DBFields.Locations.city,
-            form_result["customer_order_location_city"][0]
+    locations_query_constructor, is_filtered = filter_location_selection(form_result)
+    if is_filtered:
+        customer_orders_query_constructor = customer_orders_query_constructor.add_related_query(
+            locations_query_constructor
         )
-        locations_query_constructor.add_field(DBFields.Locations.id)
-        customer_orders_query_constructor.add_nested_query(
-            DBFields.CustomerOrders.delivery_location,
-            locations_query_constructor.render_select_query()
+    products_query_constructor, is_filtered = filter_product_selection(form_result)
+    if is_filtered:
+        customer_orders_query_constructor = customer_orders_query_constructor.add_related_query(
+            new_query_constructor(DBSchemaTableNames.customer_order_items).add_related_query(
+                products_query_constructor
+            )
         )
-        condition_count += 1
-    return bool(condition_count)
+    return customer_orders_query_constructor
 
 
-def filter_company_order_selection(form_result: dict) -> bool:
-    """Add the condition for company orders to the SQL query constructor, if any, and return True if at least one
-    condition is added.
+def get_company_orders_query_constructor(form_result: dict = None,
+                                         fields=COMPANY_ORDER_LIST_FIELDS) -> QueryConstructor:
+    """Return the query constructor of the fields of the company orders listed, filtered by the result of the data
+    filter form if given.
+    :type form_result: dict
     """
-    company_orders_query_constructor.reset()
-    condition_count = 0
-    if form_result["company_order_id_selection"][0] == "filter":
-        company_orders_query_constructor.add_condition_exact_value(
-            DBFields.CompanyOrders.id,
-            form_result["company_order_id_string"][0]
-        )
-        condition_count += 1
-    if form_result["company_datetime_ordered_selection"][0] == "filter":
-        company_orders_query_constructor.add_condition_ranged_values(
-            DBFields.CompanyOrders.datetime_ordered,
-            lower_limit=form_result["company_datetime_ordered_lower_limit_string"][0],
-            upper_limit=form_result["company_datetime_ordered_upper_limit_string"][0]
+    company_orders_query_constructor = new_query_constructor(DBSchemaTableNames.company_orders).add_fields(
+        fields
+    ).add_order(DBFields.CompanyOrders.id, ascending=True)
+    if form_result is None:
+        return company_orders_query_constructor
+    company_orders_query_constructor = filter_company_order_selection(form_result,
+                                                                      company_orders_query_constructor)[0]
+    products_query_constructor, is_filtered = filter_product_selection(form_result)
+    if is_filtered:
+        company_orders_query_constructor = company_orders_query_constructor.add_related_query(
+            products_query_constructor
         )
-        condition_count += 1
-    if form_result["company_delivery_date_selection"][0] == "filter":
-        company_orders_query_constructor.add_condition_ranged_values(
-            DBFields.CompanyOrders.delivery_date,
-            lower_limit=form_result["company_delivery_date_lower_limit_string"][0],
-            upper_limit=form_result["company_delivery_date_upper_limit_string"][0]
+    return company_orders_query_constructor
+
+
+# Select Summed Orders
+# The quantities of products ordered for delivery on each date are read from the rollups, which hold one row per
+# product and delivery date, instead of summing every order (see `database/rollups.py`)
+def get_product_demand_query_constructor(product_gtin14: str) -> QueryConstructor:
+    """Return the query constructor of the quantity of the product ordered by customers for each delivery date.
+    :type product_gtin14: str
+    """
+    return new_query_constructor(DBSchemaTableNames.daily_product_demand).add_fields((
+        DBFields.DailyProductDemand.delivery_date, DBFields.DailyProductDemand.qty_ordered,
+        DBFields.DailyProductDemand.number_of_orders
+    )).add_condition_exact_value(DBFields.DailyProductDemand.product_gtin14, product_gtin14)
+
+
+def get_product_inbound_stock_query_constructor(product_gtin14: str) -> QueryConstructor:
+    """Return the query constructor of the quantity of the product ordered from suppliers for each delivery date.
+    :type product_gtin14: str
+    """
+    return new_query_constructor(DBSchemaTableNames.daily_inbound_stock).add_fields((
+        DBFields.DailyInboundStock.delivery_date, DBFields.DailyInboundStock.qty_bought,
+        DBFields.DailyInboundStock.number_of_orders
+    )).add_condition_exact_value(DBFields.DailyInboundStock.product_gtin14, product_gtin14)
+
+
+def get_product_deliveries(demand_records, inbound_stock_records) -> list:
+    """Return a list of the deliveries of a product, in order of delivery date, as dictionaries of the delivery date
+    and the quantity and number of customer orders and company orders delivered on it, given the records selected with
+    `get_product_demand_query_constructor` and `get_product_inbound_stock_query_constructor`.
+    """
+    deliveries = {}
+    for record in demand_records:
+        deliveries.setdefault(str(record.delivery_date), _new_delivery(record.delivery_date)).update(
+            qty_ordered=record.qty_ordered, number_of_customer_orders=record.number_of_orders
         )
-        condition_count += 1
-    if form_result["qty_bought_selection"][0] == "filter":
-        company_orders_query_constructor.add_condition_ranged_values(
-            DBFields.CompanyOrders.qty_bought,
-            lower_limit=form_result["qty_bought_lower_limit_string"][0],
-            upper_limit=form_result["qty_bought_upper_limit_string"][0]
+    for record in inbound_stock_records:
+        deliveries.setdefault(str(record.delivery_date), _new_delivery(record.delivery_date)).update(
+            qty_bought=record.qty_bought, number_of_company_orders=record.number_of_orders
         )
-        condition_count += 1
-    return bool(condition_count)
+    return [deliveries[delivery_date] for delivery_date in sorted(deliveries)]
+
+
+def _new_delivery(delivery_date) -> dict:
+    return {"delivery_date": delivery_date, "qty_ordered": 0, "number_of_customer_orders": 0, "qty_bought": 0,
+            "number_of_company_orders": 0}
+
+
+# Stream Templates
+def render_streamed_template(template_name: str, **context) -> Response:
+    """Render the template as a response that is sent while it is being rendered, so that records given to it as a
+    generator are never all held in memory at once.
+    :type template_name: str
+    """
+    # Flashed messages are taken out of the session now, since the session is saved before the response is streamed
+    get_flashed_messages()
+    current_app.update_template_context(context)
+    template = current_app.jinja_env.get_template(template_name)
+    stream = template.stream(context)
+    stream.enable_buffering(5)
+    return Response(stream_with_context(stream))
 
 
 # Make Text Ready for Latin-1 Encoding